@@ -0,0 +1,35 @@
+"""
+kmeans on the cpu (numpy and the MPI-Kmeans C core) and on the gpu (cuda).
+
+Importing the package is cheap: no backend, numpy or pycuda is loaded
+until it is first used, so a CUDA context is only created when a gpu
+backend actually runs.
+
+    import kmeans
+    centroids, labels = kmeans.kmeans(X, k)     # X is (nPts, nDim)
+    kmeans.available_backends()                 # e.g. ['cpu', 'mpi']
+    kmeans.cuda_kmeans.kmeans_gpu(...)          # loads pycuda here
+"""
+
+import importlib
+
+from .backends import available_backends, has_cuda, has_mpi
+
+# submodules loaded on first attribute access
+_LAZY_MODULES = ("async_kmeans", "coreset", "cpu_kmeans", "cpu_kmeans_tri", "cuda_kmeans",
+                 "cuda_kmeans_tri", "dispatch", "dist_kmeans", "kernel_cache", "layout",
+                 "libmpikmeans", "minibatch_kmeans", "model_file", "mods1", "mods2", "ooc_kmeans",
+                 "py_kmeans", "result_cache", "shm_kmeans", "stream_kmeans", "trace",
+                 "vocab_tree", "window_kmeans")
+
+
+def kmeans(X, k, iterations=10, init=None, seed=None, backend=None, cache=None, threads=1):
+    # kmeans(X, k [, iterations [, init [, seed [, backend [, cache [, threads]]]]]]) returns (centroids, labels)
+    # see kmeans.dispatch for how the backend is selected and results are cached
+    from .dispatch import kmeans
+    return kmeans(X, k, iterations, init, seed, backend, cache, threads)
+
+def __getattr__(name):
+    if name in _LAZY_MODULES:
+        return importlib.import_module("." + name, __name__)
+    raise AttributeError("module %r has no attribute %r" % (__name__, name))
@@ -0,0 +1,235 @@
+import asyncio
+import collections
+import os
+import threading
+import time
+import weakref
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+from . import layout, trace
+from .ooc_kmeans import CHUNK_SIZE
+
+#------------------------------------------------------------------------------------
+#               asyncio front end: kmeans off the event loop
+#------------------------------------------------------------------------------------
+#
+# fit() and predict() are coroutines that run the clustering on the threads
+# of a Pool, so the event loop keeps serving while the C core or numpy works.
+# Threads are enough: the C core is called through ctypes, and py_kmeans,
+# with the GIL released, and numpy releases it in its array loops and BLAS,
+# so several jobs run on several cores.
+#
+# A fit runs one Lloyd iteration at a time in the worker: the C core keeps
+# the points' bounds between iterations in a libmpikmeans.Shard, as for the
+# distributed drivers, and the "cpu" backend runs one assign_cpu/calc_cpu
+# round of cpu_kmeans.  Between iterations the worker
+#
+#   - reports a Progress (iteration, sse, points that changed cluster), which
+#     fit_progress() yields as an async iterator, and
+#   - stops if the task awaiting it was cancelled; the CancelledError is
+#     raised at once and the worker thread ends at its next iteration boundary.
+#
+# A Pool has max_workers threads and lets at most max_pending jobs be queued
+# or running; further fit() / predict() calls wait for a slot, so a burst of
+# requests is held back in the event loop instead of piling up arrays in the
+# executor queue.  A slot is given back when its thread really finishes, also
+# after a cancellation.  The slots are counted per event loop, as an asyncio
+# semaphore belongs to one loop, so a Pool, and default_pool(), which is
+# shared by all calls that do not pass their own, can serve several loops in
+# turn (asyncio.run() twice) or at once.
+#
+#     async for p in async_kmeans.fit_progress(X, clusters, 50):
+#         print(p.iteration, p.sse)
+#     clusters, labels, sse = await async_kmeans.fit(X, clusters, 50)
+
+MAX_WORKERS = os.cpu_count() or 1
+MAX_PENDING = 4             # jobs queued or running per worker thread
+
+# one report per iteration; the last of a fit has done set and the labels
+Progress = collections.namedtuple("Progress", "iteration sse changed clusters labels done")
+
+_default_pool = None
+
+
+class Pool(object):
+    # a bounded thread pool shared by concurrent requests
+
+    def __init__(self, max_workers = None, max_pending = None):
+        self.max_workers = max_workers or MAX_WORKERS
+        self.max_pending = max_pending or MAX_PENDING * self.max_workers
+        self.executor = ThreadPoolExecutor(self.max_workers, thread_name_prefix = "kmeans-async")
+        self.slots = weakref.WeakKeyDictionary()   # asyncio.Semaphore of each event loop
+
+    async def submit(self, fn, *args):
+        # waits for a slot, then returns the asyncio future of fn(*args) on the pool
+        loop = asyncio.get_running_loop()
+        slots = self.slots.get(loop)
+        if slots is None:
+            slots = self.slots[loop] = asyncio.Semaphore(self.max_pending)
+        await slots.acquire()
+        try:
+            future = self.executor.submit(fn, *args)
+        except BaseException:
+            slots.release()
+            raise
+
+        def release(f):
+            # the loop may have been closed while a cancelled job ran on
+            if not loop.is_closed():
+                loop.call_soon_threadsafe(slots.release)
+
+        future.add_done_callback(release)
+        return asyncio.wrap_future(future)
+
+    def close(self, wait = True):
+        self.executor.shutdown(wait = wait)
+
+
+def default_pool():
+    global _default_pool
+    if _default_pool is None:
+        _default_pool = Pool()
+    return _default_pool
+
+
+#------------------------------------------------------------------------------------
+#                               workers
+#------------------------------------------------------------------------------------
+
+def lloyd_mpi(X, clusters, iterations, report, stop):
+    # Lloyd iterations in the C core, keeping the bounds in a Shard between them
+    from .dist_kmeans import update
+    from .libmpikmeans import Shard
+
+    X = layout.c_order(X, np.float64, "async")
+    clusters = np.array(clusters, dtype = np.float64)
+    shard = Shard(X, clusters.shape[0])
+    try:
+        sse = None
+        for i in range(iterations + 1):
+            if stop.is_set():
+                return None
+            t1 = time.time()
+            sums, counts, sse, nchanged = shard.assign(clusters)
+            trace.record(trace.ASSIGN, t1, time.time(), "async", points = len(X),
+                         changed = nchanged)
+            # the last round only brings the labels and sse up to date
+            if i == iterations or (i > 0 and nchanged == 0):
+                break
+            report(i, sse, nchanged, clusters)
+            update(clusters, sums, counts)
+        return clusters, shard.labels.astype(np.int32), sse
+    finally:
+        shard.close()
+
+def lloyd_cpu(X, clusters, iterations, report, stop):
+    # Lloyd iterations of cpu_kmeans on (nDim, nPts) float32, as kmeans_cpu runs them,
+    # until no label changes
+    from .cpu_kmeans import assign_cpu, calc_cpu
+
+    data = layout.any_order(np.asarray(X).T, np.float32, "async")
+    clusters = np.array(np.asarray(clusters).T, dtype = np.float32)
+    assign = None
+    for i in range(iterations):
+        if stop.is_set():
+            return None
+        old = assign
+        assign = assign_cpu(data, clusters)
+        nchanged = len(assign) if old is None else int((assign != old.ravel()).sum())
+        if nchanged == 0:
+            # the clusters are the means of these labels already
+            labels = assign
+            break
+        report(i, None, nchanged, clusters.T)
+        clusters = calc_cpu(data, assign, clusters)
+    else:
+        labels = assign_cpu(data, clusters)
+    diff = data - clusters[:, labels]
+    return clusters.T.astype(np.float64), labels.astype(np.int32), float((diff * diff).sum())
+
+LLOYD = {"mpi": lloyd_mpi, "cpu": lloyd_cpu}
+
+def assign_rows(X, clusters, stop):
+    # 0-based nearest center of each row of X in the C core, a chunk at a time
+    from ctypes import c_uint
+    from .libmpikmeans import load
+
+    lib = load()
+    X = layout.c_order(X, np.float64, "async")
+    clusters = np.ascontiguousarray(clusters, dtype = np.float64)
+    (nPts, nDim) = X.shape
+    if clusters.shape[1] != nDim:
+        raise ValueError("X has %d columns, the centers %d" % (nDim, clusters.shape[1]))
+    labels = np.empty(nPts, c_uint)
+    for start in range(0, nPts, CHUNK_SIZE):
+        if stop.is_set():
+            return None
+        stop_row = min(nPts, start + CHUNK_SIZE)
+        lib.kmeans_assign(clusters, X[start:stop_row], labels[start:stop_row], nDim,
+                          stop_row - start, clusters.shape[0])
+    return labels.view(np.int32)
+
+
+#------------------------------------------------------------------------------------
+#                               coroutines
+#------------------------------------------------------------------------------------
+
+async def _run(pool, fn, *args):
+    # run fn(*args, stop) on the pool; cancelling the caller sets stop
+    stop = threading.Event()
+    future = await (pool or default_pool()).submit(fn, *(args + (stop,)))
+    try:
+        return await future
+    except asyncio.CancelledError:
+        stop.set()
+        raise
+
+async def fit_progress(X, clusters, iterations, backend = "mpi", pool = None):
+    # async iterator of the Progress of a fit; the last one has done set
+
+    # X is (nPts, nDim) and clusters the (nClusters, nDim) start; the run stops after
+    # iterations rounds or when no point changes cluster.  Leaving the loop early, or
+    # cancelling the task iterating, stops the worker at its next iteration.
+    if backend not in LLOYD:
+        raise ValueError("backend must be one of %s" % sorted(LLOYD))
+    loop = asyncio.get_running_loop()
+    queue = asyncio.Queue()
+
+    def report(i, sse, nchanged, centers):
+        p = Progress(i, sse, nchanged, np.array(centers, dtype = np.float64), None, False)
+        loop.call_soon_threadsafe(queue.put_nowait, p)
+
+    task = asyncio.ensure_future(_run(pool, LLOYD[backend], X, clusters, iterations, report))
+    done = 0                # iterations reported
+    try:
+        while True:
+            get = asyncio.ensure_future(queue.get())
+            await asyncio.wait([get, task], return_when = asyncio.FIRST_COMPLETED)
+            if get.done():
+                done += 1
+                yield get.result()
+                continue
+            get.cancel()
+            # the reports queued before the worker finished come first
+            while not queue.empty():
+                done += 1
+                yield queue.get_nowait()
+            (centers, labels, sse) = task.result()
+            yield Progress(done, sse, None, centers, labels, True)
+            return
+    finally:
+        task.cancel()
+
+async def fit(X, clusters, iterations, backend = "mpi", pool = None):
+    # fit(X, clusters, iterations [, backend [, pool]]) returns (clusters, labels, sse)
+
+    # as fit_progress without the reports; cancelling the task stops the worker
+    if backend not in LLOYD:
+        raise ValueError("backend must be one of %s" % sorted(LLOYD))
+    return await _run(pool, LLOYD[backend], X, clusters, iterations, lambda *args: None)
+
+async def predict(X, clusters, pool = None):
+    # predict(X, clusters [, pool]) returns the 0-based nearest center of each row as int32
+    return await _run(pool, assign_rows, X, clusters)
@@ -0,0 +1,65 @@
+"""
+Capability probing for the kmeans backends.
+
+Nothing here imports pycuda, numpy or any backend module: probing only
+looks for the modules, the C core library and the CUDA driver library on
+disk, so it never creates a device context.  Results are cached for the
+process, except where the C core library is, which KMEANS_MPI_LIB can change.
+"""
+
+import os
+
+BACKENDS = ("cpu", "tri_cpu", "mpi", "shm", "cuda", "tri")
+
+LIBRARY = "libmpikmeans.so"
+INSTALLED = "_libmpikmeans_core.so"     # name of the copy in the package directory
+
+_probed = {}
+
+
+def has_module(name):
+    # check whether a module could be imported, without importing it
+    if name not in _probed:
+        import importlib.util
+        try:
+            _probed[name] = importlib.util.find_spec(name) is not None
+        except (ImportError, ValueError):
+            _probed[name] = False
+    return _probed[name]
+
+def has_cuda():
+    # pycuda is installed and a CUDA driver library can be found
+    if not has_module("pycuda"):
+        return False
+    if "libcuda" not in _probed:
+        import ctypes.util
+        _probed["libcuda"] = ctypes.util.find_library("cuda") is not None
+    return _probed["libcuda"]
+
+def has_mpi():
+    # the compiled py_kmeans wrapper of the C core is in the package
+    return has_module(__package__ + ".py_kmeans")
+
+def library_path():
+    # returns the file name of the C core library, or None if it is not built
+    if os.environ.get("KMEANS_MPI_LIB"):
+        return os.environ["KMEANS_MPI_LIB"]
+    here = os.path.dirname(os.path.abspath(__file__))
+    for filename in (os.path.join(here, INSTALLED),
+                     os.path.join(os.path.dirname(here), "mpi_kmeans-1.5", LIBRARY)):
+        if os.path.exists(filename):
+            return filename
+    return None
+
+def available_backends():
+    # returns the names of backends that can run on this host
+    names = []
+    if has_module("numpy"):
+        names += ["cpu", "tri_cpu"]
+    if has_mpi():
+        names.append("mpi")
+    if library_path() is not None:
+        names.append("shm")
+    if has_cuda():
+        names += ["cuda", "tri"]
+    return names
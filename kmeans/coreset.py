@@ -0,0 +1,133 @@
+import time
+
+import numpy as np
+
+from . import trace
+from .ooc_kmeans import CHUNK_SIZE, PREFETCH, prefetch, data_shape, read_chunks, assign_chunk
+
+#------------------------------------------------------------------------------------
+#               coresets: few weighted points that stand in for many
+#------------------------------------------------------------------------------------
+#
+# A coreset is a set of m weighted points whose weighted kmeans cost is, for
+# every choice of centers, within a factor (1 +- eps) of the cost on all nPts
+# points.  Clustering the coreset with the weighted C core (libmpikmeans.kmeans
+# with weights) then gives centers for the full data at a fraction of the cost.
+#
+# Sensitivity sampling: a rough clustering B with nRough centers (kmeans++
+# seeding on a uniform sample) bounds how much each point can matter, its
+# sensitivity
+#
+#     q(x) = alpha d(x,B)^2 / c + 2 alpha cost(P_b) / (|P_b| c) + 4 nPts / |P_b|
+#
+# where P_b is the rough cluster of x, c = cost(B) / nPts the mean cost and
+# alpha = 16 (log k + 2).  m points are drawn with probability q(x) / Q and
+# weighted Q / (m q(x)), which is an unbiased estimate of the cost of any
+# centers.  With m = O((nDim k log k + log 1/delta) / eps^2) points the bound
+# holds for all centers with probability 1 - delta, whatever nPts is.
+#
+# Two passes over the data in chunks, as in ooc_kmeans, so the source can be a
+# memmap or raw file far larger than memory: one for the rough cluster sizes
+# and costs, which also give Q, and one that draws the samples chunk by chunk.
+
+ROUGH_SAMPLE = 100      # rows of the uniform sample per rough center
+
+
+def kmeanspp(X, k, rng):
+    # k rows of X chosen by kmeans++ (D^2) seeding
+    nPts = X.shape[0]
+    centers = [X[rng.randint(nPts)]]
+    dist = ((X - centers[0]) ** 2).sum(1)
+    for j in range(1, k):
+        total = dist.sum()
+        if total > 0:
+            i = rng.choice(nPts, p = dist / total)
+        else:
+            i = rng.randint(nPts)
+        centers.append(X[i])
+        dist = np.minimum(dist, ((X - X[i]) ** 2).sum(1))
+    return np.array(centers)
+
+def sample_rows(source, n, rng, nDim = None, dtype = np.float32, offset = 0):
+    # n distinct random rows of an array, memmap or raw file, as float64
+    if isinstance(source, str):
+        shape = data_shape(source, nDim, dtype, offset)
+        source = np.memmap(source, dtype, "r", offset, shape)
+    rows = np.sort(rng.choice(source.shape[0], min(n, source.shape[0]), replace = False))
+    return np.array(source[rows], dtype = np.float64)
+
+
+def chunk_distances(chunk, rough, rnorm):
+    # (assign, dist) of each row of chunk to its closest rough center
+    assign = assign_chunk(chunk, rough, rnorm)
+    diff = chunk - rough[assign]
+    return assign, (diff * diff).sum(1)
+
+def coreset(source, m, k, nRough = None, random_state = None, chunk_size = CHUNK_SIZE,
+            nDim = None, dtype = np.float32, offset = 0, depth = PREFETCH):
+    # coreset(source, m, k [, nRough [, random_state]]) returns (points, weights)
+
+    # source is an (nPts, nDim) array or memmap, or a raw file as for ooc_kmeans.
+    # k is the number of clusters the coreset is for and nRough, by default k, the
+    # size of the rough clustering.  points is (m, nDim) float64, weights is (m,);
+    # the weights add up to about nPts.
+    rng = np.random.RandomState(random_state)
+    (nPts, nDim) = data_shape(source, nDim, dtype, offset)
+    if nRough is None:
+        nRough = k
+    alpha = 16. * (np.log(k) + 2.)
+
+    t1 = time.time()
+    sample = sample_rows(source, ROUGH_SAMPLE * nRough, rng, nDim, dtype, offset)
+    rough = kmeanspp(sample, min(nRough, len(sample)), rng)
+    rnorm = (rough * rough).sum(1)
+    del sample
+    t2 = time.time()
+    trace.record(trace.SEED, t1, t2, "coreset", "rough", centers = len(rough))
+
+    # pass 1: size and cost of each rough cluster
+    sizes = np.zeros(len(rough), np.int64)
+    costs = np.zeros(len(rough))
+    for start, chunk in prefetch(read_chunks(source, chunk_size, nDim, dtype, offset), depth):
+        assign, dist = chunk_distances(chunk, rough, rnorm)
+        sizes += np.bincount(assign, minlength = len(rough))
+        costs += np.bincount(assign, weights = dist, minlength = len(rough))
+    mean_cost = costs.sum() / nPts
+    if mean_cost <= 0:
+        mean_cost = 1.
+    occupied = sizes > 0
+    # the part of q that is the same for all points of a rough cluster
+    q_cluster = np.zeros(len(rough))
+    q_cluster[occupied] = 2. * alpha * costs[occupied] / (sizes[occupied] * mean_cost) \
+                            + 4. * nPts / sizes[occupied]
+    # the sum of q over all the points follows from the sizes and costs
+    Q = alpha * costs.sum() / mean_cost + (q_cluster * sizes).sum()
+    t3 = time.time()
+    trace.record(trace.ASSIGN, t2, t3, "coreset", "sizes", points = nPts)
+
+    # pass 2: split the m draws over the chunks by their share of Q (a multinomial
+    # drawn chunk by chunk), then draw within each chunk
+    points = np.zeros((m, nDim))
+    weights = np.zeros(m)
+    drawn = 0
+    Q_left = Q
+    for start, chunk in prefetch(read_chunks(source, chunk_size, nDim, dtype, offset), depth):
+        if drawn == m:
+            break
+        assign, dist = chunk_distances(chunk, rough, rnorm)
+        q = alpha * dist / mean_cost + q_cluster[assign]
+        q_chunk = q.sum()
+        n = m - drawn
+        if Q_left > q_chunk:
+            n = rng.binomial(n, q_chunk / Q_left)
+        Q_left -= q_chunk
+        if n == 0:
+            continue
+        rows = rng.choice(len(chunk), n, p = q / q_chunk)
+        points[drawn:drawn + n] = chunk[rows]
+        weights[drawn:drawn + n] = Q / (m * q[rows])
+        drawn += n
+    trace.record(trace.ASSIGN, t3, time.time(), "coreset", "sample", points = nPts,
+                 samples = drawn)
+
+    return points[:drawn], weights[:drawn]
@@ -0,0 +1,118 @@
+import numpy as np
+
+from . import trace
+
+#------------------------------------------------------------------------------------
+#                               kmeans on the cpu
+#------------------------------------------------------------------------------------
+
+BOUNDS = 1.0e-6
+BLOCK = 8192        # points per block of dot products in the cosine assignment
+
+def kmeans_cpu(data, clusters, iterations, metric="euclidean"):
+    # kmeans_cpu(data, clusters, iterations [, metric]) returns (clusters, labels)
+
+    # metric="cosine" runs spherical kmeans on the data and clusters scaled to unit
+    # length, see cosine_kmeans_cpu
+    if metric == "cosine":
+        return cosine_kmeans_cpu(data, clusters, iterations)
+    if metric != "euclidean":
+        raise ValueError("metric must be 'euclidean' or 'cosine'")
+    
+    for i in range(iterations):
+        with trace.span(trace.ASSIGN, "cpu", points=data.shape[1]):
+            assign = assign_cpu(data, clusters)
+        with trace.span(trace.UPDATE, "cpu"):
+            clusters = calc_cpu(data, assign, clusters)
+    assign = np.array(assign).reshape(data.shape[1],)
+    clusters = np.array(clusters).astype(np.float32)
+    return (clusters, assign)
+    
+def bounded_kmeans_cpu(data, clusters, iterations):
+    # kmeans_cpu(data, clusters, iterations) returns (clusters, labels)
+    
+    for i in range(iterations):
+        assign = bounded_assign_cpu(data, clusters, assign)
+        clusters = calc_cpu(data, assign, clusters)
+    assign = np.array(assign).reshape(data.shape[1],)
+    clusters = np.array(clusters).astype(np.float32)
+    return (clusters, assign)
+    
+def assign_cpu(data, clusters):
+    # assign data to the nearest cluster, using cpu
+    
+    cpu_dist = np.sqrt(((data[:,:,np.newaxis]-clusters[:,np.newaxis,:])**2).sum(0))
+    return np.argmin(cpu_dist, 1)
+
+def calc_cpu(data, assign, clusters):
+    # calculate new clusters for the data based on assignments
+
+    # calc_cpu(data, assign, clusters)
+    # clusters argument is the current clusters
+    # returns the recalculated clusters
+    
+    (nDim, nPts) = data.shape
+    nClusters = clusters.shape[1]
+    
+    c = np.arange(nClusters)
+    assign.shape = (nPts, 1)
+    c_counts = np.sum(assign == c, axis=0)
+    cpu_new_clusters = np.sum(data[:,:,np.newaxis] * (assign==c)[np.newaxis,:,:], axis=1) \
+                        / (c_counts + (c_counts == 0))
+    cpu_new_clusters = cpu_new_clusters + clusters * (c_counts == 0)[np.newaxis:,]
+    return cpu_new_clusters
+
+def bounded_assign_cpu(data, clusters, old_assign):
+    # assign data to the nearest cluster if it is more than BOUNDS closer
+    nPts = data.shape[1]
+    cpu_dist = np.sqrt(((data[:,:,np.newaxis]-clusters[:,np.newaxis,:])**2).sum(0))
+    cpu_dist[range(nPts), old_assign] -= BOUNDS
+    return np.argmin(cpu_dist, 1)
+
+
+#------------------------------------------------------------------------------------
+#                           spherical kmeans on the cpu
+#------------------------------------------------------------------------------------
+
+def normalize(a):
+    # columns of a scaled to unit length; columns of length 0 are left as they are
+    norms = np.sqrt((a * a).sum(0))
+    return a / np.where(norms > 0, norms, 1)[np.newaxis, :]
+
+def cosine_kmeans_cpu(data, clusters, iterations):
+    # cosine_kmeans_cpu(data, clusters, iterations) returns (clusters, labels)
+
+    # The data (nDim, nPts) is normalized once.  Each point goes to the cluster of
+    # largest dot product, computed a block of points at a time as one matrix product,
+    # and each cluster becomes the unit mean direction of its points.
+    data = normalize(np.asarray(data, dtype=np.float32))
+    clusters = normalize(np.asarray(clusters, dtype=np.float32))
+    assign = np.zeros(data.shape[1], np.int64)
+    for i in range(iterations):
+        with trace.span(trace.ASSIGN, "cpu", "cosine assign", points=data.shape[1]):
+            assign = assign_cosine_cpu(data, clusters)
+        with trace.span(trace.UPDATE, "cpu", "cosine update"):
+            clusters = calc_cosine_cpu(data, assign, clusters)
+    return (clusters, assign)
+
+def assign_cosine_cpu(data, clusters):
+    # the cluster of largest dot product for each column of data
+    nPts = data.shape[1]
+    assign = np.empty(nPts, np.int64)
+    for start in range(0, nPts, BLOCK):
+        block = data[:, start:start + BLOCK]
+        assign[start:start + block.shape[1]] = np.dot(block.T, clusters).argmax(1)
+    return assign
+
+def calc_cosine_cpu(data, assign, clusters):
+    # unit mean direction of the points of each cluster; a cluster without points,
+    # or whose points add up to 0, keeps its old value
+    (nDim, nClusters) = clusters.shape
+    sums = np.empty((nDim, nClusters), np.float64)
+    for d in range(nDim):
+        sums[d] = np.bincount(assign, weights=data[d], minlength=nClusters)
+    norms = np.sqrt((sums * sums).sum(0))
+    moved = norms > 0
+    new_clusters = clusters.copy()
+    new_clusters[:, moved] = sums[:, moved] / norms[moved]
+    return new_clusters
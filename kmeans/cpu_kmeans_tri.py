@@ -0,0 +1,243 @@
+import numpy as np
+import time
+
+from . import layout, trace
+
+#------------------------------------------------------------------------------------
+#        kmeans using triangle inequality algorithm, numpy emulation of the gpu
+#------------------------------------------------------------------------------------
+#
+# Runs the same steps as cuda_kmeans_tri.trikmeans_gpu on the same data
+# structures, each kernel replaced by a function of the same name that works
+# on all points at once.  Kernels that loop over clusters per point (init,
+# step3) become a loop over clusters with every point handled in one batch,
+# which keeps the per-point order of the gpu code.
+#
+# Besides giving cpu hosts the pruning of the tri algorithm, it is the
+# reference to check changes to the kernels in mods2 against: the bound
+# arrays are laid out as on the gpu, lower is (nClusters, nPts), and
+# quirks of the kernels are reproduced rather than fixed.
+
+HD_CLOSEST_INIT = 1.0e10    # initial half distance to closest, as in trikmeans_gpu
+
+def trikmeans_cpu(data, clusters, iterations, return_times = 0):
+    # trikmeans_cpu(data, clusters, iterations) returns (clusters, labels)
+
+    # The shape of data is (nDim, nPts) and the shape of clusters is (nDim, nClusters),
+    # as for trikmeans_gpu.  With return_times the result has the same 15 entries
+    # as trikmeans_gpu, with numpy arrays in place of the gpu arrays.
+    (nDim, nPts) = data.shape
+    nClusters = clusters.shape[1]
+
+    t1 = time.time()
+    data = layout.c_order(data, np.float32, "tri_cpu")
+    clusters = np.array(clusters, dtype=np.float32)
+
+    assignments = np.zeros((nPts,), np.int32)           # cluster assignment
+    lower = np.zeros((nClusters, nPts), np.float32)     # lower bounds on distance between
+                                                        # point and each cluster
+    upper = np.zeros((nPts,), np.float32)               # upper bounds on distance between
+                                                        # point and any cluster
+    cc_dists = np.zeros((nClusters, nClusters), np.float32)     # cluster-cluster distances
+    hdClosest = np.zeros((nClusters,), np.float32)      # half distance to closest
+    hdClosest.fill(HD_CLOSEST_INIT)
+    badUpper = np.zeros((nPts,), np.int32)              # flag to indicate upper bound needs recalc
+    cluster_movement = np.zeros((nClusters,), np.float32)
+    cluster_changed = np.zeros((nClusters,), np.int32)
+    t2 = time.time()
+    data_time = t2-t1
+    trace.record(trace.DATA, t1, t2, "tri_cpu", bytes=data.nbytes + clusters.nbytes)
+
+    ccdist_time = 0.
+    hdclosest_time = 0.
+    step3_time = 0.
+    step4_time = 0.
+    step56_time = 0.
+
+    t1 = time.time()
+    ccdist(clusters, cc_dists, hdClosest)
+    t2 = time.time()
+    ccdist_time += t2-t1
+    trace.record(trace.BOUNDS, t1, t2, "tri_cpu", "ccdist")
+
+    t1 = time.time()
+    calc_hdclosest(cc_dists, hdClosest)
+    t2 = time.time()
+    hdclosest_time += t2-t1
+    trace.record(trace.BOUNDS, t1, t2, "tri_cpu", "calc_hdclosest")
+
+    t1 = time.time()
+    nDist = init(data, clusters, cc_dists, hdClosest, assignments, lower, upper)
+    t2 = time.time()
+    init_time = t2-t1
+    trace.record(trace.SEED, t1, t2, "tri_cpu", "init", points=nPts, distances=nDist)
+
+    for i in range(iterations):
+
+        if i>0:
+            t1 = time.time()
+            ccdist(clusters, cc_dists, hdClosest)
+            t2 = time.time()
+            ccdist_time += t2-t1
+            trace.record(trace.BOUNDS, t1, t2, "tri_cpu", "ccdist")
+
+            t1 = time.time()
+            calc_hdclosest(cc_dists, hdClosest)
+            t2 = time.time()
+            hdclosest_time += t2-t1
+            trace.record(trace.BOUNDS, t1, t2, "tri_cpu", "calc_hdclosest")
+
+        t1 = time.time()
+        cluster_changed.fill(0)
+        nDist = step3(data, clusters, cc_dists, hdClosest, assignments,
+                      lower, upper, badUpper, cluster_changed)
+        t2 = time.time()
+        step3_time += t2-t1
+        trace.record(trace.ASSIGN, t1, t2, "tri_cpu", "step3", points=nPts, distances=nDist,
+                     changed_clusters=int(cluster_changed.sum()))
+
+        t1 = time.time()
+        new_clusters = step4(data, clusters, assignments)
+        calc_movement(clusters, new_clusters, cluster_movement)
+        t2 = time.time()
+        step4_time += t2-t1
+        trace.record(trace.UPDATE, t1, t2, "tri_cpu", "step4")
+
+        t1 = time.time()
+        step56(assignments, lower, upper, cluster_movement, badUpper)
+        t2 = time.time()
+        step56_time += t2-t1
+        trace.record(trace.BOUNDS, t1, t2, "tri_cpu", "step56")
+
+        # prepare for next iteration
+        clusters = new_clusters
+
+    if return_times:
+        return cc_dists, hdClosest, assignments, lower, upper, \
+                clusters, cluster_movement, \
+                data_time, 0., init_time, \
+                ccdist_time/iterations, hdclosest_time/iterations, \
+                step3_time/iterations, step4_time/iterations, step56_time/iterations
+    else:
+        return clusters, assignments
+
+
+#------------------------------------------------------------------------------------
+#                                   kernels
+#------------------------------------------------------------------------------------
+
+def dc_dist(data, clusters, pts, c):
+    # distance from each point in pts to cluster c (an int, or one cluster per point)
+    diff = data[:, pts] - clusters[:, np.atleast_1d(c)]
+    return np.sqrt((diff * diff).sum(0))
+
+def ccdist(clusters, cc_dists, hdClosest):
+    # half the distance between each pair of clusters, into cc_dists
+    diff = clusters[:, :, np.newaxis] - clusters[:, np.newaxis, :]
+    cc_dists[:] = 0.5 * np.sqrt((diff * diff).sum(0))
+
+def calc_hdclosest(cc_dists, hdClosest):
+    # lower hdClosest to the half distance to the closest other cluster.
+    # As on the gpu, hdClosest is never reset between iterations.
+    d = cc_dists.copy()
+    np.fill_diagonal(d, np.inf)
+    np.minimum(hdClosest, d.min(0), out=hdClosest)
+
+def init(data, clusters, cc_dists, hdClosest, assignments, lower, upper):
+    # initial assignment of points to the nearest cluster, skipping clusters that
+    # are too far from the current closest one; returns the number of distances computed
+    nPts = data.shape[1]
+    nClusters = clusters.shape[1]
+    pts = np.arange(nPts)
+    min_dist = dc_dist(data, clusters, pts, 0)
+    lower[0] = min_dist
+    closest = np.zeros((nPts,), np.int32)
+    nDist = nPts
+    for c in range(1, nClusters):
+        todo = np.flatnonzero(min_dist > cc_dists[closest, c])
+        if len(todo) == 0:
+            continue
+        d = dc_dist(data, clusters, todo, c)
+        nDist += len(todo)
+        lower[c, todo] = d
+        better = d < min_dist[todo]
+        min_dist[todo[better]] = d[better]
+        closest[todo[better]] = c
+    assignments[:] = closest
+    upper[:] = min_dist
+    return nDist
+
+def step3(data, clusters, cc_dists, hdClosest, assignments, lower, upper, badUpper,
+          cluster_changed):
+    # reassign points whose bounds do not rule out a closer cluster; returns the
+    # number of distances computed
+    nClusters = clusters.shape[1]
+    pts = np.flatnonzero(upper > hdClosest[assignments])       # step 2 condition
+    ux = upper[pts]
+    cx = assignments[pts]
+    rx = badUpper[pts].copy()
+    nDist = 0
+    for c in range(nClusters):
+        # step 3 conditions
+        i = np.flatnonzero((cx != c) & (ux > lower[c, pts]) & (ux > cc_dists[cx, c]))
+        if len(i) == 0:
+            continue
+
+        # step 3a: recalculate the upper bound where it is not tight.  The kernel
+        # stores this distance as the lower bound for c, which is kept here.
+        bad = i[rx[i] != 0]
+        if len(bad):
+            d_x_cx = dc_dist(data, clusters, pts[bad], cx[bad])
+            nDist += len(bad)
+            ux[bad] = d_x_cx
+            lower[c, pts[bad]] = d_x_cx
+            rx[bad] = 0
+
+        # step 3b: compute distance between x and c, change x's assignment if necessary
+        d_x_cx = ux[i]
+        check = (d_x_cx > lower[c, pts[i]]) | (d_x_cx > cc_dists[cx[i], c])
+        i = i[check]
+        if len(i) == 0:
+            continue
+        d_x_c = dc_dist(data, clusters, pts[i], c)
+        nDist += len(i)
+        lower[c, pts[i]] = d_x_c
+        better = d_x_c < d_x_cx[check]
+        i = i[better]
+        if len(i):
+            cluster_changed[c] = 1
+            cluster_changed[cx[i]] = 1
+            ux[i] = d_x_c[better]
+            cx[i] = c
+            rx[i] = 0
+    upper[pts] = ux
+    assignments[pts] = cx
+    badUpper[pts] = rx
+    return nDist
+
+def step4(data, clusters, assignments):
+    # returns the new clusters; clusters without points keep their old value
+    (nDim, nClusters) = clusters.shape
+    counts = np.bincount(assignments, minlength=nClusters)
+    new_clusters = clusters.copy()
+    occupied = counts > 0
+    for d in range(nDim):
+        accum = np.bincount(assignments, weights=data[d], minlength=nClusters)
+        new_clusters[d, occupied] = accum[occupied] / counts[occupied]
+    return new_clusters
+
+def calc_movement(clusters, new_clusters, cluster_movement):
+    diff = clusters - new_clusters
+    cluster_movement[:] = np.sqrt((diff * diff).sum(0))
+
+def step56(assignments, lower, upper, cluster_movement, badUpper):
+    # move the bounds by the distance each cluster moved
+    moved = np.flatnonzero(cluster_movement > 0.0)
+    if len(moved):
+        m = cluster_movement[moved, np.newaxis]
+        low = lower[moved]
+        lower[moved] = np.where(m < low, low - m, 0.0)
+    m = cluster_movement[assignments]
+    changed = m > 0.0
+    upper[changed] += m[changed]
+    badUpper[changed] = 1
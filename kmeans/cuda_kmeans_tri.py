@@ -1,17 +1,18 @@
 import pycuda.driver as cuda
 import pycuda.autoinit
 import pycuda.gpuarray as gpuarray
-from pycuda.compiler import SourceModule
 from pycuda.reduction import ReductionKernel
-from cpu_kmeans import kmeans_cpu
-from cpu_kmeans import assign_cpu
-from cpu_kmeans import calc_cpu
+from .cpu_kmeans import kmeans_cpu
+from .cpu_kmeans import assign_cpu
+from .cpu_kmeans import calc_cpu
 
 import numpy as np
 import math
 import time
 
-import mods2
+from . import layout
+from . import mods2
+from . import trace
 
 VERBOSE = 0
 PRINT_TIMES = 0
@@ -47,13 +48,13 @@ def trikmeans_gpu(data, clusters, iterations, return_times = 0):
     
     
     # block and grid sizes for the ccdist kernel (also for hdclosest)
-    blocksize_ccdist = min(512, 16*(1+(nClusters-1)/16))
-    gridsize_ccdist = 1 + (nClusters-1)/blocksize_ccdist
+    blocksize_ccdist = min(512, 16*(1+(nClusters-1)//16))
+    gridsize_ccdist = 1 + (nClusters-1)//blocksize_ccdist
     
     #block and grid sizes for the init module
-    threads_desired = 16*(1+(max(nPts, nDim*nClusters)-1)/16)
+    threads_desired = 16*(1+(max(nPts, nDim*nClusters)-1)//16)
     blocksize_init = min(512, threads_desired) 
-    gridsize_init = 1 + (threads_desired - 1)/blocksize_init
+    gridsize_init = 1 + (threads_desired - 1)//blocksize_init
     
     #block and grid sizes for the step3 module
     blocksize_step3 = blocksize_init
@@ -63,9 +64,9 @@ def trikmeans_gpu(data, clusters, iterations, return_times = 0):
     for blocksize_step4_x in range(32, 512, 32):
         if blocksize_step4_x >= nClusters:
             break;
-    blocksize_step4_y = min(nDim, 512/blocksize_step4_x)
-    gridsize_step4_x = 1 + (nClusters-1)/blocksize_step4_x
-    gridsize_step4_y = 1 + (nDim-1)/blocksize_step4_y
+    blocksize_step4_y = min(nDim, 512//blocksize_step4_x)
+    gridsize_step4_x = 1 + (nClusters-1)//blocksize_step4_x
+    gridsize_step4_y = 1 + (nDim-1)//blocksize_step4_y
     
     #block and grid sizes for the calc_movement module
     blocksize_calcm = blocksize_step4_x
@@ -81,7 +82,7 @@ def trikmeans_gpu(data, clusters, iterations, return_times = 0):
     #                    prepare source modules
     #---------------------------------------------------------------
     t1 = time.time()
-    mod_ccdist = mods2.get_ccdist_module(nDim, nPts, nClusters, blocksize_ccdist, blocksize_init, 
+    mod_ccdist = mods2.get_ccdist_module(nDim, nClusters, blocksize_ccdist, blocksize_init, 
                                         blocksize_step4_x, blocksize_step4_y, blocksize_step56,
                                         useTextureForData)
 
@@ -97,13 +98,14 @@ def trikmeans_gpu(data, clusters, iterations, return_times = 0):
     pycuda.autoinit.context.synchronize()
     t2 = time.time()
     module_time = t2-t1
+    trace.record(trace.COMPILE, t1, t2, "tri")
 
     #---------------------------------------------------------------
     #                    setup data on GPU
     #---------------------------------------------------------------
     t1 = time.time()
 
-    data = np.array(data).astype(np.float32)
+    data = layout.c_order(data, np.float32, "tri")
     clusters = np.array(clusters).astype(np.float32)
     
     if useTextureForData:
@@ -132,6 +134,7 @@ def trikmeans_gpu(data, clusters, iterations, return_times = 0):
     pycuda.autoinit.context.synchronize()
     t2 = time.time()
     data_time = t2-t1
+    trace.record(trace.DATA, t1, t2, "tri", bytes=data.nbytes + clusters.nbytes)
     
     #---------------------------------------------------------------
     #                    do calculations
@@ -150,6 +153,7 @@ def trikmeans_gpu(data, clusters, iterations, return_times = 0):
     pycuda.autoinit.context.synchronize()
     t2 = time.time()
     ccdist_time += t2-t1
+    trace.record(trace.BOUNDS, t1, t2, "tri", "ccdist")
     
     t1 = time.time()
     calc_hdclosest(gpu_ccdist, gpu_hdClosest,
@@ -158,22 +162,24 @@ def trikmeans_gpu(data, clusters, iterations, return_times = 0):
     pycuda.autoinit.context.synchronize()
     t2 = time.time()
     hdclosest_time += t2-t1
+    trace.record(trace.BOUNDS, t1, t2, "tri", "calc_hdclosest")
     
     t1 = time.time()
     if useTextureForData:
         init(gpu_clusters, gpu_ccdist, gpu_hdClosest, gpu_assignments, 
-                gpu_lower, gpu_upper,
+                gpu_lower, gpu_upper, np.int32(nPts),
                 block = (blocksize_init, 1, 1),
                 grid = (gridsize_init, 1),
                 texrefs=[texrefData])
     else:
         init(gpu_data, gpu_clusters, gpu_ccdist, gpu_hdClosest, gpu_assignments, 
-                gpu_lower, gpu_upper,
+                gpu_lower, gpu_upper, np.int32(nPts),
                 block = (blocksize_init, 1, 1),
                 grid = (gridsize_init, 1))
     pycuda.autoinit.context.synchronize()
     t2 = time.time()
     init_time += t2-t1
+    trace.record(trace.SEED, t1, t2, "tri", "init", points=nPts)
 
     """    
     print "data"
@@ -193,6 +199,7 @@ def trikmeans_gpu(data, clusters, iterations, return_times = 0):
             pycuda.autoinit.context.synchronize()
             t2 = time.time()
             ccdist_time += t2-t1
+            trace.record(trace.BOUNDS, t1, t2, "tri", "ccdist")
             
             t1 = time.time()
             calc_hdclosest(gpu_ccdist, gpu_hdClosest,
@@ -201,6 +208,7 @@ def trikmeans_gpu(data, clusters, iterations, return_times = 0):
             pycuda.autoinit.context.synchronize()
             t2 = time.time()
             hdclosest_time += t2-t1
+            trace.record(trace.BOUNDS, t1, t2, "tri", "calc_hdclosest")
             
         """
         print "Just before step 3=========================================="
@@ -224,19 +232,22 @@ def trikmeans_gpu(data, clusters, iterations, return_times = 0):
         gpu_cluster_changed.fill(0)
         if useTextureForData:
             step3(gpu_clusters, gpu_ccdist, gpu_hdClosest, gpu_assignments,
-                    gpu_lower, gpu_upper, gpu_badUpper, gpu_cluster_changed,
+                    gpu_lower, gpu_upper, gpu_badUpper, gpu_cluster_changed, np.int32(nPts),
                     block = (blocksize_step3, 1, 1),
                     grid = (gridsize_step3, 1),
                     texrefs=[texrefData])
         else:
             step3(gpu_data, gpu_clusters, gpu_ccdist, gpu_hdClosest, gpu_assignments,
-                    gpu_lower, gpu_upper, gpu_badUpper,  gpu_cluster_changed,
+                    gpu_lower, gpu_upper, gpu_badUpper,  gpu_cluster_changed, np.int32(nPts),
                     block = (blocksize_step3, 1, 1),
                     grid = (gridsize_step3, 1))
         
         pycuda.autoinit.context.synchronize()
         t2 = time.time()
         step3_time += t2-t1
+        if trace.is_enabled():
+            trace.record(trace.ASSIGN, t1, t2, "tri", "step3", points=nPts,
+                                changed_clusters=int(gpu_cluster_changed.get().sum()))
         
         """
         print "gpu_cluster_changed"
@@ -259,13 +270,13 @@ def trikmeans_gpu(data, clusters, iterations, return_times = 0):
         
         if useTextureForData:
             step4(gpu_clusters, gpu_clusters2, gpu_assignments, gpu_cluster_movement,
-                gpu_cluster_changed,
+                gpu_cluster_changed, np.int32(nPts),
                 block = (blocksize_step4_x, blocksize_step4_y, 1),
                 grid = (gridsize_step4_x, gridsize_step4_y),
                 texrefs=[texrefData])
         else:
             step4(gpu_data, gpu_clusters, gpu_clusters2, gpu_assignments, gpu_cluster_movement,
-                gpu_cluster_changed,
+                gpu_cluster_changed, np.int32(nPts),
                 block = (blocksize_step4_x, blocksize_step4_y, 1),
                 grid = (gridsize_step4_x, gridsize_step4_y))
         
@@ -278,6 +289,7 @@ def trikmeans_gpu(data, clusters, iterations, return_times = 0):
         pycuda.autoinit.context.synchronize()
         t2 = time.time()
         step4_time += t2-t1
+        trace.record(trace.UPDATE, t1, t2, "tri", "step4")
         
         """
         print "Just before step 5=========================================="
@@ -291,19 +303,20 @@ def trikmeans_gpu(data, clusters, iterations, return_times = 0):
 
         if useTextureForData:
             step56(gpu_assignments, gpu_lower, gpu_upper, 
-                    gpu_cluster_movement, gpu_badUpper,
+                    gpu_cluster_movement, gpu_badUpper, np.int32(nPts),
                     block = (blocksize_step56, 1, 1),
                     grid = (gridsize_step56, 1),
                     texrefs=[texrefData])
         else:
             step56(gpu_assignments, gpu_lower, gpu_upper, 
-                    gpu_cluster_movement, gpu_badUpper,
+                    gpu_cluster_movement, gpu_badUpper, np.int32(nPts),
                     block = (blocksize_step56, 1, 1),
                     grid = (gridsize_step56, 1))
                     
         pycuda.autoinit.context.synchronize()
         t2 = time.time()
         step56_time += t2-t1 #--------------------------------------------------------------
+        trace.record(trace.BOUNDS, t1, t2, "tri", "step56")
         
         """
         print "Just after step 6=========================================="
@@ -347,7 +360,7 @@ def run_tests1(nTests, nPts, nDim, nClusters, nReps=1, verbose = VERBOSE, print_
     # run_tests(nTests, nPts, nDim, nClusters, nReps [, verbose [, print_times]]
     
     if nReps > 1:
-        print "This method only runs test for nReps == 1"
+        print("This method only runs test for nReps == 1")
         return 1
         
     # Generate nPts random data elements with nDim dimensions and nCluster random clusters,
@@ -369,10 +382,10 @@ def run_tests1(nTests, nPts, nDim, nClusters, nReps=1, verbose = VERBOSE, print_
     clusters = np.random.rand(nDim, nClusters).astype(np.float32)
 
     if verbose:
-        print "data"
-        print data
-        print "\nclusters"
-        print clusters
+        print("data")
+        print(data)
+        print("\nclusters")
+        print(clusters)
 
     nErrors = 0
 
@@ -398,21 +411,21 @@ def run_tests1(nTests, nPts, nDim, nClusters, nReps=1, verbose = VERBOSE, print_
         gpu_step56_time += step56_time
         
         if verbose:
-            print "------------------------ gpu results ------------------------"
-            print "cluster-cluster distances"
-            print gpu_ccdist
-            print "half distance to closest"
-            print gpu_hdClosest
-            print "gpu time = ", t2-t1
-            print "gpu_assignments"
-            print gpu_assignments
-            print "gpu_lower"
-            print gpu_lower
-            print "gpu_upper"
-            print gpu_upper
-            print "gpu_clusters2"
-            print gpu_clusters2
-            print "-------------------------------------------------------------"
+            print("------------------------ gpu results ------------------------")
+            print("cluster-cluster distances")
+            print(gpu_ccdist)
+            print("half distance to closest")
+            print(gpu_hdClosest)
+            print("gpu time = ", t2-t1)
+            print("gpu_assignments")
+            print(gpu_assignments)
+            print("gpu_lower")
+            print(gpu_lower)
+            print("gpu_upper")
+            print(gpu_upper)
+            print("gpu_clusters2")
+            print(gpu_clusters2)
+            print("-------------------------------------------------------------")
             
 
         # check ccdist and hdClosest
@@ -425,17 +438,17 @@ def run_tests1(nTests, nPts, nDim, nClusters, nReps=1, verbose = VERBOSE, print_
         cpu_ccdist_time = t2-t1
         
         if verbose:
-            print "cpu_ccdist"
-            print cpu_ccdist
+            print("cpu_ccdist")
+            print(cpu_ccdist)
         
         error = np.abs(cpu_ccdist - ccdist)
         if np.max(error) > 1e-7 * nDim * 2:
-            print "iteration", iTest,
-            print "***ERROR*** max ccdist error =", np.max(error)
+            print("iteration", iTest, end=' ')
+            print("***ERROR*** max ccdist error =", np.max(error))
             nErrors += 1
         if verbose:
-            print "average ccdist error =", np.mean(error)
-            print "max ccdist error     =", np.max(error)
+            print("average ccdist error =", np.mean(error))
+            print("max ccdist error     =", np.max(error))
         
         t1 = time.time()
         cpu_ccdist[cpu_ccdist == 0.] = 1e10
@@ -444,16 +457,16 @@ def run_tests1(nTests, nPts, nDim, nClusters, nReps=1, verbose = VERBOSE, print_
         cpu_hdclosest_time = t2-t1
         
         if verbose:
-            print "good_hdClosest"
-            print good_hdClosest
+            print("good_hdClosest")
+            print(good_hdClosest)
         err = np.abs(good_hdClosest - hdClosest)
         if np.max(err) > 1e-7 * nDim:
-            print "***ERROR*** max hdClosest error =", np.max(err)
+            print("***ERROR*** max hdClosest error =", np.max(err))
             nErrors += 1
         if verbose:
-            print "errors on hdClosest"
-            print err
-            print "max error on hdClosest =", np.max(err)
+            print("errors on hdClosest")
+            print(err)
+            print("max error on hdClosest =", np.max(err))
     
     
         # calculate cpu initial assignments
@@ -463,20 +476,20 @@ def run_tests1(nTests, nPts, nDim, nClusters, nReps=1, verbose = VERBOSE, print_
         cpu_assign_time = t2-t1
         
         if verbose:
-            print "cpu assignments"
-            print cpu_assign
-            print "gpu assignments"
-            print gpu_assignments
-            print "gpu new clusters"
-            print gpu_clusters2
+            print("cpu assignments")
+            print(cpu_assign)
+            print("gpu assignments")
+            print(gpu_assignments)
+            print("gpu new clusters")
+            print(gpu_clusters2)
             
         differences = sum(gpu_assignments.get() - cpu_assign)
         if(differences > 0):
             nErrors += 1
-            print differences, "errors in initial assignment"
+            print(differences, "errors in initial assignment")
         else:
             if verbose:
-                print "initial cluster assignments match"
+                print("initial cluster assignments match")
     
         # calculate the number of data points in each cluster
         c = np.arange(nClusters)
@@ -489,60 +502,60 @@ def run_tests1(nTests, nPts, nDim, nClusters, nReps=1, verbose = VERBOSE, print_
         cpu_calc_time = t2-t1
         
         if verbose:
-            print "cpu new clusters"
-            print cpu_new_clusters
+            print("cpu new clusters")
+            print(cpu_new_clusters)
         
         diff = np.max(np.abs(gpu_clusters2 - cpu_new_clusters))
         if diff > 1e-7 * max(c_counts) or math.isnan(diff):
             iDiff = np.arange(nClusters)[((gpu_clusters2 - cpu_new_clusters)**2).sum(0) > 1e-7]
-            print "clusters that differ:"
-            print iDiff
+            print("clusters that differ:")
+            print(iDiff)
             nErrors += 1
             if verbose:
-                print "Test",iTest,"*** ERROR *** max diff was", diff
-                print 
+                print("Test",iTest,"*** ERROR *** max diff was", diff)
+                print() 
         else:
             if verbose:
-                print "Test", iTest, "OK"
+                print("Test", iTest, "OK")
         
         #check if the cluster movement values are correct
         cpu_cluster_movement = np.sqrt(((clusters - cpu_new_clusters)**2).sum(0))
         diff = np.max(np.abs(cpu_cluster_movement - gpu_cluster_movement.get()))
         if diff > 1e-7 * nDim:
-            print "*** ERROR *** max cluster movement error =", diff
+            print("*** ERROR *** max cluster movement error =", diff)
         if verbose:
-            print "cpu cluster movements"
-            print cpu_cluster_movement
-            print "gpu cluster movements"
-            print gpu_cluster_movement
-            print "max diff in cluster movements is", diff
+            print("cpu cluster movements")
+            print(cpu_cluster_movement)
+            print("gpu cluster movements")
+            print(gpu_cluster_movement)
+            print("max diff in cluster movements is", diff)
         
         cpu_time = cpu_assign_time + cpu_calc_time
     
 
     if print_times:
-        print "\n---------------------------------------------"
-        print "nPts      =", nPts
-        print "nDim      =", nDim
-        print "nClusters =", nClusters
-        print "nReps     =", nReps
-        print "average cpu time (ms) =", cpu_time/nTests*1000.
-        print "     assign time (ms) =", cpu_assign_time/nTests*1000.
+        print("\n---------------------------------------------")
+        print("nPts      =", nPts)
+        print("nDim      =", nDim)
+        print("nClusters =", nClusters)
+        print("nReps     =", nReps)
+        print("average cpu time (ms) =", cpu_time/nTests*1000.)
+        print("     assign time (ms) =", cpu_assign_time/nTests*1000.)
         if nReps == 1:
-            print "       calc time (ms) =", cpu_calc_time/nTests*1000.
-            print "average gpu time (ms) =", gpu_time/nTests*1000.
+            print("       calc time (ms) =", cpu_calc_time/nTests*1000.)
+            print("average gpu time (ms) =", gpu_time/nTests*1000.)
         else:
-            print "       calc time (ms) ="
-            print "average gpu time (ms) ="
-        print "       data time (ms) =", gpu_data_time/nTests*1000.
-        print "     module time (ms) =", gpu_module_time/nTests*1000.
-        print "       init time (ms) =", gpu_init_time/nTests*1000.        
-        print "     ccdist time (ms) =", gpu_ccdist_time/nTests*1000.        
-        print "  hdclosest time (ms) =", gpu_hdclosest_time/nTests*1000.        
-        print "      step3 time (ms) =", gpu_step3_time/nTests*1000.        
-        print "      step4 time (ms) =", gpu_step4_time/nTests*1000.        
-        print "     step56 time (ms) =", gpu_step56_time/nTests*1000.        
-        print "---------------------------------------------"
+            print("       calc time (ms) =")
+            print("average gpu time (ms) =")
+        print("       data time (ms) =", gpu_data_time/nTests*1000.)
+        print("     module time (ms) =", gpu_module_time/nTests*1000.)
+        print("       init time (ms) =", gpu_init_time/nTests*1000.)        
+        print("     ccdist time (ms) =", gpu_ccdist_time/nTests*1000.)        
+        print("  hdclosest time (ms) =", gpu_hdclosest_time/nTests*1000.)        
+        print("      step3 time (ms) =", gpu_step3_time/nTests*1000.)        
+        print("      step4 time (ms) =", gpu_step4_time/nTests*1000.)        
+        print("     step56 time (ms) =", gpu_step56_time/nTests*1000.)        
+        print("---------------------------------------------")
 
     return nErrors
 
@@ -562,32 +575,32 @@ def verify_assignments(gpu_assign, cpu_assign, data, gpu_clusters, cpu_clusters,
         error = 1
         if verbose:
             if iTest >= 0:
-                print "Test", iTest,
-            print "*** ERROR ***", differences, "differences"
+                print("Test", iTest, end=' ')
+            print("*** ERROR ***", differences, "differences")
             iDiff = np.arange(gpu_assign.shape[0])[gpu_assign != cpu_assign]
-            print "iDiff", iDiff
+            print("iDiff", iDiff)
             for ii in iDiff:
-                print "data point is", data[:,ii]
-                print "cpu assigned to", cpu_assign[ii]
-                print "   with center at (cpu)", cpu_clusters[:,cpu_assign[ii]]
-                print "   with center at (gpu)", gpu_clusters[:,cpu_assign[ii]]
-                print "gpu assigned to", gpu_assign[ii]
-                print "   with center at (cpu)", cpu_clusters[:,gpu_assign[ii]]
-                print "   with center at (gpu)", gpu_clusters[:, gpu_assign[ii]]
-                print ""
-                print "cpu calculated distances:"
-                print "   from point", ii, "to:"
-                print "      cluster", cpu_assign[ii], "is", np.sqrt(np.sum((data[:,ii]-cpu_clusters[:,cpu_assign[ii]])**2))
-                print "      cluster", gpu_assign[ii], "is", np.sqrt(np.sum((data[:,ii]-cpu_clusters[:,gpu_assign[ii]])**2))
-                print "gpu calculated distances:"
-                print "   from point", ii, "to:"
-                print "      cluster", cpu_assign[ii], "is", np.sqrt(np.sum((data[:,ii]-gpu_clusters[:,cpu_assign[ii]])**2))
-                print "      cluster", gpu_assign[ii], "is", np.sqrt(np.sum((data[:,ii]-gpu_clusters[:,gpu_assign[ii]])**2))
+                print("data point is", data[:,ii])
+                print("cpu assigned to", cpu_assign[ii])
+                print("   with center at (cpu)", cpu_clusters[:,cpu_assign[ii]])
+                print("   with center at (gpu)", gpu_clusters[:,cpu_assign[ii]])
+                print("gpu assigned to", gpu_assign[ii])
+                print("   with center at (cpu)", cpu_clusters[:,gpu_assign[ii]])
+                print("   with center at (gpu)", gpu_clusters[:, gpu_assign[ii]])
+                print("")
+                print("cpu calculated distances:")
+                print("   from point", ii, "to:")
+                print("      cluster", cpu_assign[ii], "is", np.sqrt(np.sum((data[:,ii]-cpu_clusters[:,cpu_assign[ii]])**2)))
+                print("      cluster", gpu_assign[ii], "is", np.sqrt(np.sum((data[:,ii]-cpu_clusters[:,gpu_assign[ii]])**2)))
+                print("gpu calculated distances:")
+                print("   from point", ii, "to:")
+                print("      cluster", cpu_assign[ii], "is", np.sqrt(np.sum((data[:,ii]-gpu_clusters[:,cpu_assign[ii]])**2)))
+                print("      cluster", gpu_assign[ii], "is", np.sqrt(np.sum((data[:,ii]-gpu_clusters[:,gpu_assign[ii]])**2)))
     else:
         if verbose:
             if iTest >= 0:
-                print "Test", iTest,
-            print "Cluster assignment is OK"
+                print("Test", iTest, end=' ')
+            print("Cluster assignment is OK")
     return error
 
 def verify_clusters(gpu_clusters, cpu_clusters, cpu_assign, verbose = 0, iTest = -1):
@@ -604,25 +617,25 @@ def verify_clusters(gpu_clusters, cpu_clusters, cpu_assign, verbose = 0, iTest =
     diff = np.max(err)
     
     if verbose:
-        print "max error in cluster centers is", diff
-        print "avg error in cluster centers is", np.mean(err)
+        print("max error in cluster centers is", diff)
+        print("avg error in cluster centers is", np.mean(err))
     
     allowable_diff = max(c_counts) * 1e-7
     if diff > allowable_diff or math.isnan(diff):
         error = 1
         iDiff = np.arange(nClusters)[((gpu_clusters - cpu_clusters)**2).sum(0) > allowable_diff]
         if verbose:
-            print "clusters that differ:"
-            print iDiff
+            print("clusters that differ:")
+            print(iDiff)
             if iTest >= 0:
-                print "Test",iTest,
-            print "*** ERROR *** max diff was", diff
-            print 
+                print("Test",iTest, end=' ')
+            print("*** ERROR *** max diff was", diff)
+            print() 
     else:
         if verbose:
             if iTest >= 0:
-                print "Test", iTest,
-            print "Clusters are OK"
+                print("Test", iTest, end=' ')
+            print("Clusters are OK")
         
     return error
 
@@ -649,10 +662,10 @@ def run_tests(nTests, nPts, nDim, nClusters, nReps=1, verbose = VERBOSE, print_t
     clusters = np.random.rand(nDim, nClusters).astype(np.float32)
 
     if verbose:
-        print "data"
-        print data
-        print "\nclusters"
-        print clusters
+        print("data")
+        print(data)
+        print("\nclusters")
+        print(clusters)
 
     nErrors = 0
 
@@ -695,12 +708,12 @@ def run_tests(nTests, nPts, nDim, nClusters, nReps=1, verbose = VERBOSE, print_t
         gpu_step56_time += step56_time
         
         if verbose:
-            print "------------------------ gpu results ------------------------"
-            print "gpu_assignments"
-            print gpu_assign
-            print "gpu_clusters"
-            print gpu_clusters
-            print "-------------------------------------------------------------"
+            print("------------------------ gpu results ------------------------")
+            print("gpu_assignments")
+            print(gpu_assign)
+            print("gpu_clusters")
+            print(gpu_clusters)
+            print("-------------------------------------------------------------")
             
 
         """
@@ -714,23 +727,23 @@ def run_tests(nTests, nPts, nDim, nClusters, nReps=1, verbose = VERBOSE, print_t
         """
 
     if print_times:
-        print "\n---------------------------------------------"
-        print "nPts      =", nPts
-        print "nDim      =", nDim
-        print "nClusters =", nClusters
-        print "nReps     =", nReps
+        print("\n---------------------------------------------")
+        print("nPts      =", nPts)
+        print("nDim      =", nDim)
+        print("nClusters =", nClusters)
+        print("nReps     =", nReps)
         #print "average cpu time (ms) =", cpu_time/nTests*1000.
-        print "average cpu time (ms) = N/A"
-        print "average gpu time (ms) =", gpu_time/nTests*1000.
-        print "       data time (ms) =", gpu_data_time/nTests*1000.
-        print "     module time (ms) =", gpu_module_time/nTests*1000.
-        print "       init time (ms) =", gpu_init_time/nTests*1000.        
-        print "     ccdist time (ms) =", gpu_ccdist_time/nTests*1000.        
-        print "  hdclosest time (ms) =", gpu_hdclosest_time/nTests*1000.        
-        print "      step3 time (ms) =", gpu_step3_time/nTests*1000.        
-        print "      step4 time (ms) =", gpu_step4_time/nTests*1000.        
-        print "     step56 time (ms) =", gpu_step56_time/nTests*1000.        
-        print "---------------------------------------------"
+        print("average cpu time (ms) = N/A")
+        print("average gpu time (ms) =", gpu_time/nTests*1000.)
+        print("       data time (ms) =", gpu_data_time/nTests*1000.)
+        print("     module time (ms) =", gpu_module_time/nTests*1000.)
+        print("       init time (ms) =", gpu_init_time/nTests*1000.)        
+        print("     ccdist time (ms) =", gpu_ccdist_time/nTests*1000.)        
+        print("  hdclosest time (ms) =", gpu_hdclosest_time/nTests*1000.)        
+        print("      step3 time (ms) =", gpu_step3_time/nTests*1000.)        
+        print("      step4 time (ms) =", gpu_step4_time/nTests*1000.)        
+        print("     step56 time (ms) =", gpu_step56_time/nTests*1000.)        
+        print("---------------------------------------------")
 
     return nErrors
 
@@ -741,14 +754,14 @@ def run_tests(nTests, nPts, nDim, nClusters, nReps=1, verbose = VERBOSE, print_t
 
 def quiet_run(nTests, nPts, nDim, nClusters, nReps, ptimes = PRINT_TIMES):
     # quiet_run(nTests, nPts, nDim, nClusters, nReps [, ptimes]):
-    print "[TEST]({0:3},{1:8},{2:5},{3:5}, {4:5})...".format(nTests, nPts, nDim, nClusters, nReps),
+    print("[TEST]({0:3},{1:8},{2:5},{3:5}, {4:5})...".format(nTests, nPts, nDim, nClusters, nReps), end=' ')
     try:
         if run_tests(nTests, nPts, nDim, nClusters, nReps, verbose = 0, print_times = ptimes) == 0:
-            print "OK"
+            print("OK")
         else:
-            print "*** ERROR ***"
+            print("*** ERROR ***")
     except cuda.LaunchError:
-        print "launch error"
+        print("launch error")
     
 def quiet_runs(nTest_list, nPts_list, nDim_list, nClusters_list, nRep_list, print_it = PRINT_TIMES):
     # quiet_runs(nTest_list, nPts_list, nDim_list, nClusters_list [, print_it]):
@@ -761,7 +774,7 @@ def quiet_runs(nTest_list, nPts_list, nDim_list, nClusters_list, nRep_list, prin
                         continue
                     for rep in nRep_list:
                         if t < 0:
-                            tt = max(1, min(10, 10000000/(pts*dim*clst)))
+                            tt = max(1, min(10, 10000000//(pts*dim*clst)))
                         else:
                             tt = t
                         quiet_run(tt, pts, dim, clst, rep, ptimes = print_it);
@@ -801,7 +814,7 @@ def timings(t = 0):
     
 def quickTimes(nReps = 5):
     if quickRun() > 0:
-        print "***ERROR***"
+        print("***ERROR***")
     else:
         quiet_run(3, 1000, 60, 20, nReps, 1)
         quiet_run(3, 1000, 600, 2, nReps, 1)
@@ -820,7 +833,7 @@ def quickRun():
     return nErrors
     
 if __name__ == '__main__':
-    print quickRun()
+    print(quickRun())
     
     
     
\ No newline at end of file
@@ -0,0 +1,274 @@
+"""
+Single kmeans entry point that picks the fastest available backend.
+
+    centroids, labels = kmeans.kmeans(X, k)
+
+X has shape (nPts, nDim) with one point per row.  The result is always
+float64 centroids of shape (k, nDim) and 0-based int32 labels of shape
+(nPts,), whatever layout and return type the selected backend uses
+internally.
+
+The backend is chosen by a linear cost model
+
+    time = a + b * nPts*nDim + c * nPts*nDim*k*iterations / threads
+
+with one (a, b, c) per backend and dtype.  threads only divides the last
+term for the backends in THREADED, which split the points over that many
+workers ("shm", the C core in worker processes); the others run on one.  Built-in guesses are used until
+calibrate() has been run; it times every available backend on synthetic
+problems, fits the coefficients and stores them in COST_MODEL_FILE.
+Pass backend="cpu" | "tri_cpu" | "mpi" | "shm" | "cuda" | "tri" to skip the selection;
+backends that cannot honor the arguments (starting centers for "mpi"
+without libmpikmeans) are left out of it.
+A scipy.sparse X always runs on the "csr" backend, the C core on the CSR rows.
+"""
+
+import json
+import os
+import time
+
+import numpy as np
+
+from . import layout, trace
+from .backends import available_backends
+
+COST_MODEL_FILE = os.environ.get("KMEANS_COST_MODEL",
+                    os.path.join(os.path.expanduser("~"), ".cache", "bell_kmeans", "cost_model.json"))
+
+# default (a, b, c) for each backend, in seconds; rough numbers measured
+# before any calibration was done on the local host
+DEFAULT_COSTS = {
+    "cpu":  (1.0e-4, 2.0e-9, 6.0e-9),   # numpy brute force, (nDim, nPts) float32
+    "tri_cpu": (1.0e-3, 4.0e-9, 2.0e-9),  # numpy emulation of the tri pipeline
+    "mpi":  (1.0e-4, 4.0e-9, 1.0e-9),   # C core with Elkan bounds, (nPts, nDim) float64
+    "shm":  (5.0e-2, 6.0e-9, 1.2e-9),   # C core shards in worker processes, includes startup
+    "cuda": (3.0e-1, 8.0e-9, 5.0e-11),  # standard kmeans on the gpu, includes compile time
+    "tri":  (4.0e-1, 8.0e-9, 2.0e-11),  # triangle inequality kmeans on the gpu
+}
+
+# backends that can use more than one thread for the O(n*d*k) term
+THREADED = ("shm",)
+
+# problem sizes used by calibrate(): (nPts, nDim, nClusters)
+CALIBRATION_SIZES = [(1000, 8, 8), (1000, 60, 20), (10000, 6, 200),
+                     (10000, 60, 20), (30000, 6, 20), (10000, 600, 2)]
+
+_cost_model = None
+
+
+#------------------------------------------------------------------------------------
+#                               backends
+#------------------------------------------------------------------------------------
+
+def _run_cpu(X, init, iterations, threads, random_state):
+    from . import cpu_kmeans
+    # the numpy engine takes any strides, so X.T is only converted to float32
+    data = layout.any_order(X.T, np.float32, "cpu")
+    clusters = np.ascontiguousarray(init.T, dtype=np.float32)
+    clusters, labels = cpu_kmeans.kmeans_cpu(data, clusters, iterations)
+    return clusters.T.copy(), labels
+
+def _run_tri_cpu(X, init, iterations, threads, random_state):
+    from . import cpu_kmeans_tri
+    data = layout.transposed(X, np.float32, "tri_cpu")
+    clusters = np.ascontiguousarray(init.T, dtype=np.float32)
+    clusters, labels = cpu_kmeans_tri.trikmeans_cpu(data, clusters, iterations)
+    return clusters.T.copy(), labels
+
+def _run_mpi(X, init, iterations, threads, random_state):
+    # py_kmeans draws its own starting centers from np.random; init was drawn
+    # the same way, so restoring the random state used for init reproduces it.
+    # Starting centers given by the caller (random_state None) need the C core
+    # through libmpikmeans, which starts from them.
+    data = layout.c_order(X, np.float64, "mpi")
+    if random_state is None:
+        from . import libmpikmeans
+        centroids, sse, labels = libmpikmeans.kmeans(data, init.shape[0], iterations,
+                                                     clusters=init)
+        return centroids, labels
+    from . import py_kmeans
+    np.random.set_state(random_state)
+    centroids, dist, labels = py_kmeans.kmeans(data, init.shape[0], iterations, 0)
+    return centroids, (labels - 1).astype(np.int32)
+
+def _run_shm(X, init, iterations, threads, random_state):
+    from . import libmpikmeans, shm_kmeans
+    data = layout.c_order(X, np.float64, "shm")
+    centroids, labels, sse = shm_kmeans.kmeans_shm(data, init, iterations, processes=threads)
+    if labels is None:
+        # no iteration run, the labels are those of init
+        labels, sse = libmpikmeans.model_assign(libmpikmeans.model_fill(init), data)
+    return centroids, labels
+
+def _run_cuda(X, init, iterations, threads, random_state):
+    from . import cuda_kmeans
+    data = layout.transposed(X, np.float32, "cuda")
+    clusters = np.ascontiguousarray(init.T, dtype=np.float32)
+    clusters, labels = cuda_kmeans.kmeans_gpu(data, clusters, iterations)
+    return clusters.get().T.copy(), labels
+
+def _run_tri(X, init, iterations, threads, random_state):
+    from . import cuda_kmeans_tri
+    data = layout.transposed(X, np.float32, "tri")
+    clusters = np.ascontiguousarray(init.T, dtype=np.float32)
+    clusters, labels = cuda_kmeans_tri.trikmeans_gpu(data, clusters, iterations)
+    return clusters.T.copy(), labels
+
+def _run_csr(X, init, iterations, threads, random_state):
+    from . import libmpikmeans
+    centroids, sse, labels = libmpikmeans.kmeans_csr(X, init, iterations)
+    return centroids, labels
+
+RUNNERS = {"cpu": _run_cpu, "tri_cpu": _run_tri_cpu, "mpi": _run_mpi, "shm": _run_shm,
+           "cuda": _run_cuda, "tri": _run_tri, "csr": _run_csr}
+
+
+#------------------------------------------------------------------------------------
+#                               cost model
+#------------------------------------------------------------------------------------
+
+def _key(backend, dtype):
+    return backend + "/" + np.dtype(dtype).name
+
+def _features(n, d, k, iterations, threads):
+    return np.array([1., float(n) * d, float(n) * d * k * iterations / max(1, threads)])
+
+def load_cost_model(filename=None):
+    # load calibrated coefficients, falling back to DEFAULT_COSTS
+    global _cost_model
+    filename = filename or COST_MODEL_FILE
+    model = {}
+    if os.path.exists(filename):
+        with open(filename) as f:
+            model = json.load(f).get("costs", {})
+    _cost_model = model
+    return model
+
+def save_cost_model(model, filename=None):
+    global _cost_model
+    filename = filename or COST_MODEL_FILE
+    dirname = os.path.dirname(filename)
+    if dirname and not os.path.isdir(dirname):
+        os.makedirs(dirname)
+    with open(filename, "w") as f:
+        json.dump({"version": 1, "costs": model}, f, indent=1, sort_keys=True)
+    _cost_model = model
+
+def predict(backend, n, d, k, dtype=np.float64, iterations=10, threads=1):
+    # predicted run time in seconds of backend on an (n, d) problem with k clusters
+    if _cost_model is None:
+        load_cost_model()
+    coef = _cost_model.get(_key(backend, dtype), DEFAULT_COSTS[backend])
+    if backend not in THREADED:
+        threads = 1
+    return float(np.dot(coef, _features(n, d, k, iterations, threads)))
+
+def select(n, d, k, dtype=np.float64, iterations=10, threads=1, backends=None):
+    # returns the name of the backend predicted to be fastest with threads workers
+    backends = backends or available_backends()
+    return min(backends, key=lambda b: predict(b, n, d, k, dtype, iterations, threads))
+
+def capable_backends(init=None, backends=None):
+    # the backends among those available that can run with these arguments
+    backends = backends or available_backends()
+    if init is not None and "mpi" in backends:
+        from .libmpikmeans import library_path
+        if library_path() is None:
+            # py_kmeans alone cannot start from given centers
+            backends = [b for b in backends if b != "mpi"]
+    return backends
+
+def calibrate(backends=None, sizes=CALIBRATION_SIZES, dtype=np.float64,
+              iterations=5, threads=1, save=True, verbose=0):
+    # time each backend on synthetic problems and fit its cost coefficients
+    backends = backends or available_backends()
+    model = dict(load_cost_model())
+    random = np.random.RandomState(0)
+    for backend in backends:
+        rows = []
+        times = []
+        for (n, d, k) in sizes:
+            X = random.rand(n, d).astype(dtype)
+            t1 = time.time()
+            kmeans(X, k, iterations, backend=backend, seed=0, threads=threads)
+            t2 = time.time()
+            rows.append(_features(n, d, k, iterations, threads if backend in THREADED else 1))
+            times.append(t2 - t1)
+            if verbose:
+                print("{0:5} n={1:7} d={2:4} k={3:4}  {4:.4f} s".format(backend, n, d, k, t2 - t1))
+        coef = np.linalg.lstsq(np.array(rows), np.array(times), rcond=None)[0]
+        model[_key(backend, dtype)] = [float(max(0., c)) for c in coef]
+    if save:
+        save_cost_model(model)
+    return model
+
+
+#------------------------------------------------------------------------------------
+#                               entry point
+#------------------------------------------------------------------------------------
+
+def _seed_init(X, k):
+    # pick k distinct data points as starting centers, the same way py_kmeans does
+    permutation = np.random.permutation(X.shape[0])
+    init = X[permutation[:k], :]
+    if hasattr(init, "toarray"):
+        init = init.toarray()
+    return np.array(init, dtype=np.float64)
+
+def kmeans(X, k, iterations=10, init=None, seed=None, backend=None, cache=None, threads=1):
+    # kmeans(X, k [, iterations [, init [, seed [, backend [, cache [, threads]]]]]]) returns (centroids, labels)
+    #
+    # X is (nPts, nDim); init, if given, is (k, nDim).  The backend is selected
+    # with the cost model among those that can start from init unless given
+    # explicitly; threads is the number of workers a THREADED backend may use.
+    # With k >= nPts every point is its own center.  cache=True looks the result up
+    # in result_cache.default_cache(), or in the ResultCache given, and stores it
+    # there after a run; the arrays of a hit are read-only memmaps.  Only runs
+    # that can be reproduced, with a seed or init, are cached.
+    if hasattr(X, "tocsr"):
+        # scipy.sparse input is never densified
+        X = X.tocsr()
+        if backend is None:
+            backend = "csr"
+        elif backend != "csr":
+            raise ValueError("sparse input needs the csr backend")
+    else:
+        X = np.asarray(X)
+    (nPts, nDim) = X.shape
+    k = min(k, nPts)
+    if threads < 1:
+        raise ValueError("threads must be at least 1")
+    if backend is None:
+        backend = select(nPts, nDim, k, X.dtype, iterations, threads, capable_backends(init))
+    elif backend not in RUNNERS:
+        raise ValueError("unknown kmeans backend %r, expected one of %s" % (backend, sorted(RUNNERS)))
+    if cache is True:
+        from .result_cache import default_cache
+        cache = default_cache()
+    if cache and (seed is not None or init is not None):
+        # a threaded backend sums over its workers in an order that depends on threads
+        key = cache.key(X, k=k, iterations=iterations, seed=seed, backend=backend,
+                        init=None if init is None else np.asarray(init, dtype=np.float64),
+                        threads=threads if backend in THREADED else 1)
+        hit = cache.get(key)
+        if hit is not None:
+            return hit[0]["centroids"], hit[0]["labels"]
+    else:
+        cache = None
+    if seed is not None:
+        np.random.seed(seed)
+    random_state = np.random.get_state()
+    with trace.span(trace.SEED, backend):
+        if init is None:
+            init = _seed_init(X, k)
+        else:
+            init = np.asarray(init, dtype=np.float64)
+            random_state = None
+    t1 = time.time()
+    centroids, labels = RUNNERS[backend](X, init, iterations, threads, random_state)
+    centroids = np.asarray(centroids, dtype=np.float64)
+    labels = np.asarray(labels, dtype=np.int32).reshape(nPts)
+    if cache is not None:
+        cache.put(key, {"centroids": centroids, "labels": labels},
+                  {"backend": backend, "seconds": time.time() - t1})
+    return centroids, labels
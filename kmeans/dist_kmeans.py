@@ -0,0 +1,216 @@
+import multiprocessing
+import time
+from multiprocessing.connection import Client, Listener
+
+import numpy as np
+
+from . import layout, trace
+
+#------------------------------------------------------------------------------------
+#           distributed kmeans over shards that stay on their own nodes
+#------------------------------------------------------------------------------------
+#
+# Every worker holds one shard of the points and assigns it in the C core with
+# bounds that stay resident between iterations (libmpikmeans.Shard).  Each
+# iteration the coordinator sends the centers to all workers.  Every worker
+# sends back its per cluster sums and counts, its sse for those centers and
+# the number of its points that changed cluster.  The coordinator adds these
+# up into the next centers.  Messages are O(nClusters*nDim) whatever the number
+# of points.  The points never leave their worker, and neither do the labels:
+# serve() returns the labels of its shard when the coordinator is done.
+#
+# Transport is either multiprocessing.connection over TCP, with the usual
+# authkey handshake, or mpi4py, where every rank holds a shard and the
+# reduction is an allreduce.  For testing on one host, start_local_workers()
+# starts a process per shard listening on loopback:
+#
+#     addresses, procs = start_local_workers(shards)
+#     clusters, sse = kmeans_dist(addresses, clusters, iterations)
+
+
+def serve_shard(conn, X, labels = None):
+    # answer centers received on conn with (sums, counts, sse, nchanged) for the points
+    # X until None is received; returns the 0-based labels of X
+    from .libmpikmeans import Shard
+
+    X = layout.c_order(X, np.float64, "dist")
+    shard = None
+    try:
+        while True:
+            clusters = conn.recv()
+            if clusters is None:
+                break
+            if shard is None:
+                shard = Shard(X, clusters.shape[0], labels)
+            conn.send(shard.assign(clusters))
+        return shard.labels if shard is not None else labels
+    finally:
+        if shard is not None:
+            shard.close()
+
+
+def reduce_assign(conns, clusters):
+    # one assignment round over all workers; returns the total (sums, counts, sse, nchanged)
+    for conn in conns:
+        conn.send(clusters)
+    sums = np.zeros(clusters.shape)
+    counts = np.zeros(clusters.shape[0], np.int64)
+    sse = 0.
+    nchanged = 0
+    for conn in conns:
+        (s_sums, s_counts, s_sse, s_nchanged) = conn.recv()
+        sums += s_sums
+        counts += s_counts
+        sse += s_sse
+        nchanged += s_nchanged
+    return sums, counts, sse, nchanged
+
+def update(clusters, sums, counts):
+    # new centers from the reduced sums; clusters without points keep their old value
+    occupied = counts > 0
+    clusters[occupied] = sums[occupied] / counts[occupied, np.newaxis]
+
+def coordinate(conns, clusters, iterations, backend = "dist"):
+    # coordinate(conns, clusters, iterations) returns (clusters, sse)
+
+    # Runs up to iterations rounds over the workers on conns, stopping early when no
+    # point changes cluster.  The workers' labels and the sse are left up to date
+    # with the returned clusters.
+    clusters = np.array(clusters, dtype = np.float64)
+    sse = None
+    for i in range(iterations):
+        t1 = time.time()
+        sums, counts, sse, nchanged = reduce_assign(conns, clusters)
+        t2 = time.time()
+        trace.record(trace.ASSIGN, t1, t2, backend, points = int(counts.sum()),
+                     changed = nchanged, workers = len(conns))
+        if i > 0 and nchanged == 0:
+            break
+        update(clusters, sums, counts)
+        trace.record(trace.UPDATE, t2, time.time(), backend)
+    else:
+        # bring the labels and sse up to date with the last centers
+        if iterations > 0:
+            sums, counts, sse, nchanged = reduce_assign(conns, clusters)
+    return clusters, sse
+
+
+#------------------------------------------------------------------------------------
+#                                   tcp transport
+#------------------------------------------------------------------------------------
+
+def serve(X, address = ("", 0), authkey = None, ready = None):
+    # serve(X [, address [, authkey [, ready]]]) returns labels
+
+    # Listen on address for one coordinator and serve the shard X to it.  authkey
+    # defaults to that of the current process, which local child processes share.
+    # If ready is given, the address actually bound is sent on it, which is how to
+    # learn the port when listening on port 0.
+    if authkey is None:
+        authkey = multiprocessing.current_process().authkey
+    with Listener(address, authkey = authkey) as listener:
+        if ready is not None:
+            ready.send(listener.address)
+            ready.close()
+        with listener.accept() as conn:
+            return serve_shard(conn, X)
+
+def kmeans_dist(addresses, clusters, iterations, authkey = None):
+    # kmeans_dist(addresses, clusters, iterations [, authkey]) returns (clusters, sse)
+
+    # addresses are the (host, port) of workers running serve().  clusters is
+    # (nClusters, nDim).  The workers return from serve() once this is done.
+    if authkey is None:
+        authkey = multiprocessing.current_process().authkey
+    conns = []
+    try:
+        for address in addresses:
+            conns.append(Client(tuple(address), authkey = authkey))
+        return coordinate(conns, clusters, iterations, "dist")
+    finally:
+        for conn in conns:
+            try:
+                conn.send(None)
+            except (OSError, EOFError):
+                pass
+            conn.close()
+
+
+def _local_worker(X, ready, results):
+    labels = serve(X, ("127.0.0.1", 0), ready = ready)
+    results.send(labels)
+    results.close()
+
+def start_local_workers(shards):
+    # start_local_workers(shards) returns (addresses, workers)
+
+    # Starts a process serving each shard on loopback.  Each entry of workers is
+    # (process, conn); conn.recv() gives the labels of the shard after the run.
+    addresses = []
+    workers = []
+    for s, X in enumerate(shards):
+        ready_recv, ready_send = multiprocessing.Pipe(False)
+        results_recv, results_send = multiprocessing.Pipe(False)
+        p = multiprocessing.Process(target = _local_worker, name = "kmeans-dist-%d" % s,
+                                    args = (X, ready_send, results_send))
+        p.daemon = True
+        p.start()
+        ready_send.close()
+        results_send.close()
+        addresses.append(ready_recv.recv())
+        ready_recv.close()
+        workers.append((p, results_recv))
+    return addresses, workers
+
+
+#------------------------------------------------------------------------------------
+#                                  mpi4py transport
+#------------------------------------------------------------------------------------
+
+def kmeans_mpi(X, clusters, iterations, comm = None):
+    # kmeans_mpi(X, clusters, iterations [, comm]) returns (clusters, labels, sse)
+
+    # Called on every rank of comm (default MPI.COMM_WORLD) with that rank's shard X
+    # and the same starting clusters.  Each iteration allreduces the sums, counts,
+    # sse and number of changed points, so every rank ends with the same clusters
+    # and sse, and the labels of its own shard.
+    from mpi4py import MPI
+    from .libmpikmeans import Shard
+
+    if comm is None:
+        comm = MPI.COMM_WORLD
+    clusters = np.array(clusters, dtype = np.float64)
+    (nClusters, nDim) = clusters.shape
+    shard = Shard(layout.c_order(X, np.float64, "dist"), nClusters)
+    # sums, counts, sse and nchanged packed in one buffer, one allreduce per round
+    send = np.zeros(nClusters * nDim + nClusters + 2)
+    recv = np.zeros_like(send)
+
+    def allreduce_assign():
+        sums, counts, sse, nchanged = shard.assign(clusters)
+        send[:nClusters * nDim] = sums.ravel()
+        send[nClusters * nDim:-2] = counts
+        send[-2] = sse
+        send[-1] = nchanged
+        comm.Allreduce(send, recv, op = MPI.SUM)
+        return (recv[:nClusters * nDim].reshape(nClusters, nDim), recv[nClusters * nDim:-2],
+                recv[-2], int(recv[-1]))
+
+    sse = None
+    try:
+        for i in range(iterations):
+            t1 = time.time()
+            sums, counts, sse, nchanged = allreduce_assign()
+            t2 = time.time()
+            trace.record(trace.ASSIGN, t1, t2, "mpi4py", points = len(shard.labels),
+                         changed = nchanged)
+            if i > 0 and nchanged == 0:
+                break
+            update(clusters, sums, counts)
+            trace.record(trace.UPDATE, t2, time.time(), "mpi4py")
+        else:
+            if iterations > 0:
+                sums, counts, sse, nchanged = allreduce_assign()
+        return clusters, shard.labels.astype(np.int32), sse
+    finally:
+        shard.close()
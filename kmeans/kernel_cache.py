@@ -0,0 +1,147 @@
+"""
+Persistent cache of compiled cuda kernels.
+
+Only NDIM and NCLUSTERS stay compile-time constants of the generated
+kernel sources (they size shared memory arrays); the number of points is a
+kernel argument.  Building the sources through SourceModule on every
+kmeans_gpu / trikmeans_gpu call would still run nvcc each time.
+source_module() looks the source up by a hash of the source, compiler
+options and target architecture: cubins are kept on disk under CACHE_DIR
+across processes, and nvcc only runs on a miss.  A loaded module belongs
+to the cuda context it was loaded in, so loaded modules are kept per
+context for the life of the process, and the architecture is that of the
+device of the current context.
+
+pycuda is imported only when a kernel is really compiled or loaded.  The
+compiler, loader and context can be replaced, which lets the cache logic
+run on hosts without a gpu:
+
+    cache = KernelCache(tmpdir, compiler=lambda src, opts, arch: b"cubin",
+                        loader=lambda cubin: cubin, arch="sm_00",
+                        context=lambda: 0)
+"""
+
+import hashlib
+import os
+import tempfile
+import time
+
+from . import trace
+
+CACHE_DIR = os.environ.get("KMEANS_KERNEL_CACHE",
+                os.path.join(os.path.expanduser("~"), ".cache", "bell_kmeans", "kernels"))
+
+_default_cache = None
+
+
+def _pycuda_compile(source, options, arch):
+    from pycuda.compiler import compile
+    return compile(source, options=list(options), arch=arch, cache_dir=False)
+
+def _pycuda_load(cubin):
+    import pycuda.driver as cuda
+    return cuda.module_from_buffer(cubin)
+
+def _ensure_context():
+    # the current cuda context, made by pycuda.autoinit if there is none
+    import pycuda.driver as cuda
+    cuda.init()
+    if cuda.Context.get_current() is None:
+        import pycuda.autoinit
+    return cuda.Context
+
+def _device_arch():
+    # architecture of the device of the current context
+    return "sm_%d%d" % _ensure_context().get_device().compute_capability()
+
+def _current_context():
+    # identifies the current context, in which modules are loaded
+    return _ensure_context().get_current().handle
+
+
+class KernelCache(object):
+
+    def __init__(self, cache_dir=None, compiler=None, loader=None, arch=None, context=None):
+        # compiler(source, options, arch) returns a cubin as bytes, loader(cubin)
+        # returns a module with get_function() and get_texref() and context()
+        # a hashable identifying the context loader loads into.  arch is that of
+        # the device of the current context if not given.
+        self.cache_dir = cache_dir or CACHE_DIR
+        self.compiler = compiler or _pycuda_compile
+        self.loader = loader or _pycuda_load
+        self.context = context or _current_context
+        self.arch = arch
+        self.modules = {}       # loaded modules by (context, key)
+        self.hits = 0           # found in memory or on disk
+        self.misses = 0         # compiled
+
+    def target(self):
+        # the architecture compiled for
+        return self.arch or _device_arch()
+
+    def key(self, source, options=(), arch=None):
+        # hash identifying the cubin built from source with options for arch, by
+        # default target()
+        h = hashlib.sha1()
+        for part in [source, arch or self.target()] + list(options):
+            h.update(part.encode("utf-8"))
+            h.update(b"\0")
+        return h.hexdigest()
+
+    def path(self, key):
+        return os.path.join(self.cache_dir, key + ".cubin")
+
+    def cubin(self, source, options=()):
+        # returns the compiled cubin, from disk if it was built before
+        arch = self.target()
+        key = self.key(source, options, arch)
+        filename = self.path(key)
+        if os.path.exists(filename):
+            with open(filename, "rb") as f:
+                self.hits += 1
+                return f.read()
+        self.misses += 1
+        cubin = self.compiler(source, options, arch)
+        if not os.path.isdir(self.cache_dir):
+            os.makedirs(self.cache_dir)
+        # write under a temporary name so a concurrent reader never sees half a file
+        fd, tmpname = tempfile.mkstemp(dir=self.cache_dir, suffix=".tmp")
+        with os.fdopen(fd, "wb") as f:
+            f.write(cubin)
+        os.replace(tmpname, filename)
+        return cubin
+
+    def module(self, source, options=()):
+        # returns the loaded module for source, compiling only on a cache miss
+        t1 = time.time()
+        options = tuple(options)
+        key = (self.context(), self.key(source, options))
+        if key in self.modules:
+            self.hits += 1
+            hit = 1
+        else:
+            misses = self.misses
+            self.modules[key] = self.loader(self.cubin(source, options))
+            hit = int(self.misses == misses)
+        trace.record(trace.COMPILE, t1, time.time(), "cuda", "kernel_cache",
+                     hits=hit, misses=1 - hit)
+        return self.modules[key]
+
+    def clear(self):
+        # forget loaded modules and delete the cubins on disk
+        self.modules.clear()
+        if os.path.isdir(self.cache_dir):
+            for name in os.listdir(self.cache_dir):
+                if name.endswith(".cubin"):
+                    os.remove(os.path.join(self.cache_dir, name))
+
+
+def default_cache():
+    global _default_cache
+    if _default_cache is None:
+        _default_cache = KernelCache()
+    return _default_cache
+
+def source_module(source, options=()):
+    # drop-in for pycuda.compiler.SourceModule(source) that goes through the cache
+    return default_cache().module(source, options)
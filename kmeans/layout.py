@@ -0,0 +1,122 @@
+import os
+import time
+import warnings
+
+import numpy as np
+
+from . import trace
+
+#------------------------------------------------------------------------------------
+#               input adapter: any memory order, copies only when unavoidable
+#------------------------------------------------------------------------------------
+#
+# The engines want their points in one of two layouts: the C core, py_kmeans
+# and the shard / batch paths take (nPts, nDim) rows, the cuda and cpu engines
+# (nDim, nPts) columns.  The transpose of a Fortran ordered array is C ordered,
+# so a caller holding either order can be served without a copy:
+#
+#     c_order(X, dtype)       X itself, C-contiguous
+#     transposed(X, dtype)    X.T, C-contiguous; free for a Fortran ordered X
+#     any_order(X, dtype)     X in dtype, any strides; for the numpy engines
+#
+# Each returns its input untouched when it already has the layout and dtype,
+# and otherwise copies it once; the check is made before copying, so under
+# "raise" nothing is allocated.  A copy is recorded in the trace (phase DATA,
+# name "copy", with its bytes) and, from COPY_WARN_BYTES on, reported as set by
+# KMEANS_COPY or copy_policy():
+#
+#     "warn"      a CopyWarning, which warnings.simplefilter can silence or
+#                 turn into an error (the default)
+#     "raise"     a CopyError, so a large array is never duplicated silently
+#     "ignore"    only the trace
+#
+# The C core needs (nPts, nDim) rows, so a Fortran ordered or strided X is
+# still copied for it; only the engines that take columns, or any strides,
+# avoid the copy for those.
+
+POLICIES = ("warn", "raise", "ignore")
+
+COPY_WARN_BYTES = int(os.environ.get("KMEANS_COPY_WARN_BYTES", 1 << 26))
+_policy = os.environ.get("KMEANS_COPY", "warn")
+if _policy not in POLICIES:
+    _policy = "warn"
+
+
+class CopyWarning(UserWarning):
+    # an input array was copied to get the layout or dtype an engine needs
+    pass
+
+class CopyError(ValueError):
+    # an input array would have been copied under the "raise" policy
+    pass
+
+
+def copy_policy(policy = None, min_bytes = None):
+    # copy_policy([policy [, min_bytes]]) returns (policy, min_bytes) before the call
+
+    # sets how copies of at least min_bytes are reported, one of POLICIES
+    global _policy, COPY_WARN_BYTES
+    previous = (_policy, COPY_WARN_BYTES)
+    if policy is not None:
+        if policy not in POLICIES:
+            raise ValueError("policy must be one of %s" % (POLICIES,))
+        _policy = policy
+    if min_bytes is not None:
+        COPY_WARN_BYTES = int(min_bytes)
+    return previous
+
+def describe(X):
+    # the layout of an array as a short string, e.g. "float64 (1000, 8) F-order"
+    if X.flags.c_contiguous:
+        order = "C-order"
+    elif X.flags.f_contiguous:
+        order = "F-order"
+    else:
+        order = "strides %s" % (X.strides,)
+    return "%s %s %s" % (X.dtype, X.shape, order)
+
+
+#------------------------------------------------------------------------------------
+#                               adapters
+#------------------------------------------------------------------------------------
+
+def c_order(X, dtype, backend = "", what = "X"):
+    # c_order(X, dtype [, backend [, what]]) returns X as a C-contiguous array of dtype
+    return _convert(X, np.asarray(X), dtype, True, backend, what)
+
+def transposed(X, dtype, backend = "", what = "X"):
+    # transposed(X, dtype [, backend [, what]]) returns X.T as a C-contiguous array of dtype
+
+    # X is (nPts, nDim) and the result (nDim, nPts), the layout of the cuda and cpu
+    # engines; it is a view of X when X is a Fortran ordered array of dtype
+    return _convert(X, np.asarray(X).T, dtype, True, backend, what)
+
+def any_order(X, dtype, backend = "", what = "X"):
+    # any_order(X, dtype [, backend [, what]]) returns X as an array of dtype, keeping
+    # its strides when it already is one
+    return _convert(X, np.asarray(X), dtype, False, backend, what)
+
+
+def _convert(source, src, dtype, contiguous, backend, what):
+    dtype = np.dtype(dtype)
+    # a list or other non-array source has to become an array whatever the layout
+    if not isinstance(source, np.ndarray) or (src.dtype == dtype and
+                                              (src.flags.c_contiguous or not contiguous)):
+        if contiguous:
+            return np.ascontiguousarray(src, dtype = dtype)
+        return np.asarray(src, dtype = dtype)
+    nbytes = src.size * dtype.itemsize
+    if nbytes >= COPY_WARN_BYTES and _policy != "ignore":
+        message = "%s: %s (%s) is copied to %s%s (%d bytes)" % (
+            backend or "kmeans", what, describe(src), dtype, " C-order" if contiguous else "",
+            nbytes)
+        if _policy == "raise":
+            raise CopyError(message)
+        warnings.warn(message, CopyWarning, stacklevel = 4)
+    t1 = time.time()
+    if contiguous:
+        out = np.ascontiguousarray(src, dtype = dtype)
+    else:
+        out = src.astype(dtype)
+    trace.record(trace.DATA, t1, time.time(), backend, "copy", bytes = nbytes)
+    return out
@@ -0,0 +1,493 @@
+"""
+ctypes binding of libmpikmeans.so, the MPI-Kmeans C core as a shared library.
+
+The library is loaded once per process, on first use, from KMEANS_MPI_LIB
+if that is set, else from the package directory, where make_py_kmeans
+copies it as _libmpikmeans_core.so (a libmpikmeans.so there would shadow
+this module), or from the mpi_kmeans-1.5 build directory next to the package.
+
+    shard = Shard(X, nClusters)             # X is C-contiguous (nPts, nDim) float64
+    sums, counts, sse, nchanged = shard.assign(clusters)
+    clusters, sse, labels = kmeans(X, k, weights=w)     # weighted points
+    clusters, sse, labels, info = kmeans(X, k, tol=1e-4, full_output=True)
+    clusters, sse, labels = kmeans_csr(X, clusters)     # X is a scipy.sparse matrix
+    clusters, sse, labels = kmeans_batch(X, k)          # X is (nProblems, nPts, nDim)
+    model = KMeans(k).fit(X)                            # buffers reused by later calls
+    labels = model.predict(Y)
+    labels, sse = model_assign(model_fill(clusters), Y) # pruned by the model's metadata
+"""
+
+import os
+import time
+
+import numpy as np
+from ctypes import POINTER, Structure, byref, c_double, c_int, c_size_t, c_uint, c_void_p
+from numpy.ctypeslib import ndpointer
+
+from . import layout, trace
+from .backends import INSTALLED, LIBRARY, library_path
+
+# lower bound storage of kmeans_compact, as in mpi_kmeans.h
+BOUNDS = {"float": 0, "float16": 1, "uint8": 2}
+
+# reasons for stopping, indexed by KMEANS_STOP_* of mpi_kmeans.h
+STOP = ("converged", "maxiter", "tol", "sse_rtol")
+
+_lib = None
+
+
+class Criteria(Structure):
+    # struct kmeans_criteria
+    _fields_ = [("tol", c_double), ("sse_rtol", c_double),
+                ("iterations", c_uint), ("stop", c_uint)]
+
+
+class ModelView(Structure):
+    # struct kmeans_model, filled by kmeans_model_view
+    _fields_ = [("dim", c_uint), ("nclus", c_uint),
+                ("CX", c_void_p), ("cnorm", c_void_p), ("cl_dist", c_void_p), ("s", c_void_p),
+                ("map", c_void_p), ("bytes", c_size_t)]
+
+
+def load():
+    # returns the loaded library with the argument types of its entry points set
+    global _lib
+    if _lib is None:
+        filename = library_path()
+        if filename is None:
+            raise ImportError("%s not found, build it with make_py_kmeans" % LIBRARY)
+        lib = np.ctypeslib.load_library(os.path.basename(filename), os.path.dirname(filename))
+
+        lib.kmeans.restype = c_double
+        lib.kmeans.argtypes = [ndpointer(dtype=c_double, flags='C_CONTIGUOUS'),
+                               ndpointer(dtype=c_double, flags='C_CONTIGUOUS'),
+                               ndpointer(dtype=c_uint, flags='C_CONTIGUOUS'),
+                               c_uint, c_uint, c_uint, c_uint, c_uint]
+
+        lib.kmeans_weighted.restype = c_double
+        lib.kmeans_weighted.argtypes = [ndpointer(dtype=c_double, flags='C_CONTIGUOUS'),
+                                        ndpointer(dtype=c_double, flags='C_CONTIGUOUS'),
+                                        ndpointer(dtype=c_double, flags='C_CONTIGUOUS'),
+                                        ndpointer(dtype=c_uint, flags='C_CONTIGUOUS'),
+                                        c_uint, c_uint, c_uint, c_uint, c_uint]
+
+        lib.kmeans_compact.restype = c_double
+        lib.kmeans_compact.argtypes = [ndpointer(dtype=c_double, flags='C_CONTIGUOUS'),
+                                       ndpointer(dtype=c_double, flags='C_CONTIGUOUS'),
+                                       c_void_p, c_void_p,
+                                       c_uint, c_uint, c_uint, c_uint, c_uint, c_uint, c_uint]
+
+        lib.kmeans_until.restype = c_double
+        lib.kmeans_until.argtypes = [ndpointer(dtype=c_double, flags='C_CONTIGUOUS'),
+                                     ndpointer(dtype=c_double, flags='C_CONTIGUOUS'),
+                                     c_void_p, c_void_p,
+                                     c_uint, c_uint, c_uint, c_uint, c_uint, c_uint, c_uint,
+                                     POINTER(Criteria)]
+
+        lib.kmeans_cosine.restype = c_double
+        lib.kmeans_cosine.argtypes = [ndpointer(dtype=c_double, flags='C_CONTIGUOUS'),
+                                      ndpointer(dtype=c_double, flags='C_CONTIGUOUS'),
+                                      c_void_p,
+                                      ndpointer(dtype=c_uint, flags='C_CONTIGUOUS'),
+                                      c_uint, c_uint, c_uint, c_uint, c_uint,
+                                      POINTER(Criteria)]
+
+        lib.kmeans_csr.restype = c_double
+        lib.kmeans_csr.argtypes = [ndpointer(dtype=c_double, flags='C_CONTIGUOUS'),
+                                   ndpointer(dtype=c_double, flags='C_CONTIGUOUS'),
+                                   ndpointer(dtype=c_uint, flags='C_CONTIGUOUS'),
+                                   ndpointer(dtype=c_uint, flags='C_CONTIGUOUS'),
+                                   ndpointer(dtype=c_uint, flags='C_CONTIGUOUS'),
+                                   c_uint, c_uint, c_uint, c_uint]
+
+        lib.kmeans_batch.restype = None
+        lib.kmeans_batch.argtypes = [ndpointer(dtype=c_double, flags='C_CONTIGUOUS'),
+                                     ndpointer(dtype=c_double, flags='C_CONTIGUOUS'),
+                                     ndpointer(dtype=c_uint, flags='C_CONTIGUOUS'),
+                                     ndpointer(dtype=c_uint, flags='C_CONTIGUOUS'),
+                                     ndpointer(dtype=c_double, flags='C_CONTIGUOUS'),
+                                     c_uint, c_uint, c_uint, c_uint, c_uint]
+
+        lib.kmeans_workspace_new.restype = c_void_p
+        lib.kmeans_workspace_new.argtypes = []
+        lib.kmeans_workspace_free.restype = None
+        lib.kmeans_workspace_free.argtypes = [c_void_p]
+        lib.kmeans_with_workspace.restype = c_double
+        lib.kmeans_with_workspace.argtypes = [ndpointer(dtype=c_double, flags='C_CONTIGUOUS'),
+                                              ndpointer(dtype=c_double, flags='C_CONTIGUOUS'),
+                                              c_void_p,
+                                              ndpointer(dtype=c_uint, flags='C_CONTIGUOUS'),
+                                              c_uint, c_uint, c_uint, c_uint, c_uint,
+                                              POINTER(Criteria), c_void_p]
+        lib.kmeans_assign.restype = c_double
+        lib.kmeans_assign.argtypes = [ndpointer(dtype=c_double, flags='C_CONTIGUOUS'),
+                                      ndpointer(dtype=c_double, flags='C_CONTIGUOUS'),
+                                      ndpointer(dtype=c_uint, flags='C_CONTIGUOUS'),
+                                      c_uint, c_uint, c_uint]
+
+        lib.kmeans_model_bytes.restype = c_size_t
+        lib.kmeans_model_bytes.argtypes = [c_uint, c_uint]
+        lib.kmeans_model_fill.restype = None
+        lib.kmeans_model_fill.argtypes = [c_void_p, ndpointer(dtype=c_double, flags='C_CONTIGUOUS'),
+                                          c_uint, c_uint]
+        lib.kmeans_model_view.restype = c_int
+        lib.kmeans_model_view.argtypes = [POINTER(ModelView), c_void_p, c_size_t]
+        lib.kmeans_model_assign.restype = c_double
+        lib.kmeans_model_assign.argtypes = [POINTER(ModelView),
+                                            ndpointer(dtype=c_double, flags='C_CONTIGUOUS'),
+                                            ndpointer(dtype=c_uint, flags='C_CONTIGUOUS'),
+                                            c_uint]
+
+        lib.kmeans_shard_new.restype = c_void_p
+        lib.kmeans_shard_new.argtypes = [ndpointer(dtype=c_double, flags='C_CONTIGUOUS'),
+                                         ndpointer(dtype=c_uint, flags='C_CONTIGUOUS'),
+                                         c_uint, c_uint, c_uint]
+        lib.kmeans_shard_assign.restype = c_uint
+        lib.kmeans_shard_assign.argtypes = [c_void_p,
+                                            ndpointer(dtype=c_double, flags='C_CONTIGUOUS'),
+                                            ndpointer(dtype=c_double, flags='C_CONTIGUOUS'),
+                                            ndpointer(dtype=c_uint, flags='C_CONTIGUOUS'),
+                                            POINTER(c_double)]
+        lib.kmeans_shard_free.restype = None
+        lib.kmeans_shard_free.argtypes = [c_void_p]
+        _lib = lib
+    return _lib
+
+
+def label_dtype(nClusters):
+    # smallest unsigned integer type that holds 0-based labels of nClusters clusters
+    if nClusters <= 1 << 8:
+        return np.uint8
+    if nClusters <= 1 << 16:
+        return np.uint16
+    return np.uint32
+
+def kmeans(X, nclst, maxiter=0, numruns=1, weights=None, clusters=None, compact=None,
+           tol=0., sse_rtol=0., full_output=False, metric="euclidean"):
+    # kmeans(X, nclst [, maxiter [, numruns [, weights [, clusters [, compact]]]]]) returns (clusters, sse, labels)
+
+    # X is (nPts, nDim).  weights, if given, holds a nonnegative weight per point:
+    # centers are weighted means and sse is the weighted sum of squared errors.
+    # Starting centers are nclst random points unless clusters is given.  labels
+    # are 0-based.  With compact="float16" or "uint8" the lower bounds take 2 or 1
+    # bytes instead of 4, and labels are the smallest unsigned type for nclst.
+    #
+    # Besides after maxiter iterations (0 for no limit) or when no point changes
+    # cluster, a run stops once no center moves more than tol times the root mean
+    # squared distance of the points to their mean, or once the sse goes down by
+    # at most sse_rtol of itself; 0 disables either.  With full_output=True an info
+    # dict is returned as well, with the "iterations" and the "stop" reason (one
+    # of STOP) of the run returned.
+    #
+    # metric="cosine" runs spherical kmeans: the points and centers are scaled to
+    # unit length, points go to the center of largest dot product, and the centers
+    # returned are the unit mean directions of their clusters.  sse is then the sum
+    # of 2 - 2 cos over the points.
+    lib = load()
+    X = layout.c_order(X, c_double, "mpi")
+    (nPts, nDim) = X.shape
+    nclst = min(nclst, nPts)
+    if clusters is None:
+        permutation = np.random.permutation(nPts)
+        clusters = X[permutation[:nclst], :]
+    clusters = np.array(clusters, dtype=c_double, order='C')
+    if weights is not None:
+        weights = np.ascontiguousarray(weights, dtype=c_double)
+        if weights.shape != (nPts,):
+            raise ValueError("weights must have one entry per point")
+    if compact is not None and compact not in BOUNDS:
+        raise ValueError("compact must be one of %s" % sorted(BOUNDS))
+    if metric not in ("euclidean", "cosine"):
+        raise ValueError("metric must be 'euclidean' or 'cosine'")
+    if metric == "cosine" and compact is not None:
+        raise ValueError("compact is not supported with metric='cosine'")
+    if tol < 0 or sse_rtol < 0:
+        raise ValueError("tol and sse_rtol must be nonnegative")
+    labels = np.zeros(nPts, c_uint if compact is None else label_dtype(nclst))
+    if nclst == nPts:
+        # the C core only copies the points for this
+        labels[:] = np.arange(nPts)
+    crit = Criteria(tol, sse_rtol, 0, 0)
+    t1 = time.time()
+    if metric == "cosine":
+        sse = lib.kmeans_cosine(clusters, X, None if weights is None else weights.ctypes.data,
+                                labels, nDim, nPts, nclst, maxiter, numruns - 1, byref(crit))
+    else:
+        sse = lib.kmeans_until(clusters, X, None if weights is None else weights.ctypes.data,
+                               labels.ctypes.data, labels.itemsize, nDim, nPts, nclst, maxiter,
+                               numruns - 1, BOUNDS[compact or "float"], byref(crit))
+    trace.record(trace.RUN, t1, time.time(), "mpi", metric, points=nPts, clusters=nclst,
+                 iterations=crit.iterations)
+    if compact is None:
+        labels = labels.astype(np.int32)
+    if full_output:
+        # the C core returns early, without running, for nclst >= nPts
+        info = {"iterations": crit.iterations, "stop": STOP[crit.stop]}
+        return clusters, sse, labels, info
+    return clusters, sse, labels
+
+def _as_uint(a):
+    # index arrays as c_uint, without a copy for the usual int32 indices
+    a = np.ascontiguousarray(a)
+    if a.dtype == np.int32:
+        return a.view(c_uint)
+    return a.astype(c_uint)
+
+def kmeans_csr(X, clusters, maxiter=0):
+    # kmeans_csr(X, clusters [, maxiter]) returns (clusters, sse, labels)
+
+    # X is a scipy.sparse matrix of shape (nPts, nDim), used as CSR without being
+    # densified; clusters is the dense (nClusters, nDim) start.  maxiter=0 runs
+    # until no point changes cluster.  labels are 0-based.
+    lib = load()
+    X = X.tocsr()
+    (nPts, nDim) = X.shape
+    clusters = np.array(clusters, dtype=np.float64, order='C')
+    nClusters = clusters.shape[0]
+    data = np.ascontiguousarray(X.data, dtype=np.float64)
+    labels = np.zeros(nPts, c_uint)
+    t1 = time.time()
+    sse = lib.kmeans_csr(clusters, data, _as_uint(X.indices), _as_uint(X.indptr), labels,
+                         nDim, nPts, nClusters, maxiter)
+    trace.record(trace.RUN, t1, time.time(), "csr", points=nPts, clusters=nClusters, nnz=X.nnz)
+    return clusters, sse, labels.astype(np.int32)
+
+def kmeans_batch(X, nclst, offsets=None, maxiter=0, clusters=None, threads=0):
+    # kmeans_batch(X, nclst [, offsets [, maxiter [, clusters [, threads]]]]) returns (clusters, sse, labels)
+
+    # Clusters many small independent problems in one call into the C core, which
+    # runs them on threads (0 for one per cpu).  X is either (nProblems, nPts, nDim),
+    # or the (sum of nPts, nDim) rows of all problems one after the other, with
+    # problem p in rows offsets[p] to offsets[p + 1].  clusters is (nProblems, nclst,
+    # nDim) and sse (nProblems,); labels are 0-based per problem, (nProblems, nPts)
+    # for a 3-D X and one flat array for offsets.  Starting centers are nclst random
+    # points of each problem unless clusters is given.  A problem with at most nclst
+    # points gets a center on each of its points.
+    lib = load()
+    X = np.asarray(X)
+    if offsets is None:
+        if X.ndim != 3:
+            raise ValueError("X must be 3-D unless offsets are given")
+        (nProblems, nPts, nDim) = X.shape
+        offsets = np.arange(nProblems + 1, dtype=c_uint) * nPts
+        shape = (nProblems, nPts)
+        X = X.reshape(nProblems * nPts, nDim)
+    else:
+        offsets = np.ascontiguousarray(offsets, dtype=c_uint)
+        nProblems = len(offsets) - 1
+        shape = (X.shape[0],)
+        if offsets[0] != 0 or offsets[-1] != X.shape[0] or np.any(np.diff(offsets.astype(np.int64)) < 0):
+            raise ValueError("offsets must go from 0 to the number of rows of X")
+    X = layout.c_order(X, c_double, "batch")
+    nDim = X.shape[1]
+    if clusters is None:
+        # the first nclst rows of each problem in a random order within it
+        rows = np.lexsort((np.random.random(len(X)),
+                           np.repeat(np.arange(nProblems), np.diff(offsets.astype(np.int64)))))
+        first = offsets[:-1, np.newaxis].astype(np.int64) + np.arange(nclst)
+        clusters = X[rows[np.minimum(first, max(len(X) - 1, 0))]]
+    clusters = np.array(clusters, dtype=c_double, order='C').reshape(nProblems, nclst, nDim)
+    labels = np.zeros(len(X), c_uint)
+    sse = np.zeros(nProblems)
+    t1 = time.time()
+    lib.kmeans_batch(clusters, X, offsets, labels, sse, nDim, nProblems, nclst, maxiter, threads)
+    trace.record(trace.RUN, t1, time.time(), "mpi", "batch", points=len(X), problems=nProblems)
+    return clusters, sse, labels.astype(np.int32).reshape(shape)
+
+
+def model_fill(clusters, buf=None):
+    # model_fill(clusters [, buf]) returns the model of clusters (nClusters, nDim) as a uint8 array
+
+    # The model is in the format of model_file, centers with their norms and
+    # half-distances, built by the C core into buf if that has the right size.
+    lib = load()
+    clusters = np.ascontiguousarray(clusters, dtype=c_double)
+    (nClusters, nDim) = clusters.shape
+    if nClusters == 0:
+        raise ValueError("a model needs at least one center")
+    nbytes = lib.kmeans_model_bytes(nDim, nClusters)
+    if buf is None or buf.dtype != np.uint8 or buf.shape != (nbytes,) \
+            or not buf.flags.c_contiguous:
+        buf = np.zeros(nbytes, np.uint8)
+    lib.kmeans_model_fill(buf.ctypes.data, clusters, nDim, nClusters)
+    return buf
+
+def model_assign(buf, X, labels=None):
+    # model_assign(buf, X [, labels]) returns (labels, sse)
+
+    # labels are the 0-based nearest centers of the rows of X (nPts, nDim) by the
+    # model in buf, a uint8 array or memmap as made by model_fill or model_file,
+    # and sse the sum of their squared distances.  kmeans_model_assign compares a
+    # point only with the centers its stored half-distances cannot rule out.
+    # labels, if given, is a uint32 array of nPts entries to write into.
+    lib = load()
+    buf = np.asarray(buf)
+    view = ModelView()
+    if buf.dtype != np.uint8 or not buf.flags.c_contiguous or \
+            lib.kmeans_model_view(byref(view), buf.ctypes.data, buf.nbytes) != 0:
+        raise ValueError("not a kmeans model, or of another version")
+    X = layout.c_order(X, c_double, "model")
+    (nPts, nDim) = X.shape
+    if nDim != view.dim:
+        raise ValueError("X has %d columns, the model %d" % (nDim, view.dim))
+    if labels is None:
+        labels = np.zeros(nPts, c_uint)
+    t1 = time.time()
+    sse = lib.kmeans_model_assign(byref(view), X, labels, nPts)
+    trace.record(trace.ASSIGN, t1, time.time(), "mpi", "model_assign", points=nPts)
+    return labels, sse
+
+
+class Shard(object):
+    # points of one shard with their bounds kept in the C core between iterations
+
+    def __init__(self, X, nClusters, labels=None):
+        # X is a C-contiguous (nPts, nDim) float64 array that must outlive the shard,
+        # e.g. a view of shared memory.  The C core writes 0-based assignments into
+        # labels, a uint32 array of nPts entries, allocated here if not given.
+        self.lib = load()
+        if X.dtype != np.float64 or not X.flags.c_contiguous:
+            raise ValueError("X must be a C-contiguous float64 array")
+        (self.nPts, self.nDim) = X.shape
+        self.nClusters = nClusters
+        self.X = X
+        if labels is None:
+            labels = np.zeros(self.nPts, c_uint)
+        self.labels = labels
+        self.sums = np.zeros((nClusters, self.nDim))
+        self.counts = np.zeros(nClusters, c_uint)
+        self._sse = c_double()
+        self.handle = self.lib.kmeans_shard_new(X, labels, self.nDim, self.nPts, nClusters)
+
+    def assign(self, clusters):
+        # assign the points to clusters (nClusters, nDim); returns (sums, counts, sse, nchanged)
+        # with the per cluster sums and counts of the shard and its sse for these clusters
+        clusters = np.ascontiguousarray(clusters, dtype=np.float64)
+        t1 = time.time()
+        nchanged = self.lib.kmeans_shard_assign(self.handle, clusters, self.sums, self.counts,
+                                                self._sse)
+        trace.record(trace.ASSIGN, t1, time.time(), "mpi", "shard", points=self.nPts,
+                     changed=nchanged)
+        return self.sums, self.counts, self._sse.value, nchanged
+
+    def close(self):
+        if self.handle is not None:
+            self.lib.kmeans_shard_free(self.handle)
+            self.handle = None
+
+    def __del__(self):
+        self.close()
+
+
+class KMeans(object):
+    # A model whose centers, labels and C core workspace are kept between calls.
+    # fit() and predict() write 0-based labels into buffers that only grow, one
+    # for fit and one for predict, or into the labels array given, and return a
+    # view of it, so repeated calls on data of the same size allocate nothing.
+    # The returned labels are overwritten by the next call of the same method
+    # that does not get its own labels array.
+
+    __slots__ = ("nClusters", "maxiter", "numruns", "crit", "lib", "workspace",
+                 "clusters", "sse", "_labels", "_predicted", "_fit_labels", "_perm")
+
+    def __init__(self, nClusters, maxiter=0, numruns=1, tol=0., sse_rtol=0.):
+        # maxiter, numruns, tol and sse_rtol are as for kmeans()
+        self.lib = load()
+        self.nClusters = nClusters
+        self.maxiter = maxiter
+        self.numruns = numruns
+        self.crit = Criteria(tol, sse_rtol, 0, 0)
+        self.workspace = self.lib.kmeans_workspace_new()
+        self.clusters = None
+        self.sse = None
+        self._labels = np.zeros(0, c_uint)         # fit labels
+        self._predicted = np.zeros(0, c_uint)      # predict labels
+        self._fit_labels = self._labels            # those of the last fit
+        self._perm = np.zeros(0, np.intp)          # shuffled for the starting centers
+
+    @property
+    def iterations(self):
+        # iterations of the last fit
+        return self.crit.iterations
+
+    @property
+    def stop(self):
+        # why the last fit stopped, one of STOP
+        return STOP[self.crit.stop]
+
+    def _out(self, nPts, labels, buffer):
+        # labels as uint32 for the C core, in the given array or the reused buffer,
+        # "_labels" or "_predicted"
+        if labels is None:
+            if len(getattr(self, buffer)) < nPts:
+                setattr(self, buffer, np.zeros(nPts, c_uint))
+            return getattr(self, buffer)[:nPts]
+        if labels.shape != (nPts,) or labels.dtype not in (np.int32, np.uint32) \
+                or not labels.flags.c_contiguous:
+            raise ValueError("labels must be a contiguous int32 or uint32 array of nPts entries")
+        return labels.view(c_uint)
+
+    def fit(self, X, clusters=None, weights=None, labels=None):
+        # fit(X [, clusters [, weights [, labels]]]) returns self
+
+        # X is (nPts, nDim); clusters the starting centers, by default nClusters
+        # random points.  Afterwards clusters, sse and labels_ hold the result.
+        X = layout.c_order(X, c_double, "mpi")
+        (nPts, nDim) = X.shape
+        if nPts < self.nClusters:
+            raise ValueError("fewer points than clusters")
+        if self.clusters is None or self.clusters.shape != (self.nClusters, nDim):
+            self.clusters = np.zeros((self.nClusters, nDim))
+        if clusters is None:
+            # a permutation of 0..nPts-1 shuffled in place, as np.random.permutation would
+            if len(self._perm) != nPts:
+                self._perm = np.arange(nPts)
+            np.random.shuffle(self._perm)
+            np.take(X, self._perm[:self.nClusters], axis=0, out=self.clusters)
+        else:
+            self.clusters[:] = clusters
+        if weights is not None:
+            weights = np.ascontiguousarray(weights, dtype=c_double)
+            if weights.shape != (nPts,):
+                raise ValueError("weights must have one entry per point")
+        out = self._out(nPts, labels, "_labels")
+        self._fit_labels = out
+        if nPts == self.nClusters:
+            # the C core only copies the points for this
+            out[:] = np.arange(nPts)
+        t1 = time.time()
+        self.sse = self.lib.kmeans_with_workspace(self.clusters, X,
+                                                  None if weights is None else weights.ctypes.data,
+                                                  out, nDim, nPts, self.nClusters, self.maxiter,
+                                                  self.numruns - 1, byref(self.crit),
+                                                  self.workspace)
+        trace.record(trace.RUN, t1, time.time(), "mpi", "fit", points=nPts,
+                     clusters=self.nClusters, iterations=self.crit.iterations)
+        return self
+
+    @property
+    def labels_(self):
+        # labels of the last fit, as int32
+        return self._fit_labels.view(np.int32)
+
+    def predict(self, X, labels=None):
+        # returns the 0-based nearest center of each row of X as int32, see above
+        if self.clusters is None:
+            raise ValueError("fit the model first")
+        X = layout.c_order(X, c_double, "mpi")
+        (nPts, nDim) = X.shape
+        if nDim != self.clusters.shape[1]:
+            raise ValueError("X has %d columns, the centers %d" % (nDim, self.clusters.shape[1]))
+        out = self._out(nPts, labels, "_predicted")
+        t1 = time.time()
+        self.lib.kmeans_assign(self.clusters, X, out, nDim, nPts, self.nClusters)
+        trace.record(trace.ASSIGN, t1, time.time(), "mpi", "predict", points=nPts)
+        return out.view(np.int32)
+
+    def close(self):
+        if self.workspace is not None:
+            self.lib.kmeans_workspace_free(self.workspace)
+            self.workspace = None
+
+    def __del__(self):
+        self.close()
@@ -0,0 +1,170 @@
+import time
+
+import numpy as np
+
+from . import trace
+from .ooc_kmeans import PREFETCH, prefetch, data_shape, assign_chunk, accumulate
+
+#------------------------------------------------------------------------------------
+#                   mini-batch kmeans over samples of the data
+#------------------------------------------------------------------------------------
+#
+# Each step assigns one small batch of points to the current centers and moves
+# every center that received points towards the mean of its batch points.  The
+# step size of a center is its batch count over the number of points it has
+# been given so far, so a center is always the running mean of everything that
+# was assigned to it and settles as its count grows.
+#
+# Centers that attract almost no points are moved onto points of the current
+# batch every reassign_every steps, picked with probability proportional to
+# their squared distance from the closest center.  The batch inertia is smoothed
+# with an exponentially weighted average over about one pass of the data, and
+# the run stops once it has not improved for max_no_improvement batches.
+#
+# The source is an (nPts, nDim) array or np.memmap, or a raw file as for
+# ooc_kmeans, sampled at random rows; or any other iterable of (rows, nDim)
+# arrays, which are used in order as the batches.  Batches are prepared by a
+# background thread.  The result is a C-contiguous float64 (nClusters, nDim)
+# array, the layout of the centroids from py_kmeans.kmeans, and write_clusters()
+# saves it in the text format read by mpi_assign.
+
+BATCH_SIZE = 1024           # rows per batch sampled from an array
+MAX_BATCHES = 100
+MAX_NO_IMPROVEMENT = 10     # batches without a better smoothed inertia before stopping
+REASSIGN_RATIO = 0.01       # centers with fewer points than this fraction of the largest
+REASSIGN_EVERY = 10         # count are reassigned every this many batches
+WINDOW = 10                 # batches averaged by the smoothed inertia for iterables
+
+
+def sample_batches(source, batch_size, max_batches, rng, nDim = None, dtype = np.float32,
+                   offset = 0):
+    # yields float64 (batch_size, nDim) copies of random rows of an array, memmap or raw file
+    if isinstance(source, str):
+        shape = data_shape(source, nDim, dtype, offset)
+        source = np.memmap(source, dtype, "r", offset, shape)
+    nPts = source.shape[0]
+    batch_size = min(batch_size, nPts)
+    for b in range(max_batches):
+        # sorted rows keep reads from a memmap in file order
+        rows = np.sort(rng.choice(nPts, batch_size, replace = False))
+        yield np.array(source[rows], dtype = np.float64)
+
+def iter_batches(source, max_batches):
+    # yields the arrays of an iterable as float64 batches
+    for b, batch in enumerate(source):
+        if b == max_batches:
+            return
+        yield np.asarray(batch, dtype = np.float64)
+
+
+def minibatch_step(batch, clusters, counts):
+    # minibatch_step(batch, clusters, counts) returns (assign, dist)
+
+    # Moves clusters (nClusters, nDim) in place towards the batch points assigned to
+    # them and adds those points to counts.  dist is the squared distance of each
+    # point to its center before the move.
+    nClusters = clusters.shape[0]
+    cnorm = (clusters * clusters).sum(1)
+    assign = assign_chunk(batch, clusters, cnorm)
+    diff = batch - clusters[assign]
+    dist = (diff * diff).sum(1)
+
+    sums = np.zeros(clusters.shape)
+    batch_counts = np.zeros(nClusters, np.int64)
+    accumulate(batch, assign, sums, batch_counts)
+    move_centers(clusters, counts, sums, batch_counts)
+    return assign, dist
+
+def move_centers(clusters, counts, sums, batch_counts):
+    # move clusters in place towards the mean sums / batch_counts of their batch points
+    # and add batch_counts to counts
+    hit = batch_counts > 0
+    counts[hit] += batch_counts[hit]
+    # learning rate of each center is batch_counts / counts
+    clusters[hit] += (sums[hit] - batch_counts[hit, np.newaxis] * clusters[hit]) \
+                        / counts[hit, np.newaxis]
+
+def reassign(batch, dist, clusters, counts, ratio, rng):
+    # move clusters whose count is below ratio times the largest count onto batch
+    # points far from their centers; returns the number of clusters moved
+    low = np.flatnonzero(counts < ratio * counts.max())
+    if len(low) == 0 or len(low) == len(counts):
+        return 0
+    low = low[:len(batch) // 2]
+    p = dist / dist.sum() if dist.sum() > 0 else None
+    if p is not None:
+        # rows on a center cannot be drawn, e.g. in a stream of repeated points
+        low = low[:np.count_nonzero(p)]
+    rows = rng.choice(len(batch), len(low), replace = False, p = p)
+    clusters[low] = batch[rows]
+    # start them off with the smallest count that was kept, so the next batch
+    # does not move them all the way back
+    counts[low] = counts[counts >= ratio * counts.max()].min()
+    return len(low)
+
+
+def minibatch_kmeans(source, clusters, batch_size = BATCH_SIZE, max_batches = MAX_BATCHES,
+                     max_no_improvement = MAX_NO_IMPROVEMENT, tol = 0.,
+                     reassign_ratio = REASSIGN_RATIO, reassign_every = REASSIGN_EVERY,
+                     random_state = None, nDim = None, dtype = np.float32, offset = 0,
+                     depth = PREFETCH):
+    # minibatch_kmeans(source, clusters [, batch_size [, max_batches]]) returns clusters
+
+    # clusters is the (nClusters, nDim) start.  The run ends after max_batches batches,
+    # when the source iterable is exhausted, when the smoothed inertia has not improved
+    # for max_no_improvement batches (0 disables this), or when the squared movement
+    # of the centers in one batch is at most tol.
+    clusters = np.array(clusters, dtype = np.float64, order = "C")
+    nClusters = clusters.shape[0]
+    counts = np.zeros(nClusters, np.int64)
+    rng = np.random.RandomState(random_state)
+    # the batch reader runs in its own thread and gets its own generator
+    sample_rng = np.random.RandomState(rng.randint(2**31))
+
+    if isinstance(source, str) or hasattr(source, "shape"):
+        nPts = data_shape(source, nDim, dtype, offset)[0]
+        window = max(1., float(nPts) / min(batch_size, nPts))
+        batches = sample_batches(source, batch_size, max_batches, sample_rng, nDim, dtype,
+                                 offset)
+    else:
+        window = WINDOW
+        batches = iter_batches(source, max_batches)
+    alpha = min(1., 2. / (window + 1.))
+
+    ewa_inertia = None
+    best_inertia = None
+    no_improvement = 0
+    for b, batch in enumerate(prefetch(batches, depth)):
+        t1 = time.time()
+        old = clusters.copy() if tol > 0 else None
+        assign, dist = minibatch_step(batch, clusters, counts)
+        t2 = time.time()
+        trace.record(trace.UPDATE, t1, t2, "minibatch", "step", points = len(batch))
+
+        if reassign_ratio > 0 and (b + 1) % reassign_every == 0:
+            moved = reassign(batch, dist, clusters, counts, reassign_ratio, rng)
+            trace.record(trace.UPDATE, t2, time.time(), "minibatch", "reassign",
+                         reassigned = moved)
+
+        inertia = dist.mean()
+        if ewa_inertia is None:
+            ewa_inertia = inertia
+        else:
+            ewa_inertia = ewa_inertia * (1. - alpha) + inertia * alpha
+        if best_inertia is None or ewa_inertia < best_inertia:
+            best_inertia = ewa_inertia
+            no_improvement = 0
+        else:
+            no_improvement += 1
+        if max_no_improvement and no_improvement >= max_no_improvement:
+            break
+        if tol > 0 and ((clusters - old) ** 2).sum() <= tol:
+            break
+
+    return clusters
+
+
+def write_clusters(filename, clusters):
+    # write clusters (nClusters, nDim) one center per line, as mpi_kmeans --output does,
+    # for mpi_assign --cluster
+    np.savetxt(filename, clusters, fmt = "%.12g", delimiter = " ")
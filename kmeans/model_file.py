@@ -0,0 +1,122 @@
+import os
+import tempfile
+
+import numpy as np
+
+from .ooc_kmeans import CHUNK_SIZE, assign_chunk
+
+#------------------------------------------------------------------------------------
+#               binary model files: centers with their assignment metadata
+#------------------------------------------------------------------------------------
+#
+# The format of mpi_kmeans --model and mpi_assign --model (kmeans_model_header
+# in mpi_kmeans.h): a 32 byte header of eight uint32
+#
+#     magic, version, nDim, nClusters, 8 (bytes of a center entry),
+#     4 (bytes of a distance entry), 0, 0
+#
+# then, in native byte order,
+#
+#     centers     (nClusters, nDim) float64
+#     cnorm       (nClusters,) float64, the squared norm of each center
+#     cl_dist     (nClusters, nClusters) float32, half the distance between centers
+#     s           (nClusters,) float32, half the distance to the nearest other center
+#
+# Everything after the centers takes O(nClusters^2 nDim) to compute and is the
+# setup of every assignment, so it is stored rather than redone.  The file is
+# read with np.memmap: open_model() costs an mmap, and the arrays of a Model
+# are views of the mapping.  Files written here and by the C core have the same
+# header and centers and are read by both; the norms and half-distances agree
+# up to rounding, as the core may be built with -ffast-math (make_py_kmeans),
+# which reorders its sums.
+#
+# Model.predict() hands the mapped buffer to kmeans_model_assign in the C core
+# (libmpikmeans.model_assign), which uses cl_dist and s to skip the centers
+# a point cannot be nearest to; without the library it falls back to the
+# numpy assignment from the stored norms.
+
+MAGIC = 0x314d4d4b      # "KMM1"
+VERSION = 1
+HEADER = 8              # uint32 entries of the header
+
+
+class Model(object):
+    # centers with their norms and half-distances, views of one buffer
+
+    def __init__(self, buf):
+        buf = np.asarray(buf)
+        if buf.dtype != np.uint8 or buf.ndim != 1 or len(buf) < 4 * HEADER:
+            raise ValueError("not a kmeans model")
+        header = buf[:4 * HEADER].view(np.uint32)
+        (magic, version, nDim, nClusters, prec, bound) = (int(v) for v in header[:6])
+        if magic != MAGIC or version != VERSION or prec != 8 or bound != 4:
+            raise ValueError("not a kmeans model, or of another version")
+        if len(buf) != model_bytes(nDim, nClusters):
+            raise ValueError("kmeans model has the wrong length")
+        offset = 4 * HEADER
+        self.buf = buf
+        self.centers = buf[offset:offset + 8 * nClusters * nDim].view(np.float64) \
+                          .reshape(nClusters, nDim)
+        offset += 8 * nClusters * nDim
+        self.cnorm = buf[offset:offset + 8 * nClusters].view(np.float64)
+        offset += 8 * nClusters
+        self.cl_dist = buf[offset:offset + 4 * nClusters * nClusters].view(np.float32) \
+                          .reshape(nClusters, nClusters)
+        offset += 4 * nClusters * nClusters
+        self.s = buf[offset:].view(np.float32)
+
+    def predict(self, X, chunk_size = CHUNK_SIZE):
+        # returns the 0-based nearest center of each row of X (nPts, nDim) as int32
+        from . import libmpikmeans
+
+        X = np.asarray(X)
+        if X.ndim != 2 or X.shape[1] != self.centers.shape[1]:
+            raise ValueError("X must have %d columns" % self.centers.shape[1])
+        labels = np.empty(X.shape[0], np.int32)
+        pruned = libmpikmeans.library_path() is not None
+        for start in range(0, X.shape[0], chunk_size):
+            chunk = np.asarray(X[start:start + chunk_size], dtype = np.float64)
+            out = labels[start:start + len(chunk)]
+            if pruned:
+                libmpikmeans.model_assign(self.buf, chunk, out.view(np.uint32))
+            else:
+                out[:] = assign_chunk(chunk, self.centers, self.cnorm)
+        return labels
+
+
+def model_bytes(nDim, nClusters):
+    return 4 * HEADER + 8 * (nClusters * nDim + nClusters) \
+           + 4 * (nClusters * nClusters + nClusters)
+
+def model_array(centers):
+    # model_array(centers) returns the model of centers (nClusters, nDim) as a uint8 array
+    centers = np.ascontiguousarray(centers, dtype = np.float64)
+    (nClusters, nDim) = centers.shape
+    if nClusters == 0:
+        raise ValueError("a model needs at least one center")
+    buf = np.zeros(model_bytes(nDim, nClusters), np.uint8)
+    buf[:4 * HEADER].view(np.uint32)[:6] = [MAGIC, VERSION, nDim, nClusters, 8, 4]
+    model = Model(buf)
+    model.centers[:] = centers
+    model.cnorm[:] = (centers * centers).sum(1)
+    # one row at a time, O(nClusters * nDim) memory
+    for i in range(nClusters):
+        diff = centers - centers[i]
+        model.cl_dist[i] = 0.5 * np.sqrt((diff * diff).sum(1))
+    off_diagonal = model.cl_dist + np.diag(np.full(nClusters, np.inf, np.float32))
+    model.s[:] = off_diagonal.min(1) if nClusters > 1 else np.finfo(np.float32).max
+    return buf
+
+def write_model(filename, centers):
+    # write the model of centers (nClusters, nDim) for mpi_assign --model and open_model
+    buf = model_array(centers)
+    dirname = os.path.dirname(os.path.abspath(filename))
+    # write under a temporary name so a concurrent reader never maps half a file
+    fd, tmpname = tempfile.mkstemp(dir = dirname, suffix = ".tmp")
+    with os.fdopen(fd, "wb") as f:
+        buf.tofile(f)
+    os.replace(tmpname, filename)
+
+def open_model(filename):
+    # open_model(filename) returns a Model viewing the mapped file
+    return Model(np.memmap(filename, np.uint8, "r"))
@@ -1,6 +1,6 @@
 from pycuda.compiler import SourceModule
 
-print "mods.py"
+print("mods.py")
 #------------------------------------------------------------------------------------
 #                                   source modules
 #------------------------------------------------------------------------------------
@@ -13,7 +13,7 @@ def get_ccdist_module(nDim, nPts, nClusters, blocksize_ccdist):
 #define NCLUSTERS      """ + str(nClusters)                    + """
 #define NDIM           """ + str(nDim)                         + """
 #define CLUSTERS_SIZE  """ + str(nClusters*nDim)               + """
-#define CLUSTER_CHUNKS """ + str(1 + (nClusters*nDim-1)/blocksize_ccdist) + """
+#define CLUSTER_CHUNKS """ + str(1 + (nClusters*nDim-1)//blocksize_ccdist) + """
 #define THREADS        """ + str(blocksize_ccdist) + """
 
 // calculate the distance beteen two clusters
@@ -90,7 +90,7 @@ def get_init_module(nDim, nPts, nClusters, block_size_assign):
 #define NDIM           """ + str(nDim)                         + """
 #define DATA_SIZE      """ + str(nPts * nDim)                  + """
 #define CLUSTERS_SIZE  """ + str(nClusters*nDim)               + """
-#define CLUSTER_CHUNKS """ + str(1 + (nClusters*nDim-1)/block_size_assign)  + """
+#define CLUSTER_CHUNKS """ + str(1 + (nClusters*nDim-1)//block_size_assign)  + """
 #define THREADS        """ + str(block_size_assign)            + """
 
 
@@ -186,7 +186,7 @@ def get_step3_module(nDim, nPts, nClusters, blocksize_step3):
 #define NDIM           """ + str(nDim)                         + """
 #define DATA_SIZE      """ + str(nPts * nDim)                  + """
 #define CLUSTERS_SIZE  """ + str(nClusters*nDim)               + """
-#define CLUSTER_CHUNKS """ + str(1 + (nClusters*nDim-1)/blocksize_step3)  + """
+#define CLUSTER_CHUNKS """ + str(1 + (nClusters*nDim-1)//blocksize_step3)  + """
 #define THREADS        """ + str(blocksize_step3)            + """
 
 
@@ -359,7 +359,7 @@ def get_step56_module(nDim, nPts, nClusters, blocksize_step56):
 #define NCLUSTERS      """ + str(nClusters)                    + """
 #define NPTS           """ + str(nPts)                         + """
 #define NDIM           """ + str(nDim)                         + """
-#define CLUSTER_CHUNKS """ + str(1 + (nClusters-1)/blocksize_step56)  + """
+#define CLUSTER_CHUNKS """ + str(1 + (nClusters-1)//blocksize_step56)  + """
 #define THREADS        """ + str(blocksize_step56)            + """
 
 // **TODO**  need to loop through clusters if all of them don't fit into shared memory
@@ -0,0 +1,161 @@
+#------------------------------------------------------------------------------------
+#                   source for the standard kmeans kernels (cuda_kmeans)
+#------------------------------------------------------------------------------------
+#
+# Only the source is generated here, compilation goes through kernel_cache, so
+# this module does not need pycuda.  NDIM and NCLUSTERS size the shared memory
+# arrays and stay compile-time constants; the number of points is passed to the
+# kernels at run time so problems of different length share one compiled module.
+
+def get_assign_source(nDim, nClusters, block_size_assign):
+    # source of the cluster_assign kernel; the number of points is a kernel argument
+
+    return """
+
+#define NCLUSTERS      """ + str(nClusters)                    + """
+#define NDIM           """ + str(nDim)                         + """
+#define CLUSTERS_SIZE  """ + str(nClusters*nDim)               + """
+#define CLUSTER_CHUNKS """ + str(1 + (nClusters*nDim-1)//block_size_assign)  + """
+#define THREADS        """ + str(block_size_assign)            + """
+
+// calculate the distance from a data point to a cluster
+__device__ float dc_dist(float *data, float *cluster, int npts)
+{
+    float dist = (data[0]-cluster[0]) * (data[0]-cluster[0]);
+    for (int i=1; i<NDIM; i++) {
+        float diff = data[i*npts] - cluster[i*NCLUSTERS];
+        dist += diff*diff;
+    }
+    return sqrt(dist);
+}
+
+
+// **TODO**  need to loop through clusters if all of them don't fit into shared memory
+
+// Assign data points to the nearest cluster
+__global__ void cluster_assign(int *assignments, float *distances, float *data, float *clusters,
+                               int npts)
+{
+    // copy cluster to shared memory
+    __shared__ float s_clusters[CLUSTERS_SIZE];
+    int idx = threadIdx.x;
+    for(int c = 0; c < CLUSTER_CHUNKS; c++, idx += THREADS){
+        if(idx < CLUSTERS_SIZE){
+            s_clusters[idx] = clusters[idx];
+        }
+    }
+    __syncthreads();
+
+    // calculate distance to each cluster
+    idx = threadIdx.x + blockDim.x * blockIdx.x;
+    if (idx >= npts) return;
+    float min_dist = 1e10;
+    int closest = -1;
+    for(int c=0; c<NCLUSTERS; c++){
+        float d = dc_dist(data + idx, s_clusters + c, npts);
+        distances[idx * NCLUSTERS + c] = d;
+        if(d < min_dist){
+            min_dist = d;
+            closest = c;
+        }
+    }
+    assignments[idx] = closest;
+}
+
+"""
+
+
+
+def get_calc_source(nDim, nClusters, block_size_calc_x, block_size_calc_y, data_chunk_size):
+    # source of the cluster_calc kernel; the number of points is a kernel argument
+    return """
+
+#define NCLUSTERS       """ + str(nClusters)                            + """
+#define NDIM            """ + str(nDim)                                 + """
+#define DATA_CHUNK_SIZE """ + str(data_chunk_size)                      + """
+#define CLUSTERS_SIZE   """ + str(nClusters*nDim)                       + """
+#define CLUSTER_CHUNKS  """ + str(1 + (nClusters-1)//block_size_calc_x)  + """
+#define THREADS         """ + str(min(block_size_calc_x,nClusters))     + """
+#define DIMS            """ + str(block_size_calc_y)                    + """
+
+
+// Calculate the new cluster centers
+__global__ void cluster_calc(int *assignments, float *data, float *new_clusters, int npts)
+{
+    int idx = threadIdx.x;
+    int cluster = threadIdx.x + blockDim.x*blockIdx.x;
+    if(cluster >= NCLUSTERS) return;
+
+    int idy = threadIdx.y;
+    
+    // allocate cluster_accum, cluster_count, and initialize to zero
+    __shared__ float s_cluster_accum[NDIM * THREADS];
+    __shared__ unsigned int s_cluster_count[THREADS];
+    if(idy == 0) s_cluster_count[idx] = 0;
+    for(int d = 0; d < NDIM; d+=DIMS){
+        int dim = d + idy;
+        if(dim >= NDIM) continue;
+        s_cluster_accum[dim*THREADS + idx] = 0.0f;
+    }
+    __syncthreads();
+    
+/*
+    // allocate a staging area for the data
+    __shared__ float s_data[DIMS * DATA_CHUNK_SIZE];
+    __syncthreads();
+    
+
+    // loop over all data points and update cluster_accum and cluster_count
+    // for the cluster each point is assigned to
+    
+    // for each data rep
+    for(int rep = 0; rep * DATA_CHUNK_SIZE < npts; rep++){
+        int iData = rep * DATA_CHUNK_SIZE;    // index of the first data item in this chunk
+        
+        // copy the chunk into shared memory
+        for(int add = 0; add < DATA_CHUNK_SIZE; add += THREADS){
+            int iChunk = add + idx;     // index into the chunk in shared memory
+            if(iChunk < DATA_CHUNK_SIZE && (iData + iChunk) < npts)
+                s_data[idy*DATA_CHUNK_SIZE + iChunk] = data[dim*npts + iData + iChunk];
+        }
+        __syncthreads();
+        
+        // loop over data in shared memory and update cluster_count and cluster_accum
+        for(int i=0; i<DATA_CHUNK_SIZE; i++){
+            if((iData + i) >= npts) break;
+            if(cluster == assignments[iData + i]){
+                if(idy == 0) s_cluster_count[idx] += 1;
+                s_cluster_accum[idy*THREADS + idx] += s_data[idy*DATA_CHUNK_SIZE + i];
+            }
+        }
+        __syncthreads();
+    }
+*/
+
+    // loop over all data and update cluster_count and cluster_accum
+    for(int d = 0; d < NDIM; d += DIMS){
+        int dim = d + idy;
+        if(dim >=NDIM) continue;
+        for(int i=0; i<npts; i++){
+            if(i >= npts) break;
+            if(cluster == assignments[i]){
+                if(dim == 0) s_cluster_count[idx] += 1;
+                s_cluster_accum[dim * THREADS + idx] += data[dim * npts + i];
+            }
+        }
+    }
+    __syncthreads();
+    
+    
+    // divide the accum by the number of points and copy to the output area
+    for(int d = 0; d < NDIM; d += DIMS){
+        int dim = d + idy;
+        if(dim >=NDIM) continue;
+        if(s_cluster_count[idx] > 0){
+            new_clusters[dim * NCLUSTERS + cluster] = s_cluster_accum[dim * THREADS + idx]
+                                                    / s_cluster_count[idx];
+        }
+    }
+}
+
+"""
@@ -1,33 +1,42 @@
-from pycuda.compiler import SourceModule
+from . import kernel_cache
 
 #------------------------------------------------------------------------------------
 #                                   source modules
 #------------------------------------------------------------------------------------
 
-def get_ccdist_module(nDim, nPts, nClusters, blocksize_ccdist, blocksize_init, 
+def get_ccdist_module(nDim, nClusters, blocksize_ccdist, blocksize_init, 
                         blocksize_step4_x, blocksize_step4_y, blocksize_step56,
                         useTextureForData):
     # module to calculate distances between each cluster and half distance to closest
+    return kernel_cache.source_module(get_ccdist_source(nDim, nClusters, blocksize_ccdist,
+                                        blocksize_init, blocksize_step4_x, blocksize_step4_y,
+                                        blocksize_step56, useTextureForData))
+
+def get_ccdist_source(nDim, nClusters, blocksize_ccdist, blocksize_init, 
+                        blocksize_step4_x, blocksize_step4_y, blocksize_step56,
+                        useTextureForData):
+    # source for all the kernels of trikmeans_gpu.  NDIM and NCLUSTERS size the shared
+    # memory arrays and are compile-time constants; the number of points is passed to
+    # the kernels at run time, so it is not part of the source.
     
     modString = """
 
 #define NCLUSTERS      """ + str(nClusters)                    + """
 #define NDIM           """ + str(nDim)                         + """
-#define NPTS           """ + str(nPts)                         + """
 #define CLUSTERS_SIZE  """ + str(nClusters*nDim)               + """
-#define CLUSTER_CHUNKS """ + str(1 + (nClusters*nDim-1)/blocksize_ccdist) + """
+#define CLUSTER_CHUNKS """ + str(1 + (nClusters*nDim-1)//blocksize_ccdist) + """
 #define THREADS        """ + str(blocksize_ccdist) + """
 
-#define CLUSTER_CHUNKS2 """ + str(1 + (nClusters*nDim-1)/blocksize_init)  + """
+#define CLUSTER_CHUNKS2 """ + str(1 + (nClusters*nDim-1)//blocksize_init)  + """
 #define THREADS2        """ + str(blocksize_init)            + """
 
-#define CLUSTER_CHUNKS3 """ + str(1 + (nClusters*nDim-1)/blocksize_init)  + """
+#define CLUSTER_CHUNKS3 """ + str(1 + (nClusters*nDim-1)//blocksize_init)  + """
 #define THREADS3        """ + str(blocksize_init)            + """
 
 #define THREADS4         """ + str(min(blocksize_step4_x,nClusters)) + """
 #define DIMS4            """ + str(blocksize_step4_y)                    + """
 
-#define CLUSTER_CHUNKS5 """ + str(1 + (nClusters-1)/blocksize_step56)  + """
+#define CLUSTER_CHUNKS5 """ + str(1 + (nClusters-1)//blocksize_step56)  + """
 #define THREADS5        """ + str(blocksize_step56)            + """
 
 texture<float, 2, cudaReadModeElementType>texData;
@@ -49,11 +58,11 @@ __device__ float calc_dist(float *clusterA, float *clusterB)
 }
 
 // calculate the distance from a data point to a cluster
-__device__ float dc_dist(float *data, float *cluster)
+__device__ float dc_dist(float *data, float *cluster, int npts)
 {
     float dist = (data[0]-cluster[0]) * (data[0]-cluster[0]);
     for (int i=1; i<NDIM; i++) {
-        float diff = data[i*NPTS] - cluster[i*NCLUSTERS];
+        float diff = data[i*npts] - cluster[i*NCLUSTERS];
         dist += diff*diff;
     }
     return sqrt(dist);
@@ -133,13 +142,13 @@ __global__ void calc_hdclosest(float *cc_dists, float *hdClosest)
         modString += "__global__ void init(float *data, float *clusters,\n"
     modString += """
                                 float *ccdist, float *hdClosest, int *assignments, 
-                                float *lower, float *upper)
+                                float *lower, float *upper, int npts)
 {
 
 //    int idx = threadIdx.x + blockDim.x * blockIdx.x;
-//    if(idx >= NPTS) return;
+//    if(idx >= npts) return;
 //    for(int d = 0; d<NDIM; d++){
-//        dataout[d*NPTS + idx] = tex2D(texData, d, idx);
+//        dataout[d*npts + idx] = tex2D(texData, d, idx);
 //    }
     
     // copy cluster to shared memory
@@ -154,14 +163,14 @@ __global__ void calc_hdclosest(float *cc_dists, float *hdClosest)
 
     // calculate distance to each cluster
     idx = threadIdx.x + blockDim.x * blockIdx.x;
-    if (idx >= NPTS) return;
+    if (idx >= npts) return;
     
     // start with cluster 0 as the closest
 """
     if useTextureForData:
         modString += "float min_dist = dc_dist_tex(idx, s_clusters);\n"
     else:
-        modString += "float min_dist = dc_dist(data+idx, s_clusters);\n"
+        modString += "float min_dist = dc_dist(data+idx, s_clusters, npts);\n"
     modString += """
     lower[idx] = min_dist;
     int closest = 0;
@@ -174,9 +183,9 @@ __global__ void calc_hdclosest(float *cc_dists, float *hdClosest)
     if useTextureForData:
         modString += "float d = dc_dist_tex(idx, s_clusters + c);\n"
     else:
-        modString += "float d = dc_dist(data + idx, s_clusters + c);\n"
+        modString += "float d = dc_dist(data + idx, s_clusters + c, npts);\n"
     modString += """
-        lower[c*NPTS + idx] = d;
+        lower[c*npts + idx] = d;
         if(d < min_dist){
             min_dist = d;
             closest = c;
@@ -206,7 +215,7 @@ __global__ void calc_hdclosest(float *cc_dists, float *hdClosest)
     modString += """
                                      float *ccdist, float *hdClosest, int *assignments, 
                                      float *lower, float *upper, int *badUpper, 
-                                     int *cluster_changed)
+                                     int *cluster_changed, int npts)
 {
     // copy clusters to shared memory
     __shared__ float s_clusters[CLUSTERS_SIZE];
@@ -221,7 +230,7 @@ __global__ void calc_hdclosest(float *cc_dists, float *hdClosest)
     
     // idx ranges over the data points
     idx = threadIdx.x + blockIdx.x * blockDim.x;
-    if(idx >= NPTS) return;
+    if(idx >= npts) return;
     
     float ux = upper[idx];
     int cx = assignments[idx];
@@ -231,7 +240,7 @@ __global__ void calc_hdclosest(float *cc_dists, float *hdClosest)
 
     for(int c=0; c<NCLUSTERS; c++){
         // step 3 conditions...
-        if(c == cx || ux <= lower[c*NPTS + idx] || ux <= ccdist[cx*NCLUSTERS + c])
+        if(c == cx || ux <= lower[c*npts + idx] || ux <= ccdist[cx*NCLUSTERS + c])
              continue;
              
         // Step 3a: check if upper bound needs to be recalculated
@@ -243,24 +252,24 @@ __global__ void calc_hdclosest(float *cc_dists, float *hdClosest)
     if useTextureForData:
         modString += "d_x_cx = dc_dist_tex(idx, s_clusters+cx);\n"
     else:
-        modString += "d_x_cx = dc_dist(data+idx, s_clusters+cx);\n"
+        modString += "d_x_cx = dc_dist(data+idx, s_clusters+cx, npts);\n"
     modString += """
             ux = d_x_cx;
-            lower[c*NPTS + idx] = d_x_cx;
+            lower[c*npts + idx] = d_x_cx;
             rx = 0;
         }else{
             d_x_cx = ux;
         }
         
         // Step 3b: compute distance between x and c change x's assignment if necessary
-        if(d_x_cx > lower[c*NPTS + idx] || d_x_cx > ccdist[cx*NCLUSTERS + c]){
+        if(d_x_cx > lower[c*npts + idx] || d_x_cx > ccdist[cx*NCLUSTERS + c]){
 """
     if useTextureForData:
         modString += "float d_x_c = dc_dist_tex(idx, s_clusters+c);\n"
     else:
-        modString += "float d_x_c = dc_dist(data+idx, s_clusters+c);\n"
+        modString += "float d_x_c = dc_dist(data+idx, s_clusters+c, npts);\n"
     modString += """
-            lower[c*NPTS + idx] = d_x_c;
+            lower[c*npts + idx] = d_x_c;
             if(d_x_c < d_x_cx){
                 // assign x to c
                 // mark both c and cx as having changed
@@ -300,7 +309,7 @@ __global__ void calc_hdclosest(float *cc_dists, float *hdClosest)
         modString += "__global__ void step4(float *data, float *clusters,\n"
     modString += """
                     float *new_clusters, int *assignments,
-                    float *cluster_movement, float *cluster_changed)
+                    float *cluster_movement, float *cluster_changed, int npts)
 {
     int idx = threadIdx.x;
     int idy = threadIdx.y;
@@ -335,7 +344,7 @@ __global__ void calc_hdclosest(float *cc_dists, float *hdClosest)
     if useTextureForData: 
         modString += """
 
-    for(int i=0; i<NPTS; i++){
+    for(int i=0; i<npts; i++){
         if(cluster == assignments[i]){
 
 //            for(int d = idy; d < NDIM; d += DIMS4){
@@ -355,9 +364,9 @@ __global__ void calc_hdclosest(float *cc_dists, float *hdClosest)
 
 //    for(int dim = idy; dim < NDIM; dim += DIMS4){
 //        int dim1 = dim * THREADS4 + idx;
-//        int dim2 = dim * NPTS;
-//        for(int i=0; i<NPTS; i++, dim2++){
-//            if(i >= NPTS) break;
+//        int dim2 = dim * npts;
+//        for(int i=0; i<npts; i++, dim2++){
+//            if(i >= npts) break;
 //            if(cluster == assignments[i]){
 //                if(dim == 0) s_cluster_count[idx] += 1;
 //                s_cluster_accum[dim1] += data[dim2];
@@ -365,8 +374,8 @@ __global__ void calc_hdclosest(float *cc_dists, float *hdClosest)
 //        }
 //    }
 
-    int iData = dim * NPTS;
-    for(int i=0; i<NPTS; i++, iData++){
+    int iData = dim * npts;
+    for(int i=0; i<npts; i++, iData++){
         if(cluster == assignments[i]){
             if(idy == 0) s_cluster_count[idx] += 1;
             s_cluster_accum[i_accum] += data[iData];
@@ -422,7 +431,7 @@ __global__ void calc_movement(float *clusters, float *new_clusters, float *clust
 // Assign data points to the nearest cluster
 __global__ void step56(int *assignment, 
                         float *lower, float * upper, 
-                        float *cluster_movement, int *badUpper)
+                        float *cluster_movement, int *badUpper, int npts)
 {
     // copy cluster movement to shared memory
     __shared__ float s_cluster_movement[NCLUSTERS];
@@ -438,16 +447,16 @@ __global__ void step56(int *assignment,
     __syncthreads();
 
     idx = threadIdx.x + blockDim.x * blockIdx.x;
-    if (idx >= NPTS) return;
+    if (idx >= npts) return;
     
     // loop through all clusters and update the lower bound
     for(int c=0; c < NCLUSTERS; c++){
         if(s_cluster_movement[c] > 0.0f){
 //        if(s_cluster_movement_flag[c]){
-            if(s_cluster_movement[c] < lower[c * NPTS + idx]){
-                lower[c*NPTS + idx] -= s_cluster_movement[c];
+            if(s_cluster_movement[c] < lower[c * npts + idx]){
+                lower[c*npts + idx] -= s_cluster_movement[c];
             }else{
-                lower[c*NPTS + idx] = 0.0f;
+                lower[c*npts + idx] = 0.0f;
             }
         }
     }
@@ -468,4 +477,4 @@ __global__ void step56(int *assignment,
 
 """
     #print modString
-    return SourceModule(modString)
+    return modString
@@ -0,0 +1,168 @@
+import os
+import queue
+import threading
+import time
+
+import numpy as np
+
+from . import trace
+
+#------------------------------------------------------------------------------------
+#                   out-of-core kmeans over data larger than memory
+#------------------------------------------------------------------------------------
+#
+# The data is an (nPts, nDim) array that is read in chunks of rows, one pass per
+# iteration: each chunk is assigned to the current centers and added into per
+# cluster sums and counts, which give the centers for the next iteration.  A
+# background thread reads the next chunks while the current one is processed.
+#
+# The source can be an np.memmap (or any array), or the name of a raw binary
+# file of nPts*nDim values of the given dtype, which is read with plain file
+# reads so nothing but the chunks in flight is ever resident.  Peak memory is
+# about (PREFETCH+2) chunks plus the O(k*nDim) sums: assign_chunk compares a
+# chunk with as many centers at a time as keep its distances within
+# DIST_SIZE entries, so it does not grow with k.  Labels are only kept if an
+# output array, possibly itself a memmap, is given.
+#
+# Each iteration is a standard Lloyd step, so the result matches
+# cpu_kmeans.kmeans_cpu started from the same clusters.
+
+CHUNK_SIZE = 65536      # rows per chunk
+PREFETCH = 2            # chunks read ahead of the one being processed
+DIST_SIZE = 1 << 23     # entries of the distances assign_chunk holds at once, 64 MB
+
+
+def prefetch(iterable, depth = PREFETCH):
+    # iterate over iterable in a background thread, keeping up to depth items ready.
+    # Reads and numpy copies release the GIL, so i/o overlaps with the caller's work.
+    items = queue.Queue(maxsize = depth)
+    stop = threading.Event()
+    done = object()
+
+    def put(item):
+        # returns False once the consumer has gone away
+        while not stop.is_set():
+            try:
+                items.put(item, timeout = 0.1)
+                return True
+            except queue.Full:
+                pass
+        return False
+
+    def reader():
+        try:
+            for item in iterable:
+                if not put((item, None)):
+                    return
+            put((done, None))
+        except BaseException as e:
+            put((done, e))
+        finally:
+            if hasattr(iterable, "close"):
+                iterable.close()
+
+    thread = threading.Thread(target = reader, name = "kmeans-prefetch")
+    thread.daemon = True
+    thread.start()
+    try:
+        while True:
+            item, error = items.get()
+            if error is not None:
+                raise error
+            if item is done:
+                return
+            yield item
+    finally:
+        stop.set()
+        thread.join()
+
+
+def data_shape(source, nDim = None, dtype = np.float32, offset = 0):
+    # (nPts, nDim) of an array or raw file
+    if isinstance(source, str):
+        if nDim is None:
+            raise ValueError("nDim is needed to read a raw data file")
+        itemsize = np.dtype(dtype).itemsize
+        return ((os.path.getsize(source) - offset) // (itemsize * nDim), nDim)
+    return source.shape
+
+def read_chunks(source, chunk_size = CHUNK_SIZE, nDim = None, dtype = np.float32, offset = 0):
+    # yields (start, chunk) with chunk a float64 (rows, nDim) copy of the data
+    (nPts, nDim) = data_shape(source, nDim, dtype, offset)
+    if isinstance(source, str):
+        with open(source, "rb") as f:
+            f.seek(offset)
+            for start in range(0, nPts, chunk_size):
+                rows = min(chunk_size, nPts - start)
+                chunk = np.empty((rows, nDim), dtype)
+                f.readinto(memoryview(chunk).cast("B"))
+                yield start, chunk.astype(np.float64)
+    else:
+        for start in range(0, nPts, chunk_size):
+            yield start, np.array(source[start:start + chunk_size], dtype = np.float64)
+
+
+def assign_chunk(chunk, clusters, cnorm, dist_size = DIST_SIZE):
+    # nearest cluster for each row of chunk; cnorm is the squared norm of each cluster
+
+    # The centers are taken a block at a time, keeping the nearest so far, so at
+    # most dist_size distances exist at once; ties go to the first center.
+    block = max(1, dist_size // max(1, len(chunk)))
+    nClusters = clusters.shape[0]
+    if nClusters <= block:
+        dist = cnorm - 2. * np.dot(chunk, clusters.T)
+        return np.argmin(dist, 1)
+    rows = np.arange(len(chunk))
+    assign = np.zeros(len(chunk), np.intp)
+    best = np.full(len(chunk), np.inf)
+    for start in range(0, nClusters, block):
+        dist = cnorm[start:start + block] - 2. * np.dot(chunk, clusters[start:start + block].T)
+        nearest = np.argmin(dist, 1)
+        d = dist[rows, nearest]
+        closer = d < best
+        best[closer] = d[closer]
+        assign[closer] = nearest[closer] + start
+    return assign
+
+def accumulate(chunk, assign, sums, counts):
+    # add the rows of chunk into the sums and counts of their clusters
+    counts += np.bincount(assign, minlength = len(counts))
+    for d in range(chunk.shape[1]):
+        sums[:, d] += np.bincount(assign, weights = chunk[:, d], minlength = len(counts))
+
+
+def kmeans_ooc(source, clusters, iterations, chunk_size = CHUNK_SIZE, labels = None,
+               nDim = None, dtype = np.float32, offset = 0, depth = PREFETCH):
+    # kmeans_ooc(source, clusters, iterations [, chunk_size [, labels]]) returns (clusters, labels)
+
+    # source is an (nPts, nDim) array or memmap, or a raw file of dtype values with
+    # nDim per row starting at byte offset.  clusters is (nClusters, nDim).  If labels
+    # is an int array of nPts entries (or a memmap), the assignments of the last
+    # iteration are written to it; otherwise labels is returned as None.
+    clusters = np.array(clusters, dtype = np.float64)
+    nClusters = clusters.shape[0]
+    (nPts, nDim) = data_shape(source, nDim, dtype, offset)
+    sums = np.zeros((nClusters, nDim))
+    counts = np.zeros(nClusters, np.int64)
+
+    for i in range(iterations):
+        last = i == iterations - 1
+        sums.fill(0.)
+        counts.fill(0)
+        cnorm = (clusters * clusters).sum(1)
+        chunks = read_chunks(source, chunk_size, nDim, dtype, offset)
+        for start, chunk in prefetch(chunks, depth):
+            t1 = time.time()
+            assign = assign_chunk(chunk, clusters, cnorm)
+            t2 = time.time()
+            trace.record(trace.ASSIGN, t1, t2, "ooc", points = len(chunk))
+            accumulate(chunk, assign, sums, counts)
+            if last and labels is not None:
+                labels[start:start + len(chunk)] = assign
+            trace.record(trace.UPDATE, t2, time.time(), "ooc", "accumulate")
+
+        # clusters without points keep their old value
+        occupied = counts > 0
+        clusters[occupied] = sums[occupied] / counts[occupied, np.newaxis]
+
+    return clusters, labels
@@ -0,0 +1,175 @@
+"""
+Content-addressed on-disk cache of kmeans results.
+
+Jobs that rerun the same clustering (same data, k, seed, backend) can look
+the result up instead of recomputing it.  The key is a streaming hash of
+the data, read in chunks of CHUNK_BYTES so a large memmap is hashed without
+being loaded, plus every parameter of the call.  Each entry is a directory
+named by its key holding one .npy file per array and a stats.json; a hit
+opens the arrays with np.load(mmap_mode="r"), so it costs a hash pass and
+an mmap whatever the size of the labels.
+
+Entries are written under a temporary name and renamed into place, so
+concurrent readers never see half an entry.  A hit touches the entry, and
+put() deletes the least recently used entries once the cache holds more
+than max_bytes.
+
+    cache = ResultCache()                       # or default_cache()
+    key = cache.key(X, k=8, seed=0, backend="mpi")
+    hit = cache.get(key)
+    if hit is None:
+        cache.put(key, {"centroids": c, "labels": l}, {"seconds": t})
+
+kmeans.kmeans(X, k, seed=..., cache=True) goes through default_cache().
+"""
+
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+import time
+
+import numpy as np
+
+from . import trace
+
+CACHE_DIR = os.environ.get("KMEANS_RESULT_CACHE",
+                os.path.join(os.path.expanduser("~"), ".cache", "bell_kmeans", "results"))
+MAX_BYTES = int(os.environ.get("KMEANS_RESULT_CACHE_BYTES", 1 << 30))
+CHUNK_BYTES = 1 << 24   # bytes of data hashed at a time
+FORMAT = 1              # bumped when the entries or the key change
+
+_default_cache = None
+
+
+def hash_array(h, X, chunk_bytes=CHUNK_BYTES):
+    # feed the dtype, shape and contents of X to the hash h, chunk_bytes at a time
+
+    # The contents are hashed in C order whatever the memory layout, so the key
+    # does not depend on it; only a chunk of a strided X is ever copied.
+    X = np.asarray(X)
+    h.update(("%s %s\0" % (X.dtype.str, X.shape)).encode("utf-8"))
+    if X.size == 0:
+        return
+    flat = X.reshape(X.shape[0], -1) if X.ndim > 1 else X.reshape(-1, 1)
+    rows = max(1, chunk_bytes // max(1, flat.shape[1] * X.itemsize))
+    for start in range(0, flat.shape[0], rows):
+        h.update(np.ascontiguousarray(flat[start:start + rows]))
+
+def hash_data(h, X):
+    # hash_array for dense X, or for the three arrays of a scipy.sparse matrix
+    if hasattr(X, "tocsr"):
+        X = X.tocsr()
+        h.update(("csr %s\0" % (X.shape,)).encode("utf-8"))
+        for a in (X.data, X.indices, X.indptr):
+            hash_array(h, a)
+    else:
+        hash_array(h, X)
+
+
+class ResultCache(object):
+
+    def __init__(self, cache_dir=None, max_bytes=None):
+        self.cache_dir = cache_dir or CACHE_DIR
+        self.max_bytes = MAX_BYTES if max_bytes is None else max_bytes
+        self.hits = 0
+        self.misses = 0
+
+    def key(self, X, **params):
+        # hash identifying a clustering of X with params; arrays among the params
+        # (e.g. starting centers) are hashed by content
+        t1 = time.time()
+        h = hashlib.blake2b(digest_size=20)
+        h.update(("kmeans-result %d\0" % FORMAT).encode("utf-8"))
+        hash_data(h, X)
+        for name in sorted(params):
+            value = params[name]
+            h.update(name.encode("utf-8") + b"=")
+            if isinstance(value, np.ndarray):
+                hash_array(h, value)
+            else:
+                h.update(repr(value).encode("utf-8") + b"\0")
+        trace.record(trace.DATA, t1, time.time(), "cache", "hash",
+                     bytes=getattr(X, "nbytes", 0))
+        return h.hexdigest()
+
+    def path(self, key):
+        return os.path.join(self.cache_dir, key)
+
+    def get(self, key):
+        # returns (arrays, stats) stored under key, the arrays read-only memmaps,
+        # or None on a miss
+        t1 = time.time()
+        dirname = self.path(key)
+        try:
+            with open(os.path.join(dirname, "stats.json")) as f:
+                stats = json.load(f)
+            arrays = dict((name, np.load(os.path.join(dirname, name + ".npy"), mmap_mode="r"))
+                          for name in stats["arrays"])
+            os.utime(dirname)
+        except (OSError, ValueError, KeyError):
+            # absent, or deleted by a concurrent evict() while being read
+            self.misses += 1
+            trace.record(trace.DATA, t1, time.time(), "cache", "result_cache", hits=0, misses=1)
+            return None
+        self.hits += 1
+        trace.record(trace.DATA, t1, time.time(), "cache", "result_cache", hits=1, misses=0)
+        return arrays, stats["stats"]
+
+    def put(self, key, arrays, stats=None):
+        # store a dict of arrays and a json-able dict of stats under key
+        if not os.path.isdir(self.cache_dir):
+            os.makedirs(self.cache_dir, exist_ok=True)
+        tmpname = tempfile.mkdtemp(dir=self.cache_dir, suffix=".tmp")
+        try:
+            for name, a in arrays.items():
+                np.save(os.path.join(tmpname, name + ".npy"), np.asarray(a))
+            with open(os.path.join(tmpname, "stats.json"), "w") as f:
+                json.dump({"arrays": sorted(arrays), "stats": stats or {}}, f, sort_keys=True)
+            os.rename(tmpname, self.path(key))
+        except OSError:
+            # an entry for key was put concurrently; it holds the same result
+            shutil.rmtree(tmpname, ignore_errors=True)
+        self.evict()
+
+    def entries(self):
+        # returns [(last use, bytes, key)] of the entries, least recently used first
+        result = []
+        if not os.path.isdir(self.cache_dir):
+            return result
+        for key in os.listdir(self.cache_dir):
+            dirname = self.path(key)
+            if key.endswith(".tmp") or not os.path.isdir(dirname):
+                continue
+            try:
+                size = sum(os.path.getsize(os.path.join(dirname, name))
+                           for name in os.listdir(dirname))
+                result.append((os.path.getmtime(dirname), size, key))
+            except OSError:
+                pass
+        result.sort()
+        return result
+
+    def evict(self, max_bytes=None):
+        # delete the least recently used entries until at most max_bytes remain
+        if max_bytes is None:
+            max_bytes = self.max_bytes
+        entries = self.entries()
+        total = sum(size for (used, size, key) in entries)
+        for (used, size, key) in entries:
+            if total <= max_bytes:
+                break
+            shutil.rmtree(self.path(key), ignore_errors=True)
+            total -= size
+
+    def clear(self):
+        # delete every entry
+        self.evict(0)
+
+
+def default_cache():
+    global _default_cache
+    if _default_cache is None:
+        _default_cache = ResultCache()
+    return _default_cache
@@ -0,0 +1,108 @@
+import multiprocessing
+import os
+import time
+from multiprocessing import shared_memory
+
+import numpy as np
+
+from . import trace
+from .dist_kmeans import serve_shard, coordinate
+
+#------------------------------------------------------------------------------------
+#               data-parallel kmeans in worker processes on one node
+#------------------------------------------------------------------------------------
+#
+# X is copied once into a shared memory block that every worker maps, and the
+# points are split into one contiguous shard per worker.  A worker keeps a
+# libmpikmeans.Shard for its rows for the whole run, so its lower bounds,
+# upper bounds and per cluster sums stay in the worker between iterations.
+# Each iteration the parent sends the centers to all workers, each worker
+# reassigns its shard in the C core and sends back its sums and counts, and
+# the parent adds them up into the next centers.  Only O(nClusters*nDim) goes
+# through the pipes per iteration.  The protocol is that of dist_kmeans, with
+# pipes in place of sockets.
+#
+# The C core has no global state besides the debug counters of a
+# KMEANS_VERBOSE>1 build, and ctypes releases the GIL around it, so threads
+# could run the shards as well (async_kmeans does).  Processes keep the
+# workers those of dist_kmeans, serve_shard over a connection, and confine a
+# crash in the C core to its worker.  The labels are a second shared block
+# that the C core writes directly.
+
+def shard_bounds(nPts, nShards):
+    # returns the first row of each shard and nPts
+    return [nPts * s // nShards for s in range(nShards + 1)]
+
+
+def worker(conn, x_name, labels_name, shape, start, stop):
+    # serve assignment requests for rows start:stop of the shared data until
+    # None is received
+    x_shm = shared_memory.SharedMemory(name = x_name)
+    labels_shm = shared_memory.SharedMemory(name = labels_name)
+    try:
+        X = np.ndarray(shape, np.float64, buffer = x_shm.buf)
+        labels = np.ndarray((shape[0],), np.uint32, buffer = labels_shm.buf)
+        serve_shard(conn, X[start:stop], labels[start:stop])
+        del X, labels
+    finally:
+        x_shm.close()
+        labels_shm.close()
+        conn.close()
+
+
+def kmeans_shm(X, clusters, iterations, processes = None):
+    # kmeans_shm(X, clusters, iterations [, processes]) returns (clusters, labels, sse)
+
+    # X is (nPts, nDim) and clusters is (nClusters, nDim); processes defaults to the
+    # number of cpus.  Stops early when no point changes cluster.  labels are 0-based
+    # assignments to the returned clusters and sse is their sum of squared errors.
+    (nPts, nDim) = X.shape
+    if processes is None:
+        processes = os.cpu_count() or 1
+    processes = max(1, min(processes, nPts))
+
+    t1 = time.time()
+    x_shm = shared_memory.SharedMemory(create = True, size = max(1, nPts * nDim * 8))
+    labels_shm = shared_memory.SharedMemory(create = True, size = max(1, nPts * 4))
+    pipes = []
+    workers = []
+    try:
+        shared_X = np.ndarray((nPts, nDim), np.float64, buffer = x_shm.buf)
+        shared_X[:] = X
+        del shared_X
+
+        bounds = shard_bounds(nPts, processes)
+        for s in range(processes):
+            parent_conn, child_conn = multiprocessing.Pipe()
+            p = multiprocessing.Process(target = worker, name = "kmeans-shm-%d" % s,
+                                        args = (child_conn, x_shm.name, labels_shm.name,
+                                                (nPts, nDim), bounds[s], bounds[s + 1]))
+            p.daemon = True
+            p.start()
+            child_conn.close()
+            pipes.append(parent_conn)
+            workers.append(p)
+        t2 = time.time()
+        trace.record(trace.DATA, t1, t2, "shm", bytes = nPts * nDim * 8, workers = processes)
+
+        clusters, sse = coordinate(pipes, clusters, iterations, "shm")
+
+        labels = np.ndarray((nPts,), np.uint32, buffer = labels_shm.buf).astype(np.int32)
+    finally:
+        for conn in pipes:
+            try:
+                conn.send(None)
+            except (OSError, EOFError):
+                pass
+        for p in workers:
+            p.join()
+        for conn in pipes:
+            conn.close()
+        x_shm.close()
+        x_shm.unlink()
+        labels_shm.close()
+        labels_shm.unlink()
+
+    if iterations == 0:
+        return clusters, None, None
+    return clusters, labels, sse
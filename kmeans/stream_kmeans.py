@@ -0,0 +1,150 @@
+import time
+
+import numpy as np
+
+from . import libmpikmeans, trace
+from .coreset import kmeanspp
+from .minibatch_kmeans import REASSIGN_RATIO, REASSIGN_EVERY, move_centers, reassign
+from .ooc_kmeans import CHUNK_SIZE, accumulate, assign_chunk
+
+#------------------------------------------------------------------------------------
+#               online kmeans over an unbounded stream of batches
+#------------------------------------------------------------------------------------
+#
+# A live model that is updated with each batch of an event stream and never
+# reruns batch kmeans.  update() assigns the batch to the current centers and
+# moves each center to the running mean of the points it was given, as the C
+# core's add_point_to_cluster does point by point: the step of a center is its
+# batch count over its count so far (minibatch_kmeans.move_centers).  Only
+# the centers and their counts are kept, O(nClusters * nDim) whatever the
+# length of the stream.
+#
+# The batch is assigned CHUNK_SIZE rows at a time.  With libmpikmeans built the
+# half-distances between the centers are computed once per batch into a model
+# buffer (libmpikmeans.model_fill) and kmeans_model_assign compares a point
+# only with the centers they cannot rule out; otherwise each chunk goes
+# through the numpy assignment of ooc_kmeans.
+#
+# With decay < 1 the counts are multiplied by decay before each batch, which
+# forgets old points with a half-life of log(0.5) / log(decay) batches: the
+# centers keep following a drifting stream instead of freezing as their counts
+# grow, and a center that stops receiving points sees its count fall.  Every
+# reassign_every batches the centers whose count is below reassign_ratio of
+# the largest are dead and are moved onto points of the batch far from their
+# centers (minibatch_kmeans.reassign).
+#
+# Without starting centers the first SEED_ROWS * nClusters rows are buffered
+# and the centers seeded from them with kmeans++; rows seen before that get
+# label -1.
+#
+#     model = StreamingKMeans(16, decay = 0.99)
+#     for batch in events:
+#         labels = model.update(batch)
+
+DECAY = 1.                  # factor applied to the counts before each batch
+SEED_ROWS = 10              # rows buffered per center for seeding
+
+
+class StreamingKMeans(object):
+
+    def __init__(self, nClusters, clusters = None, decay = DECAY,
+                 reassign_ratio = REASSIGN_RATIO, reassign_every = REASSIGN_EVERY,
+                 random_state = None):
+        # clusters is an optional (nClusters, nDim) start, otherwise seeded from the stream
+        if not 0. < decay <= 1.:
+            raise ValueError("decay must be in (0, 1]")
+        self.nClusters = nClusters
+        self.decay = decay
+        self.reassign_ratio = reassign_ratio
+        self.reassign_every = reassign_every
+        self.rng = np.random.RandomState(random_state)
+        self.clusters = None
+        self.counts = np.zeros(nClusters)
+        self.batches = 0            # batches used to update the centers
+        self.seen = 0               # rows seen
+        self.inertia = None         # mean squared distance to the centers, last batch
+        self.reassigned = 0         # dead centers moved so far
+        self._pending = []          # rows buffered for seeding
+        self._model = None          # model buffer of the centers, reused between batches
+        if clusters is not None:
+            self.clusters = np.array(clusters, dtype = np.float64, order = "C")
+            if self.clusters.shape[0] != nClusters:
+                raise ValueError("clusters must have nClusters rows")
+
+    def update(self, X):
+        # update(X) returns the 0-based labels of the rows of X (nPts, nDim) as int32,
+        # their nearest centers before the update
+        X = np.asarray(X, dtype = np.float64)
+        if X.ndim != 2:
+            raise ValueError("X must be 2-D")
+        self.seen += len(X)
+        labels = np.full(len(X), -1, np.int32)
+        if self.clusters is None:
+            self._pending.append(X)
+            if sum(len(p) for p in self._pending) < SEED_ROWS * self.nClusters:
+                return labels
+            # seed, then update with every buffered row, those of X last
+            X = np.concatenate(self._pending)
+            self._pending = []
+            t1 = time.time()
+            self.clusters = np.array(kmeanspp(X, self.nClusters, self.rng), order = "C")
+            trace.record(trace.SEED, t1, time.time(), "stream", "seed",
+                         centers = self.nClusters)
+        elif X.shape[1] != self.clusters.shape[1]:
+            raise ValueError("X has %d columns, the centers %d" % (X.shape[1],
+                                                                  self.clusters.shape[1]))
+        if len(X) == 0:
+            return labels
+
+        t1 = time.time()
+        self.counts *= self.decay
+        assign, dist = self._assign(X, CHUNK_SIZE)
+        sums = np.zeros(self.clusters.shape)
+        batch_counts = np.zeros(self.nClusters, np.int64)
+        accumulate(X, assign, sums, batch_counts)
+        move_centers(self.clusters, self.counts, sums, batch_counts)
+        self.batches += 1
+        self.inertia = dist.mean()
+        t2 = time.time()
+        trace.record(trace.UPDATE, t1, t2, "stream", "step", points = len(X))
+
+        if self.reassign_ratio > 0 and self.batches % self.reassign_every == 0:
+            moved = reassign(X, dist, self.clusters, self.counts, self.reassign_ratio, self.rng)
+            self.reassigned += moved
+            trace.record(trace.UPDATE, t2, time.time(), "stream", "reassign",
+                         reassigned = moved)
+        # after seeding X also holds the buffered rows, ahead of those of this call
+        labels[:] = assign[len(X) - len(labels):]
+        return labels
+
+    def partial_fit(self, X):
+        # partial_fit(X) returns self after update(X)
+        self.update(X)
+        return self
+
+    def predict(self, X, chunk_size = CHUNK_SIZE):
+        # returns the 0-based nearest center of each row of X as int32, without updating
+        if self.clusters is None:
+            raise ValueError("fewer rows than clusters seen so far")
+        return self._assign(np.asarray(X), chunk_size)[0].view(np.int32)
+
+    def _assign(self, X, chunk_size):
+        # returns (assign, dist), the nearest center of each row of X as uint32 and the
+        # squared distance to it, a chunk at a time, see above
+        pruned = libmpikmeans.library_path() is not None
+        if pruned:
+            self._model = libmpikmeans.model_fill(self.clusters, self._model)
+        else:
+            cnorm = (self.clusters * self.clusters).sum(1)
+        assign = np.empty(X.shape[0], np.uint32)
+        dist = np.empty(X.shape[0])
+        for start in range(0, X.shape[0], chunk_size):
+            chunk = np.asarray(X[start:start + chunk_size], dtype = np.float64)
+            stop = start + len(chunk)
+            if pruned:
+                libmpikmeans.model_assign(self._model, chunk, assign[start:stop])
+            else:
+                assign[start:stop] = assign_chunk(chunk, self.clusters, cnorm)
+            diff = chunk - self.clusters[assign[start:stop]]
+            dist[start:stop] = (diff * diff).sum(1)
+        return assign, dist
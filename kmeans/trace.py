@@ -0,0 +1,191 @@
+"""
+Per-phase timing and tracing shared by all kmeans backends.
+
+Every backend reports its work as spans tagged with a phase (see PHASES)
+and optional counters.  Tracing is off by default; while disabled,
+record() and span() return immediately so the instrumented code pays
+only a function call and a flag test.  The C core, called through
+py_kmeans or libmpikmeans, reports one span per call, a whole run (RUN)
+or an assignment, under the "mpi" and "csr" backends.
+
+    from kmeans import trace
+    trace.enable()
+    kmeans.kmeans(X, 10, backend="mpi")       # or any other backend
+    print(trace.summary())
+    trace.write_chrome_trace("kmeans.json")   # open in chrome://tracing
+"""
+
+import json
+import os
+import threading
+import time
+
+# phases of a kmeans run, in the order they normally happen
+DATA = "data"           # moving data to / from the device, layout conversion
+COMPILE = "compile"     # building kernels / source modules
+SEED = "seed"           # choosing initial centers and the first assignment
+ASSIGN = "assign"       # assigning points to the nearest center
+UPDATE = "update"       # recomputing the centers
+BOUNDS = "bounds"       # maintaining triangle-inequality bounds
+RUN = "run"             # an engine that cannot be split into phases (the C core)
+
+PHASES = (DATA, COMPILE, SEED, ASSIGN, UPDATE, BOUNDS, RUN)
+
+_enabled = False
+_lock = threading.Lock()
+_events = []
+_origin = time.time()
+
+
+#------------------------------------------------------------------------------------
+#                               control
+#------------------------------------------------------------------------------------
+
+def enable():
+    global _enabled
+    _enabled = True
+
+def disable():
+    global _enabled
+    _enabled = False
+
+def is_enabled():
+    return _enabled
+
+def reset():
+    # discard all recorded spans and restart the trace clock
+    global _origin
+    with _lock:
+        del _events[:]
+        _origin = time.time()
+
+def events():
+    # returns a copy of the recorded spans as a list of dicts
+    with _lock:
+        return [dict(e) for e in _events]
+
+
+#------------------------------------------------------------------------------------
+#                               recording
+#------------------------------------------------------------------------------------
+
+def record(phase, t1, t2, backend="", name=None, **counters):
+    # record a span that has already been timed with time.time()
+    # record(phase, t1, t2 [, backend [, name]], counter=value, ...)
+    if not _enabled:
+        return
+    event = {"phase": phase,
+             "name": name or phase,
+             "backend": backend,
+             "start": t1,
+             "duration": t2 - t1,
+             "tid": threading.current_thread().ident,
+             "counters": counters}
+    with _lock:
+        _events.append(event)
+
+
+class _Span(object):
+    __slots__ = ("phase", "backend", "name", "counters", "t1")
+
+    def __init__(self, phase, backend, name, counters):
+        self.phase = phase
+        self.backend = backend
+        self.name = name
+        self.counters = counters
+        self.t1 = 0.
+
+    def count(self, **counters):
+        # add to the counters of this span
+        for key, value in counters.items():
+            self.counters[key] = self.counters.get(key, 0) + value
+
+    def __enter__(self):
+        self.t1 = time.time()
+        return self
+
+    def __exit__(self, *exc):
+        record(self.phase, self.t1, time.time(), self.backend, self.name, **self.counters)
+        return False
+
+
+class _NullSpan(object):
+    __slots__ = ()
+
+    def count(self, **counters):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+_NULL_SPAN = _NullSpan()
+
+
+def span(phase, backend="", name=None, **counters):
+    # context manager timing the enclosed block
+    #   with trace.span(trace.ASSIGN, "cpu", points=nPts) as s:
+    #       ...
+    #       s.count(changed=nChanged)
+    if not _enabled:
+        return _NULL_SPAN
+    return _Span(phase, backend, name, counters)
+
+
+#------------------------------------------------------------------------------------
+#                               reporting
+#------------------------------------------------------------------------------------
+
+def chrome_trace():
+    # returns the recorded spans in the Chrome trace event format
+    pid = os.getpid()
+    trace_events = []
+    for e in events():
+        ts = (e["start"] - _origin) * 1.e6
+        trace_events.append({"name": e["name"],
+                             "cat": e["backend"] + ":" + e["phase"] if e["backend"] else e["phase"],
+                             "ph": "X",
+                             "ts": ts,
+                             "dur": e["duration"] * 1.e6,
+                             "pid": pid,
+                             "tid": e["tid"],
+                             "args": e["counters"]})
+        if e["counters"]:
+            trace_events.append({"name": e["name"],
+                                 "ph": "C",
+                                 "ts": ts,
+                                 "pid": pid,
+                                 "args": e["counters"]})
+    return {"traceEvents": trace_events, "displayTimeUnit": "ms"}
+
+def write_chrome_trace(filename):
+    with open(filename, "w") as f:
+        json.dump(chrome_trace(), f)
+
+def totals():
+    # returns {(backend, phase): {"calls": n, "time": seconds, counter: sum, ...}}
+    result = {}
+    for e in events():
+        entry = result.setdefault((e["backend"], e["phase"]), {"calls": 0, "time": 0.})
+        entry["calls"] += 1
+        entry["time"] += e["duration"]
+        for key, value in e["counters"].items():
+            entry[key] = entry.get(key, 0) + value
+    return result
+
+def summary():
+    # returns a table of total and average time per backend and phase
+    lines = ["{0:10} {1:8} {2:>7} {3:>12} {4:>12}  {5}".format(
+                "backend", "phase", "calls", "total (ms)", "mean (ms)", "counters")]
+    rank = dict((p, i) for i, p in enumerate(PHASES))
+    tot = totals()
+    for key in sorted(tot, key=lambda k: (k[0], rank.get(k[1], len(PHASES)), k[1])):
+        entry = tot[key]
+        counters = ", ".join("{0}={1}".format(c, entry[c])
+                             for c in sorted(entry) if c not in ("calls", "time"))
+        lines.append("{0:10} {1:8} {2:7d} {3:12.3f} {4:12.3f}  {5}".format(
+                key[0], key[1], entry["calls"], entry["time"] * 1000.,
+                entry["time"] * 1000. / entry["calls"], counters))
+    return "\n".join(lines)
@@ -0,0 +1,148 @@
+import time
+
+import numpy as np
+
+from . import trace
+from .ooc_kmeans import CHUNK_SIZE
+
+#------------------------------------------------------------------------------------
+#               hierarchical kmeans: vocabulary trees for very large k
+#------------------------------------------------------------------------------------
+#
+# The points are clustered into branching centers, then the points of each of
+# those into branching centers of their own, and so on for depth levels, which
+# gives up to branching**depth leaves, the words.  Building costs
+# O(nPts * branching * depth) distances per iteration instead of O(nPts * k),
+# and a point is quantized by walking down the tree, comparing it with the
+# branching children of one node per level, O(branching * log_branching k).
+#
+# All the nodes of one level are independent problems, run together by the C
+# core's batched entry point (libmpikmeans.kmeans_batch) on its thread pool.
+# A node is only split if it has more than branching points, so the tree can
+# be ragged and have fewer than branching**depth words.
+#
+# The tree is kept in breadth first order as three arrays: the center of each
+# node, the index of its first child (its children are consecutive, -1 for a
+# leaf) and its word (-1 for an inner node).  to_array() packs them into one
+# flat int32 array, with the centers as float32 bits, that from_array() wraps
+# again without a copy, so a saved tree can be used straight from np.load(...,
+# mmap_mode="r").
+
+MAGIC = 0x6b767431      # "kvt1"
+HEADER = 5              # magic, branching, depth, nDim, nNodes
+
+
+class VocabTree(object):
+    # a vocabulary tree; node 0 is the root, which has no center of its own
+
+    def __init__(self, centers, child, word, branching, depth):
+        self.centers = centers      # (nNodes, nDim) float32
+        self.child = child          # (nNodes,) int32
+        self.word = word            # (nNodes,) int32
+        self.branching = branching
+        self.depth = depth
+        self.nWords = int((word >= 0).sum())
+
+    def predict(self, X, chunk_size = CHUNK_SIZE):
+        # returns the word of each row of X (nPts, nDim) as int32
+        X = np.asarray(X)
+        words = np.empty(X.shape[0], np.int32)
+        b = np.arange(self.branching)
+        for start in range(0, X.shape[0], chunk_size):
+            chunk = np.asarray(X[start:start + chunk_size], dtype = np.float32)
+            node = np.zeros(len(chunk), np.int32)
+            for level in range(self.depth):
+                first = self.child[node]
+                inner = np.flatnonzero(first >= 0)
+                if len(inner) == 0:
+                    break
+                # the children of the node of each point, (points, branching, nDim)
+                children = first[inner, np.newaxis] + b
+                diff = self.centers[children] - chunk[inner, np.newaxis, :]
+                node[inner] = children[np.arange(len(inner)), (diff * diff).sum(2).argmin(1)]
+            words[start:start + len(chunk)] = self.word[node]
+        return words
+
+    def to_array(self):
+        # the tree as one flat int32 array, see from_array()
+        header = np.array([MAGIC, self.branching, self.depth, self.centers.shape[1],
+                           len(self.child)], np.int32)
+        centers = np.ascontiguousarray(self.centers, dtype = np.float32)
+        return np.concatenate([header, self.child, self.word, centers.view(np.int32).ravel()])
+
+def from_array(a):
+    # from_array(a) returns a VocabTree viewing the flat array a from to_array()
+    a = np.asarray(a)
+    if a.dtype != np.int32 or a.ndim != 1 or len(a) < HEADER or a[0] != MAGIC:
+        raise ValueError("not a vocabulary tree array")
+    (branching, depth, nDim, nNodes) = (int(v) for v in a[1:HEADER])
+    if len(a) != HEADER + nNodes * (2 + nDim):
+        raise ValueError("vocabulary tree array has the wrong length")
+    child = a[HEADER:HEADER + nNodes]
+    word = a[HEADER + nNodes:HEADER + 2 * nNodes]
+    centers = a[HEADER + 2 * nNodes:].view(np.float32).reshape(nNodes, nDim)
+    return VocabTree(centers, child, word, branching, depth)
+
+
+def split_nodes(X, rows, offsets, branching, maxiter, threads):
+    # cluster the points rows[offsets[p]:offsets[p + 1]] of each node p into branching
+    # children; returns (centers (nodes, branching, nDim), labels of rows)
+    from .libmpikmeans import kmeans_batch
+    points = np.ascontiguousarray(X[rows], dtype = np.float64)
+    centers, sse, labels = kmeans_batch(points, branching, offsets - offsets[0], maxiter,
+                                        threads = threads)
+    return centers, labels
+
+def vocab_tree(X, branching, depth, maxiter = 0, threads = 0, chunk_size = CHUNK_SIZE * 16):
+    # vocab_tree(X, branching, depth [, maxiter [, threads]]) returns VocabTree
+
+    # X is (nPts, nDim), an array or np.memmap.  maxiter bounds the iterations of each
+    # node (0 until no point moves) and threads is passed to the C core (0 for one per
+    # cpu).  The nodes of a level are clustered in batches of about chunk_size points,
+    # which bounds the float64 copy of the points being clustered.
+    (nPts, nDim) = X.shape
+    if branching < 2:
+        raise ValueError("branching must be at least 2")
+    centers = [np.zeros((1, nDim), np.float32)]
+    child = np.full(1, -1, np.int32)
+    nNodes = 1
+    level_start = 0                         # first node of the deepest level
+    node = np.zeros(nPts, np.int64)         # the leaf of each point so far
+
+    for level in range(depth):
+        t1 = time.time()
+        current = np.flatnonzero(node >= level_start)
+        counts = np.bincount(node[current] - level_start, minlength = nNodes - level_start)
+        split = np.flatnonzero(counts > branching)
+        if len(split) == 0:
+            break
+        first_child = nNodes + branching * np.arange(len(split), dtype = np.int64)
+        child[level_start + split] = first_child
+
+        # the points of the nodes to split, grouped by node
+        inside = current[counts[node[current] - level_start] > branching]
+        order = inside[np.argsort(node[inside], kind = "stable")]
+        sizes = counts[split]
+        offsets = np.concatenate([[0], np.cumsum(sizes)])
+        p = 0
+        while p < len(split):
+            # a batch of whole nodes of at most chunk_size points, or a single node
+            q = p + max(1, int(np.searchsorted(offsets[p + 1:] - offsets[p], chunk_size,
+                                               side = "right")))
+            rows = order[offsets[p]:offsets[q]]
+            batch_centers, labels = split_nodes(X, rows, offsets[p:q + 1], branching, maxiter,
+                                                threads)
+            centers.append(batch_centers.reshape(-1, nDim).astype(np.float32))
+            node[rows] = np.repeat(first_child[p:q], sizes[p:q]) + labels
+            p = q
+
+        level_start = nNodes
+        nNodes += branching * len(split)
+        child = np.concatenate([child, np.full(branching * len(split), -1, np.int32)])
+        trace.record(trace.RUN, t1, time.time(), "vocab_tree", "level", nodes = len(split),
+                     points = len(order))
+
+    word = np.full(nNodes, -1, np.int32)
+    leaves = np.flatnonzero(child < 0)
+    word[leaves] = np.arange(len(leaves), dtype = np.int32)
+    return VocabTree(np.concatenate(centers), child, word, branching, depth)
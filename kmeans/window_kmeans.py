@@ -0,0 +1,242 @@
+import time
+
+import numpy as np
+
+from . import trace
+from .ooc_kmeans import accumulate
+
+#------------------------------------------------------------------------------------
+#               sliding-window kmeans: clusters of the most recent points
+#------------------------------------------------------------------------------------
+#
+# The window is a ring buffer of the last capacity points with their labels,
+# and optionally their times, so expire(before) can also drop everything older
+# than a moment.  Each cluster keeps the sum and count of its points in the
+# window, as the C core's add_point_to_cluster / remove_point_from_cluster do:
+# a point leaving the window is taken out of its cluster in O(nDim) and an
+# arriving point is added to the cluster of its nearest center.
+#
+# Every point keeps Hamerly's two bounds, O(1) per point where the C core
+# keeps one per center: an upper bound on the distance to its own center and
+# a lower bound on the distance to every other center.  refine() runs local
+# Lloyd iterations: the centers are moved to the means of their points, but
+# only clusters whose membership changed since the last iteration can move.
+# The lower bounds all shrink by the largest move, which is kept as one offset
+# (shift) instead of being subtracted from every point, and each cluster keeps
+# the largest upper bound and the smallest lower bound of its points.  Only the
+# points of clusters that moved, or whose summary bounds no longer separate
+# them from the other centers, are looked at: their upper bound grows by how
+# far their center moved, and those whose upper bound passes their lower bound
+# and the half distance from their center to the nearest other one (s in the
+# C core) are compared with all centers again.  A stable window costs nearly
+# nothing to refine.  refine() stops when no cluster changed, or without moving
+# the centers when none would move more than tol; run to convergence, the
+# centers are a fixed point of Lloyd's iteration on the window, which is what
+# kmeans on the window would return when started from them.
+#
+# The sums are updated by adding and subtracting, so they are rebuilt from the
+# window every capacity arrivals to keep rounding from adding up.
+#
+#     window = WindowKMeans(100000, clusters)
+#     for batch, times in stream:
+#         window.add(batch, times)
+#         window.expire(times[-1] - 600.)      # the last ten minutes only
+#     window.centers
+
+REFINE_EVERY = 1            # batches between refinements, 0 to only refine() when called
+MAX_ITER = 1                # iterations of each refinement between batches
+TOL = 0.                    # refine() stops when no center moves more than this
+
+
+class WindowKMeans(object):
+
+    def __init__(self, capacity, clusters, refine_every = REFINE_EVERY, max_iter = MAX_ITER,
+                 tol = TOL):
+        # capacity is the number of points kept, clusters the (nClusters, nDim) start
+        self.centers = np.array(clusters, dtype = np.float64, order = "C")
+        (nClusters, nDim) = self.centers.shape
+        self.capacity = capacity
+        self.refine_every = refine_every
+        self.max_iter = max_iter
+        self.tol = tol
+        self.X = np.zeros((capacity, nDim))
+        self.labels = np.full(capacity, -1, np.int32)
+        self.times = np.zeros(capacity)
+        self.upper = np.zeros(capacity)
+        self.lower = np.zeros(capacity)        # lower bound + shift
+        self.shift = 0.             # sum of the largest center moves
+        self.upper_max = np.zeros(nClusters)   # largest upper bound of each cluster
+        self.lower_min = np.full(nClusters, np.inf)    # smallest lower (+ shift) of each
+        self.sums = np.zeros((nClusters, nDim))
+        self.counts = np.zeros(nClusters, np.int64)
+        self.changed = np.zeros(nClusters, bool)   # membership changed since the last move
+        self.head = 0               # slot of the oldest point
+        self.size = 0               # points in the window
+        self.batches = 0
+        self.arrived = 0            # points added since the sums were rebuilt
+
+    def slots(self, start = 0, n = None):
+        # slots of the points start to start + n of the window, oldest first
+        if n is None:
+            n = self.size - start
+        return (self.head + start + np.arange(n)) % self.capacity
+
+    def window(self):
+        # returns (points, labels) of the window, oldest first, as copies
+        slots = self.slots()
+        return self.X[slots], self.labels[slots]
+
+    def _account(self, slots, labels, sign):
+        # add (sign 1) or remove (sign -1) the points of slots to or from clusters labels
+        nClusters = len(self.counts)
+        sums = np.zeros(self.sums.shape)
+        counts = np.zeros(nClusters, np.int64)
+        accumulate(self.X[slots], labels, sums, counts)
+        self.sums += sign * sums
+        self.counts += sign * counts
+        self.changed[counts > 0] = True
+
+    def _nearest(self, points):
+        # returns (labels, distance to the nearest, distance to the second nearest center)
+        cnorm = (self.centers * self.centers).sum(1)
+        dist = cnorm - 2. * np.dot(points, self.centers.T)
+        dist += (points * points).sum(1)[:, np.newaxis]
+        np.maximum(dist, 0., out = dist)
+        labels = np.argmin(dist, 1)
+        rows = np.arange(len(points))
+        first = np.sqrt(dist[rows, labels])
+        if dist.shape[1] == 1:
+            return labels, first, np.full(len(points), np.inf)
+        dist[rows, labels] = np.inf
+        return labels, first, np.sqrt(dist.min(1))
+
+    def _drop(self, n):
+        # remove the n oldest points from their clusters and the window
+        if n <= 0:
+            return
+        slots = self.slots(0, n)
+        self._account(slots, self.labels[slots], -1)
+        self.labels[slots] = -1
+        self.head = (self.head + n) % self.capacity
+        self.size -= n
+
+    def expire(self, before):
+        # drop the points added with a time before this; times must not decrease
+        n = int(np.searchsorted(self.times[self.slots()], before))
+        t1 = time.time()
+        self._drop(n)
+        trace.record(trace.UPDATE, t1, time.time(), "window", "expire", points = n)
+        return n
+
+    def add(self, X, times = None):
+        # add(X [, times]) returns the 0-based labels of the rows of X as int32
+
+        # The oldest points make room for X if the window is full.  X is assigned
+        # to the current centers; every refine_every batches refine() follows.
+        # With more rows than capacity only the last capacity enter the window;
+        # the others are labelled too, but leave no trace in the clusters.
+        X = np.asarray(X, dtype = np.float64)
+        if X.ndim != 2 or X.shape[1] != self.centers.shape[1]:
+            raise ValueError("X must have %d columns" % self.centers.shape[1])
+        if times is not None:
+            times = np.asarray(times, dtype = np.float64)
+        if len(X) > self.capacity:
+            skipped = self._nearest(X[:-self.capacity])[0]
+            X = X[-self.capacity:]
+            times = None if times is None else times[-self.capacity:]
+            labels = self.add(X, times)
+            return np.concatenate([skipped.astype(np.int32), labels])
+        if times is None:
+            # the time of the newest point, so expire() keeps working
+            times = self.times[(self.head + self.size - 1) % self.capacity] if self.size else 0.
+        n = len(X)
+        t1 = time.time()
+        self._drop(self.size + n - self.capacity)
+        slots = self.slots(self.size, n)
+        self.X[slots] = X
+        self.times[slots] = times
+        labels, upper, lower = self._nearest(X)
+        self.labels[slots] = labels
+        self.upper[slots] = upper
+        self.lower[slots] = lower + self.shift
+        np.maximum.at(self.upper_max, labels, upper)
+        np.minimum.at(self.lower_min, labels, lower + self.shift)
+        self.size += n
+        self._account(slots, labels, 1)
+        self.batches += 1
+        self.arrived += n
+        if self.arrived >= self.capacity:
+            self.rebuild()
+        trace.record(trace.ASSIGN, t1, time.time(), "window", "add", points = n)
+        if self.refine_every and self.batches % self.refine_every == 0:
+            self.refine(self.max_iter)
+        return labels.astype(np.int32)
+
+    def rebuild(self):
+        # recompute the sums and counts of the clusters from the window
+        slots = self.slots()
+        self.sums[:] = 0.
+        self.counts[:] = 0
+        accumulate(self.X[slots], self.labels[slots], self.sums, self.counts)
+        self.arrived = 0
+        # take the shift out of the lower bounds before it outgrows them
+        self.lower[slots] -= self.shift
+        self.lower_min -= self.shift
+        self.shift = 0.
+
+    def refine(self, max_iter = None):
+        # refine([max_iter]) returns the number of iterations run, see above
+        if max_iter is None:
+            max_iter = self.max_iter
+        for iteration in range(max_iter):
+            if not self.changed.any():
+                return iteration
+            t1 = time.time()
+            occupied = self.counts > 0
+            centers = self.centers.copy()
+            centers[occupied] = self.sums[occupied] / self.counts[occupied, np.newaxis]
+            drift = np.sqrt(((centers - self.centers) ** 2).sum(1))
+            self.changed[:] = False
+            # checked before moving, so the bounds stay those of self.centers
+            if drift.max() <= self.tol:
+                return iteration + 1
+            self.centers = centers
+            self.shift += drift.max()
+
+            # s: half the distance from each center to the nearest other one
+            cnorm = (centers * centers).sum(1)
+            cc = cnorm[:, np.newaxis] - 2. * np.dot(centers, centers.T) + cnorm
+            np.fill_diagonal(cc, np.inf)
+            s = 0.5 * np.sqrt(np.maximum(cc.min(1), 0.))
+            # the clusters whose points may have another nearest center now
+            stale = (drift > 0.) | (self.upper_max > np.maximum(self.lower_min - self.shift, s))
+            slots = self.slots()
+            slots = slots[stale[self.labels[slots]]]
+            labels = self.labels[slots]
+            self.upper[slots] += drift[labels]
+            bound = np.maximum(self.lower[slots] - self.shift, s[labels])
+            check = self.upper[slots] > bound
+            candidates, labels, bound = slots[check], labels[check], bound[check]
+            # tighten the upper bound before comparing with all centers
+            diff = self.X[candidates] - centers[labels]
+            self.upper[candidates] = np.sqrt((diff * diff).sum(1))
+            check = self.upper[candidates] > bound
+            candidates, labels = candidates[check], labels[check]
+            new, self.upper[candidates], lower = self._nearest(self.X[candidates])
+            self.lower[candidates] = lower + self.shift
+            moved = new != labels
+            self._account(candidates[moved], labels[moved], -1)
+            self._account(candidates[moved], new[moved], 1)
+            self.labels[candidates] = new
+
+            # the summaries of the stale clusters from their points, now all in slots;
+            # points that moved into other clusters widen theirs
+            self.upper_max[stale] = 0.
+            self.lower_min[stale] = np.inf
+            labels = self.labels[slots]
+            np.maximum.at(self.upper_max, labels, self.upper[slots])
+            np.minimum.at(self.lower_min, labels, self.lower[slots])
+            trace.record(trace.UPDATE, t1, time.time(), "window", "refine",
+                         points = len(slots), candidates = len(candidates),
+                         moved = int(moved.sum()))
+        return max_iter
@@ -96,6 +96,7 @@ int main(int argc, char* argv[]) {
 
 	std::string data_filename;
 	std::string cluster_filename;
+	std::string model_filename;
 	std::string assignment_filename;
 
 	// Set Program options
@@ -113,6 +114,8 @@ int main(int argc, char* argv[]) {
 		("cluster",po::value<std::string>
 		 (&cluster_filename)->default_value("clustercenter.txt"),
 		 "Output file, one cluster center per line")
+		("model",po::value<std::string>(&model_filename),
+		 "Binary model file of mpi_kmeans --model, used instead of --cluster")
 		("assignment",po::value<std::string>
 		 (&assignment_filename)->default_value("assignment.txt"),
 		 "Output file, one cluster center per line")
@@ -142,26 +145,45 @@ int main(int argc, char* argv[]) {
 	assert(nof_points>0);
 
 
-	// read in the clusters
-	std::cout << "Clustercenter file: " << cluster_filename << std::endl;
-	std::vector<std::vector<double> > data_CX;	
-	int nof_clusters = read_problem_data(cluster_filename,data_CX);
-	assert(nof_clusters>0);
-
 	unsigned int dims = data_X[0].size();
 	assert(dims>0);
-	if (data_X[0].size() != data_CX[0].size()) {
-		std::cerr << "Dimension mismatch between points and clusters" << std::endl;
-		exit(EXIT_FAILURE);
-	}
 
-	// convert clusters to double*
-	double *CX = (double *)malloc(nof_clusters * dims * sizeof(double));
-	unsigned int cntr = 0;
-	for (unsigned int m=0; m < data_CX.size() ; ++m) {
-		for (unsigned int n=0; n < data_CX[m].size() ; ++n) {
-			CX[cntr] = data_CX[m][n];
-			cntr += 1;
+	// read in the clusters, or map the model with its precomputed distances
+	kmeans_model *model = NULL;
+	double *CX = NULL;
+	int nof_clusters;
+	if (model_filename.size() > 0) {
+		std::cout << "Model file: " << model_filename << std::endl;
+		model = kmeans_model_open(model_filename.c_str());
+		if (model == NULL) {
+			std::cerr << "Failed to read model \"" << model_filename
+					  << "\"." << std::endl;
+			exit(EXIT_FAILURE);
+		}
+		nof_clusters = model->nclus;
+		if (model->dim != dims) {
+			std::cerr << "Dimension mismatch between points and clusters" << std::endl;
+			exit(EXIT_FAILURE);
+		}
+	} else {
+		std::cout << "Clustercenter file: " << cluster_filename << std::endl;
+		std::vector<std::vector<double> > data_CX;	
+		nof_clusters = read_problem_data(cluster_filename,data_CX);
+		assert(nof_clusters>0);
+
+		if (data_X[0].size() != data_CX[0].size()) {
+			std::cerr << "Dimension mismatch between points and clusters" << std::endl;
+			exit(EXIT_FAILURE);
+		}
+
+		// convert clusters to double*
+		CX = (double *)malloc(nof_clusters * dims * sizeof(double));
+		unsigned int cntr = 0;
+		for (unsigned int m=0; m < data_CX.size() ; ++m) {
+			for (unsigned int n=0; n < data_CX[m].size() ; ++n) {
+				CX[cntr] = data_CX[m][n];
+				cntr += 1;
+			}
 		}
 	}
 	
@@ -173,11 +195,17 @@ int main(int argc, char* argv[]) {
 
 	std::vector<int> labels;
 	double *x = (double *)malloc(dims * sizeof(double));
+	unsigned int c = 0;
 	for (unsigned int i=0; i < nof_points ; i++ ) {
 		for (unsigned int n=0; n<data_X[i].size() ; ++n)
 			x[n] = data_X[i][n];
-		labels.push_back(1+assign_point_to_cluster_ordinary(x,CX,dims,nof_clusters));
+		if (model)
+			kmeans_model_assign(model,x,&c,1);
+		else
+			c = assign_point_to_cluster_ordinary(x,CX,dims,nof_clusters);
+		labels.push_back(1+c);
 	}
+	kmeans_model_close(model);
 
 	std::cout << "Done!" << std::endl;
 
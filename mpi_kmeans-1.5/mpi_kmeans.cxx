@@ -4,6 +4,11 @@
 #include <memory.h>
 #include <math.h>
 #include <assert.h>
+#include <pthread.h>
+#include <unistd.h>
+#include <fcntl.h>
+#include <sys/mman.h>
+#include <sys/stat.h>
 #include "mpi_kmeans.h"
 
 #if KMEANS_VERBOSE>1
@@ -53,21 +58,35 @@ PREC compute_distance(const PREC *vec1, const PREC *vec2, const unsigned int dim
 	return d;
 }
 
-PREC compute_sserror(const PREC *CX, const PREC *X, const unsigned int *c,unsigned int dim, unsigned int npts)
+PREC compute_sqnorm(const PREC *px, const unsigned int dim)
+{
+	PREC d = 0.0;
+	for ( unsigned int k=0 ; k<dim ; k++ )
+		d += px[k]*px[k];
+	return d;
+}
+
+template <class Label>
+PREC compute_sserror(const PREC *CX, const PREC *X, const PREC *W, const Label *c,unsigned int dim, unsigned int npts)
 {
 	PREC sse = 0.0;
 	const PREC *px = X;
 	for ( unsigned int i=0 ; i<npts ; i++,px+=dim)
 	{
-		const PREC *pcx = CX+c[i]*dim;
+		const PREC *pcx = CX+(size_t)c[i]*dim;
 		PREC d = compute_distance(px,pcx,dim);
-		sse += d*d;
+		sse += (W ? W[i] : 1.0)*d*d;
 	}
 	assert(sse>=0.0);
 	return(sse);
 }
 
-void remove_point_from_cluster(unsigned int cluster_ind, PREC *CX, const PREC *px, unsigned int *nr_points, unsigned int dim)
+/*
+ * CX holds the weighted mean of each cluster, nr_points the number of points
+ * and weight the total weight of its points; w is the weight of px.  With
+ * unit weights, weight equals nr_points.
+ */
+void remove_point_from_cluster(unsigned int cluster_ind, PREC *CX, const PREC *px, PREC w, unsigned int *nr_points, PREC *weight, unsigned int dim)
 {
 	PREC *pcx = CX + cluster_ind*dim;
 
@@ -77,21 +96,24 @@ void remove_point_from_cluster(unsigned int cluster_ind, PREC *CX, const PREC *p
 		for ( unsigned int k=0 ; k<dim ; k++ )
 			pcx[k] = 0.0;
 		nr_points[cluster_ind]=0;
+		weight[cluster_ind]=0.0;
 	}
 	else
 	{
-		/* pgehler: remove PREC here */
-		PREC nr_old,nr_new; 
-		nr_old = (PREC)nr_points[cluster_ind];
+		PREC w_old,w_new;
+		w_old = weight[cluster_ind];
 		(nr_points[cluster_ind])--;
-		nr_new = (PREC)nr_points[cluster_ind];
+		weight[cluster_ind] -= w;
+		w_new = weight[cluster_ind];
 
-		for ( unsigned int k=0 ; k<dim ; k++ )
-			pcx[k] = (nr_old*pcx[k] - px[k])/nr_new;
+		/* the mean of points of weight zero stays where it was */
+		if (w_new > 0.0)
+			for ( unsigned int k=0 ; k<dim ; k++ )
+				pcx[k] = (w_old*pcx[k] - w*px[k])/w_new;
 	}
 }
 
-void add_point_to_cluster(unsigned int cluster_ind, PREC *CX, const PREC *px, unsigned int *nr_points, unsigned int dim)
+void add_point_to_cluster(unsigned int cluster_ind, PREC *CX, const PREC *px, PREC w, unsigned int *nr_points, PREC *weight, unsigned int dim)
 {
 
 	PREC *pcx = CX + cluster_ind*dim;
@@ -100,42 +122,85 @@ void add_point_to_cluster(unsigned int cluster_ind, PREC *CX, const PREC *px, un
 	if (nr_points[cluster_ind]==0)
 	{		
 		(nr_points[cluster_ind])++;
+		weight[cluster_ind] = w;
 		for ( unsigned int k=0 ; k<dim ; k++ )
 			pcx[k] = px[k];
 	}
 	else
 	{
-/* remove PREC here */
-		PREC nr_old = (PREC)(nr_points[cluster_ind]);
+		PREC w_old = weight[cluster_ind];
 		(nr_points[cluster_ind])++;
-		PREC nr_new = (PREC)(nr_points[cluster_ind]);
-		for ( unsigned int k=0 ; k<dim ; k++ )
-			pcx[k] = (nr_old*pcx[k]+px[k])/nr_new;
+		weight[cluster_ind] += w;
+		PREC w_new = weight[cluster_ind];
+		if (w_new > 0.0)
+			for ( unsigned int k=0 ; k<dim ; k++ )
+				pcx[k] = (w_old*pcx[k]+w*px[k])/w_new;
 	}
 }
 
+/*
+ * M2 holds the weighted sum of squared distances of the points of each
+ * cluster to its mean.  Called before add_point_to_cluster (sign 1) or
+ * remove_point_from_cluster (sign -1) move the mean CX, this updates it for
+ * px of weight w as Welford's algorithm does.  Being taken around the mean it
+ * keeps its precision when the data lies far from the origin, where a sum of
+ * squared norms minus the squared norm of the mean cancels.
+ */
+void update_cluster_moment(unsigned int cluster_ind, PREC *M2, const PREC *CX, const PREC *px, PREC w, const unsigned int *nr_points, const PREC *weight, unsigned int dim, int sign)
+{
+	PREC w_old = weight[cluster_ind];
+	PREC w_new = w_old + sign*w;
 
-bool remove_identical_clusters(PREC *CX, BOUND_PREC *cluster_distance, const PREC *X, unsigned int *cluster_count, unsigned int *c, unsigned int dim, unsigned int nclus, unsigned int npts)
+	/* empty cluster before adding or after removing */
+	if ((sign>0 && nr_points[cluster_ind]==0) || (sign<0 && (nr_points[cluster_ind]<2 || w_new<=0.0)))
+	{
+		M2[cluster_ind] = 0.0;
+		return;
+	}
+	if (w_new <= 0.0) return;
+
+	/* |px - new mean| is w_old/w_new times |px - old mean| */
+	PREC d = compute_distance(px,CX+cluster_ind*dim,dim);
+	M2[cluster_ind] += sign*w*w_old/w_new*d*d;
+	if (M2[cluster_ind] < 0.0)
+		M2[cluster_ind] = 0.0;
+}
+
+/*
+ * What a run keeps about the points of each cluster, see the point sets
+ * (dense_points, sparse_points) before kmeans_run for what CX and M2 hold.
+ */
+struct cluster_stats
+{
+	PREC *CX;			/* mean, or sum, of the points of each cluster */
+	unsigned int *CN;	/* number of points per cluster */
+	PREC *CW;			/* weight of the points per cluster, CN again without weights */
+	PREC *M2;			/* their sum of squares, around the mean or not */
+};
+
+template <class Label, class Points>
+bool remove_identical_clusters(Points &pts, cluster_stats &st, const BOUND_PREC *cluster_distance, Label *c, PREC *mindist, unsigned int nclus, unsigned int npts)
 {
 	bool stat = false;
 	for ( unsigned int i=0 ; i<(nclus-1) ; i++ )
 	{
 		for ( unsigned int j=i+1 ; j<nclus ; j++ )
 		{
-			if (cluster_distance[i*nclus+j] <= BOUND_EPS)
+			if (cluster_distance[(size_t)i*nclus+j] <= BOUND_EPS)
 			{
 #if KMEANS_VERBOSE>1
 				printf("found identical cluster : %d\n",j);
 #endif
 				stat = true;
 				/* assign the points from j to i */
-				const PREC *px = X;
-				for ( unsigned int n=0 ; n<npts ; n++,px+=dim )
+				for ( unsigned int n=0 ; n<npts ; n++ )
 				{
 					if (c[n] != j) continue;
-					remove_point_from_cluster(c[n],CX,px,cluster_count,dim);
+					pts.add(j,n,-1,st);
 					c[n] = i;
-					add_point_to_cluster(c[i],CX,px,cluster_count,dim);
+					pts.add(i,n,1,st);
+					/* the upper bound was on the distance to j */
+					mindist[n] = PREC_MAX;
 				}
 			}
 		}
@@ -151,14 +216,14 @@ void compute_cluster_distances(BOUND_PREC *dist, BOUND_PREC *s, const PREC *CX,
 	const PREC *pcx = CX;
 	for ( unsigned int i=0 ; i<nclus-1 ; i++,pcx+=dim)
 	{
-		const PREC *pcxp = CX + (i+1)*dim;
-		unsigned int cnt=i*nclus+i+1;
+		const PREC *pcxp = CX + (size_t)(i+1)*dim;
+		size_t cnt=(size_t)i*nclus+i+1;
 		for ( unsigned int j=i+1 ; j<nclus; j++,cnt++,pcxp+=dim )
 		{
 			if (cluster_changed[i] || cluster_changed[j])
 			{
 				dist[cnt] = (BOUND_PREC)(0.5 * compute_distance(pcx,pcxp,dim));
-				dist[j*nclus+i] = dist[cnt];
+				dist[(size_t)j*nclus+i] = dist[cnt];
 
 				if (dist[cnt] < s[i])
 					s[i] = dist[cnt];
@@ -171,25 +236,314 @@ void compute_cluster_distances(BOUND_PREC *dist, BOUND_PREC *s, const PREC *CX,
 }
 
 
-unsigned int init_point_to_cluster(unsigned int point_ind, const PREC *px, const PREC *CX, unsigned int dim,unsigned int nclus, PREC *mindist, BOUND_PREC *low_b, const BOUND_PREC *cl_dist)
+/*
+ * The bounds in init_point_to_cluster and assign_point_to_cluster only need
+ * the distance from a point to a center, given by the point types below: a
+ * dense row of X, or a sparse row with its distances computed from the
+ * squared norms of the point and of the centers.
+ */
+struct dense_point
+{
+	const PREC *px;
+	unsigned int dim;
+
+	dense_point(const PREC *px, unsigned int dim) : px(px), dim(dim) {}
+
+	PREC distance(const PREC *pcx, unsigned int j) const
+	{
+		return(compute_distance(px,pcx,dim));
+	}
+
+	/* the center of a cluster with mean tpcx; returns how far it moved */
+	static PREC move_center(PREC *pcx, const PREC *tpcx, unsigned int dim)
+	{
+		PREC d = compute_distance(pcx,tpcx,dim);
+		memcpy(pcx,tpcx,dim*sizeof(PREC));
+		return(d);
+	}
+
+	/* sse of points of weight w around their center, given their mean m and the sse m2 around it */
+	static PREC cluster_sse(PREC m2, PREC w, const PREC *m, unsigned int dim)
+	{
+		return(m2);
+	}
+};
+
+/*
+ * A row of X of unit length, for spherical kmeans: the centers are kept at
+ * unit length too, so the distance |x-c| = sqrt(2 - 2 x.c) only needs the dot
+ * product.  It is a distance on the sphere, so the bounds of kmeans_run hold
+ * for it unchanged.
+ */
+struct unit_point
+{
+	const PREC *px;
+	unsigned int dim;
+
+	unit_point(const PREC *px, unsigned int dim) : px(px), dim(dim) {}
+
+	PREC distance(const PREC *pcx, unsigned int j) const
+	{
+		PREC dot = 0.0;
+		for ( unsigned int k=0 ; k<dim ; k++ )
+			dot += px[k]*pcx[k];
+		PREC d = 2.0 - 2.0*dot;
+		return((d>0.0) ? sqrt(d) : 0.0);
+	}
+
+	/* the mean direction; a cluster whose mean is 0 keeps its center */
+	static PREC move_center(PREC *pcx, const PREC *tpcx, unsigned int dim)
+	{
+		PREC n = sqrt(compute_sqnorm(tpcx,dim));
+		if (n <= 0.0) return(0.0);
+		PREC d = 0.0;
+		for ( unsigned int k=0 ; k<dim ; k++ )
+		{
+			PREC v = tpcx[k]/n;
+			d += (pcx[k]-v)*(pcx[k]-v);
+			pcx[k] = v;
+		}
+		return(sqrt(d));
+	}
+
+	/* around the unit center m/|m| instead of the mean m, which is |m|-1 away from it */
+	static PREC cluster_sse(PREC m2, PREC w, const PREC *m, unsigned int dim)
+	{
+		PREC d = sqrt(compute_sqnorm(m,dim)) - 1.0;
+		return(m2 + w*d*d);
+	}
+};
+
+/*
+ * sse of the points of each cluster around its center from the sse M2
+ * around their mean (update_cluster_moment), weights W and means CX of the
+ * clusters, in O(nclus*dim) instead of a pass over the points
+ */
+template <class Point>
+PREC compute_sserror_clusters(const PREC *CX, const PREC *M2, const PREC *W, unsigned int dim, unsigned int nclus)
+{
+	PREC sse = 0.0;
+	const PREC *pcx = CX;
+	for ( unsigned int j=0 ; j<nclus ; j++,pcx+=dim )
+		if (W[j] > 0.0)
+			sse += Point::cluster_sse(M2[j],W[j],pcx,dim);
+	return(sse);
+}
+
+struct sparse_point
+{
+	const PREC *val;
+	const unsigned int *ind;
+	unsigned int nnz;
+	PREC norm;			/* squared norm of the point */
+	const PREC *cnorm;	/* squared norms of the centers */
+
+	sparse_point(const PREC *val, const unsigned int *ind, unsigned int nnz, PREC norm, const PREC *cnorm)
+		: val(val), ind(ind), nnz(nnz), norm(norm), cnorm(cnorm) {}
+
+	PREC distance(const PREC *pcx, unsigned int j) const
+	{
+		PREC dot = 0.0;
+		for ( unsigned int k=0 ; k<nnz ; k++ )
+			dot += val[k]*pcx[ind[k]];
+		PREC d = norm - 2.0*dot + cnorm[j];
+		return((d>0.0) ? sqrt(d) : 0.0);
+	}
+};
+
+/*
+ * Scratch memory of kmeans_run, one block per slot.  A run given a workspace
+ * takes its buffers from it instead of allocating them, so a thread that runs
+ * many small problems one after the other (kmeans_batch) only allocates when a
+ * problem is larger than all before it.
+ */
+enum { WS_TCX, WS_CN, WS_CW, WS_M2, WS_OLD_C, WS_LOW_B, WS_SCALE, WS_CL_DIST, WS_S,
+	   WS_OFFSET, WS_MINDIST, WS_CHANGED, WS_DRIFT, WS_STAMP, WS_PERM, WS_SLOTS };
+
+struct kmeans_workspace
+{
+	void *p[WS_SLOTS];
+	size_t bytes[WS_SLOTS];
+
+	kmeans_workspace()
+	{
+		memset(p,0,sizeof(p));
+		memset(bytes,0,sizeof(bytes));
+	}
+	~kmeans_workspace()
+	{
+		for ( unsigned int k=0 ; k<WS_SLOTS ; k++ )
+			free(p[k]);
+	}
+
+	/* at least n bytes of slot, keeping what it held */
+	void *get(unsigned int slot, size_t n)
+	{
+		if (n > bytes[slot])
+		{
+			void *q = realloc(p[slot], n);
+			if (q==NULL) return(NULL);
+			p[slot] = q;
+			bytes[slot] = n;
+		}
+		return(p[slot]);
+	}
+};
+
+/* n bytes from slot of ws, or allocated if ws is NULL */
+static void *scratch_malloc(kmeans_workspace *ws, unsigned int slot, size_t n)
+{
+	return(ws ? ws->get(slot,n) : malloc(n));
+}
+
+static void *scratch_calloc(kmeans_workspace *ws, unsigned int slot, size_t n)
+{
+	if (ws==NULL) return(calloc(n,1));
+	void *q = ws->get(slot,n);
+	if (q) memset(q,0,n);
+	return(q);
+}
+
+static void scratch_free(kmeans_workspace *ws, void *q)
+{
+	if (ws==NULL) free(q);
+}
+
+/*
+ * Storage of the lower bounds low_b, npts x nclus.  float_bounds keeps them as
+ * BOUND_PREC; the compact stores keep them as float16 or as 8-bit multiples of
+ * a per point scale.  Compact values are rounded down when stored, so what is
+ * read back is still a lower bound, only a looser one.
+ */
+struct float_bounds
+{
+	BOUND_PREC *b;
+	unsigned int npts, nclus;
+	bool owner;
+
+	float_bounds(unsigned int npts, unsigned int nclus, kmeans_workspace *ws=NULL) : npts(npts), nclus(nclus), owner(ws==NULL)
+	{
+		b = (BOUND_PREC *)scratch_calloc(ws, WS_LOW_B, (size_t)npts*nclus*sizeof(BOUND_PREC));
+	}
+	/* bounds allocated by the caller */
+	float_bounds(BOUND_PREC *b, unsigned int npts, unsigned int nclus) : b(b), npts(npts), nclus(nclus), owner(false) {}
+	~float_bounds() { if (owner && b) free(b); }
+
+	bool ok() const { return(b != NULL); }
+	BOUND_PREC get(unsigned int i, unsigned int j) const { return(b[(size_t)i*nclus+j]); }
+	void set(unsigned int i, unsigned int j, BOUND_PREC v) { b[(size_t)i*nclus+j] = v; }
+	void clear_cluster(unsigned int j)
+	{
+		for ( unsigned int i=0 ; i<npts ; i++ )
+			b[(size_t)i*nclus+j] = (BOUND_PREC)0.0;
+	}
+};
+
+/* float16 bits of the largest float16 not above v, for v >= 0 */
+static inline unsigned short half_from_float_down(float v)
+{
+	if (!(v > 0.0f)) return(0);
+	union { float f; unsigned int u; } x;
+	x.f = v;
+	int e = (int)((x.u >> 23) & 0xff) - 127 + 15;
+	if (e >= 31) return(0x7bff);	/* largest finite float16 */
+	if (e <= 0)
+	{
+		/* subnormal float16, truncate the mantissa */
+		if (14 - e >= 24) return(0);
+		return((unsigned short)(((x.u & 0x7fffff) | 0x800000) >> (14 - e)));
+	}
+	return((unsigned short)((e << 10) | ((x.u & 0x7fffff) >> 13)));
+}
+
+static inline float half_to_float(unsigned short h)
+{
+	unsigned int e = (h >> 10) & 0x1f, m = h & 0x3ff;
+	if (e == 0) return(ldexpf((float)m, -24));
+	union { float f; unsigned int u; } x;
+	x.u = ((e - 15 + 127) << 23) | (m << 13);
+	return(x.f);
+}
+
+struct half_bounds
+{
+	unsigned short *b;
+	unsigned int npts, nclus;
+	kmeans_workspace *ws;
+
+	half_bounds(unsigned int npts, unsigned int nclus, kmeans_workspace *ws=NULL) : npts(npts), nclus(nclus), ws(ws)
+	{
+		b = (unsigned short *)scratch_calloc(ws, WS_LOW_B, (size_t)npts*nclus*sizeof(unsigned short));
+	}
+	~half_bounds() { if (b) scratch_free(ws,b); }
+
+	bool ok() const { return(b != NULL); }
+	BOUND_PREC get(unsigned int i, unsigned int j) const { return((BOUND_PREC)half_to_float(b[(size_t)i*nclus+j])); }
+	void set(unsigned int i, unsigned int j, BOUND_PREC v) { b[(size_t)i*nclus+j] = half_from_float_down((float)v); }
+	void clear_cluster(unsigned int j)
+	{
+		for ( unsigned int i=0 ; i<npts ; i++ )
+			b[(size_t)i*nclus+j] = 0;
+	}
+};
+
+/* the 8-bit codes of a point cover up to QUANT_RANGE times its first distance */
+#define QUANT_RANGE 4.0
+
+struct quant_bounds
+{
+	unsigned char *b;
+	BOUND_PREC *scale;		/* value of one step, per point; 0 until the first distance */
+	unsigned int npts, nclus;
+	kmeans_workspace *ws;
+
+	quant_bounds(unsigned int npts, unsigned int nclus, kmeans_workspace *ws=NULL) : npts(npts), nclus(nclus), ws(ws)
+	{
+		b = (unsigned char *)scratch_calloc(ws, WS_LOW_B, (size_t)npts*nclus*sizeof(unsigned char));
+		scale = (BOUND_PREC *)scratch_calloc(ws, WS_SCALE, npts*sizeof(BOUND_PREC));
+	}
+	~quant_bounds() { if (b) scratch_free(ws,b); if (scale) scratch_free(ws,scale); }
+
+	bool ok() const { return(b != NULL && scale != NULL); }
+	BOUND_PREC get(unsigned int i, unsigned int j) const { return(b[(size_t)i*nclus+j]*scale[i]); }
+	unsigned char code(unsigned int i, BOUND_PREC v) const
+	{
+		if (!(v > (BOUND_PREC)0.0) || scale[i] == (BOUND_PREC)0.0) return(0);
+		BOUND_PREC q = v/scale[i];
+		return((q >= (BOUND_PREC)255.0) ? 255 : (unsigned char)q);	/* saturates, rounds down */
+	}
+	void set(unsigned int i, unsigned int j, BOUND_PREC v)
+	{
+		if (scale[i] == (BOUND_PREC)0.0 && v > (BOUND_PREC)0.0)
+			scale[i] = (BOUND_PREC)(v*QUANT_RANGE/255.0);
+		b[(size_t)i*nclus+j] = code(i,v);
+	}
+	void clear_cluster(unsigned int j)
+	{
+		for ( unsigned int i=0 ; i<npts ; i++ )
+			b[(size_t)i*nclus+j] = 0;
+	}
+};
+
+template <class Point, class Bounds>
+unsigned int init_point_to_cluster_t(unsigned int point_ind, const Point &px, const PREC *CX, unsigned int dim,unsigned int nclus, PREC *mindist, Bounds *low_b, const BOUND_PREC *cl_dist)
 {
 	bool use_low_b = true;
 
 	if (low_b==NULL) use_low_b = false;
-	unsigned int bias = point_ind*nclus;
 	
 	const PREC *pcx = CX;
-	PREC mind = compute_distance(px,pcx,dim);
-	if (use_low_b) low_b[bias] = (BOUND_PREC)mind;
+	PREC mind = px.distance(pcx,0);
+	if (use_low_b) low_b->set(point_ind,0,(BOUND_PREC)mind);
 	unsigned int assignment = 0;
 	pcx+=dim;
 	for ( unsigned int j=1 ; j<nclus ; j++,pcx+=dim )
 	{
-		if (mind + BOUND_EPS <= cl_dist[assignment*nclus+j])
+		if (mind + BOUND_EPS <= cl_dist[(size_t)assignment*nclus+j])
 			continue;
 
-		PREC d = compute_distance(px,pcx,dim);
-		if(use_low_b) low_b[j+bias] = (BOUND_PREC)d;
+		PREC d = px.distance(pcx,j);
+		if(use_low_b) low_b->set(point_ind,j,(BOUND_PREC)d);
 
 		if (d<mind)
 		{
@@ -201,6 +555,12 @@ unsigned int init_point_to_cluster(unsigned int point_ind, const PREC *px, const
 	return(assignment);
 }
 
+unsigned int init_point_to_cluster(unsigned int point_ind, const PREC *px, const PREC *CX, unsigned int dim,unsigned int nclus, PREC *mindist, BOUND_PREC *low_b, const BOUND_PREC *cl_dist)
+{
+	float_bounds b(low_b,0,nclus);
+	return(init_point_to_cluster_t(point_ind,dense_point(px,dim),CX,dim,nclus,mindist,low_b ? &b : (float_bounds *)NULL,cl_dist));
+}
+
 unsigned int assign_point_to_cluster_ordinary(const PREC *px, const PREC *CX, unsigned int dim,unsigned int nclus)
 {
 	unsigned int assignment = nclus;
@@ -219,14 +579,79 @@ unsigned int assign_point_to_cluster_ordinary(const PREC *px, const PREC *CX, un
 	return(assignment);
 }
 
-unsigned int assign_point_to_cluster(unsigned int point_ind, const PREC *px, const PREC *CX, unsigned int dim,unsigned int nclus, unsigned int old_assignment, PREC *mindist, BOUND_PREC *s, BOUND_PREC *cl_dist, BOUND_PREC *low_b)
+/*
+ * Lazy update of the bounds after the centers move.  Instead of lowering all
+ * npts x nclus lower bounds and raising all npts upper bounds every iteration,
+ * drift keeps the total distance each center has moved up to each iteration,
+ * and stamp the iteration at which the bounds of each point were last brought
+ * up to date.  A bound is read as its stored value less (for the upper bound,
+ * plus) the drift of its center since the stamp, and the bounds of a point are
+ * only rewritten when assign_point_to_cluster gets past its first test.
+ */
+struct drift_history
+{
+	PREC *drift;			/* (now+1) x nclus cumulative movement of the centers */
+	unsigned int *stamp;	/* per point */
+	unsigned int nclus, now, capacity;
+	kmeans_workspace *ws;
+
+	drift_history(unsigned int npts, unsigned int nclus, kmeans_workspace *ws=NULL) : nclus(nclus), now(0), capacity(16), ws(ws)
+	{
+		drift = (PREC *)scratch_calloc(ws, WS_DRIFT, (size_t)capacity*nclus*sizeof(PREC));
+		stamp = (unsigned int *)scratch_calloc(ws, WS_STAMP, (size_t)npts*sizeof(unsigned int));
+		if (drift==NULL || stamp==NULL)	kmeans_error((char*)"Failed to allocate mem for bound drift");
+	}
+	~drift_history() { scratch_free(ws,drift); scratch_free(ws,stamp); }
+
+	/* how far center j moved since the bounds of point i were updated */
+	PREC since(unsigned int i, unsigned int j) const
+	{
+		return(drift[(size_t)now*nclus+j] - drift[(size_t)stamp[i]*nclus+j]);
+	}
+
+	/* next iteration, after center j moved by offset[j] */
+	void advance(const BOUND_PREC *offset)
+	{
+		if (now+1 == capacity)
+		{
+			capacity *= 2;
+			size_t n = (size_t)capacity*nclus*sizeof(PREC);
+			drift = (PREC *)(ws ? ws->get(WS_DRIFT,n) : realloc(drift,n));
+			if (drift==NULL)	kmeans_error((char*)"Failed to allocate mem for bound drift");
+		}
+		PREC *d = drift + (size_t)now*nclus;
+		for ( unsigned int j=0 ; j<nclus ; j++ )
+			d[nclus+j] = d[j] + offset[j];
+		now++;
+	}
+
+	/* bring the bounds of point i, assigned to assignment, up to date */
+	template <class Bounds>
+	void update(unsigned int i, unsigned int assignment, PREC *mindist, Bounds *low_b)
+	{
+		if (stamp[i] == now) return;
+		mindist[i] += since(i,assignment);
+		if (low_b)
+			for ( unsigned int j=0 ; j<nclus ; j++ )
+			{
+				PREC moved = since(i,j);
+				if (moved <= 0.0) continue;
+				PREC v = low_b->get(i,j) - moved;
+				low_b->set(i,j,(BOUND_PREC)((v>0.0) ? v : 0.0));
+			}
+		stamp[i] = now;
+	}
+};
+
+template <class Point, class Bounds>
+unsigned int assign_point_to_cluster_t(unsigned int point_ind, const Point &px, const PREC *CX, unsigned int dim,unsigned int nclus, unsigned int old_assignment, PREC *mindist, BOUND_PREC *s, BOUND_PREC *cl_dist, Bounds *low_b, drift_history *lazy=NULL)
 {
 	bool up_to_date = false,use_low_b=true;;
 
-	unsigned int bias = point_ind*nclus;
 	if (low_b==NULL)use_low_b=false;
 
 	PREC mind = mindist[point_ind];
+	if (lazy) mind += lazy->since(point_ind,old_assignment);
 
 	if (mind+BOUND_EPS <= s[old_assignment])
 	{
@@ -236,8 +661,14 @@ unsigned int assign_point_to_cluster(unsigned int point_ind, const PREC *px, con
 		return(old_assignment);
 	}
 
+	if (lazy)
+	{
+		lazy->update(point_ind,old_assignment,mindist,low_b);
+		mind = mindist[point_ind];
+	}
+
 	unsigned int assignment = old_assignment;
-	unsigned int counter = assignment*nclus;
+	size_t counter = (size_t)assignment*nclus;
 	const PREC *pcx = CX;
 	for ( unsigned int j=0 ; j<nclus ; j++,pcx+=dim )
 	{
@@ -249,7 +680,7 @@ unsigned int assign_point_to_cluster(unsigned int point_ind, const PREC *px, con
 			continue;
 		}
 		
-		if (use_low_b && (mind+BOUND_EPS <= low_b[j+bias]))
+		if (use_low_b && (mind+BOUND_EPS <= low_b->get(point_ind,j)))
 		{
 #if KMEANS_VERBOSE>1
 			saved_three_two++;
@@ -268,18 +699,18 @@ unsigned int assign_point_to_cluster(unsigned int point_ind, const PREC *px, con
 		PREC d = 0.0;
 		if (!up_to_date)
 		{
-			d = compute_distance(px,CX+assignment*dim,dim);
+			d = px.distance(CX+(size_t)assignment*dim,assignment);
 			mind = d;
-			if(use_low_b) low_b[assignment+bias] = (BOUND_PREC)d;
+			if(use_low_b) low_b->set(point_ind,assignment,(BOUND_PREC)d);
 			up_to_date = true;
 		}
 		
 		if (!use_low_b)
-			d = compute_distance(px,pcx,dim);
-		else if ((mind > BOUND_EPS+low_b[j+bias]) || (mind > BOUND_EPS+cl_dist[counter+j]))
+			d = px.distance(pcx,j);
+		else if ((mind > BOUND_EPS+low_b->get(point_ind,j)) || (mind > BOUND_EPS+cl_dist[counter+j]))
 		{
-			d =compute_distance(px,pcx,dim);
-			low_b[j+bias] = (BOUND_PREC)d;
+			d = px.distance(pcx,j);
+			low_b->set(point_ind,j,(BOUND_PREC)d);
 		}
 		else
 		{
@@ -293,7 +724,7 @@ unsigned int assign_point_to_cluster(unsigned int point_ind, const PREC *px, con
 		{
 			mind = d;
 			assignment = j;
-			counter = assignment*nclus;
+			counter = (size_t)assignment*nclus;
 			up_to_date = true;
 		}
 	}
@@ -303,17 +734,304 @@ unsigned int assign_point_to_cluster(unsigned int point_ind, const PREC *px, con
 }
 
 
-PREC kmeans_run(PREC *CX,const PREC *X,unsigned int *c,unsigned int dim,unsigned int npts,unsigned int nclus,unsigned int maxiter)
+unsigned int assign_point_to_cluster(unsigned int point_ind, const PREC *px, const PREC *CX, unsigned int dim,unsigned int nclus, unsigned int old_assignment, PREC *mindist, BOUND_PREC *s, BOUND_PREC *cl_dist, BOUND_PREC *low_b)
+{
+	float_bounds b(low_b,0,nclus);
+	return(assign_point_to_cluster_t(point_ind,dense_point(px,dim),CX,dim,nclus,old_assignment,mindist,s,cl_dist,low_b ? &b : (float_bounds *)NULL));
+}
+
+/*
+ * The points of a run as kmeans_run sees them: the Point of row i with its
+ * weight, and how the points of a cluster are kept in cluster_stats.
+ *
+ * dense_points are the rows of X with weights W.  st.CX holds the weighted
+ * mean of each cluster, updated point by point, and st.M2 the sse around it
+ * (update_cluster_moment), so a run can tell its sse without a pass over X.
+ */
+template <class Point>
+struct dense_points
+{
+	typedef Point point_type;
+	const PREC *X, *W;
+	unsigned int dim;
+
+	dense_points(const PREC *X, const PREC *W, unsigned int dim) : X(X), W(W), dim(dim) {}
+
+	Point point(unsigned int i) const { return(Point(X+(size_t)i*dim,dim)); }
+	PREC weight(unsigned int i) const { return(W ? W[i] : 1.0); }
+
+	/* the centers marked in changed moved to CX */
+	void centers_moved(const PREC *CX, const bool *changed, unsigned int nclus) {}
+
+	/* add (sign 1) or remove (sign -1) point i to or from cluster j */
+	void add(unsigned int j, unsigned int i, int sign, cluster_stats &st) const
+	{
+		const PREC *px = X+(size_t)i*dim;
+		PREC w = weight(i);
+		update_cluster_moment(j,st.M2,st.CX,px,w,st.CN,st.CW,dim,sign);
+		if (sign > 0)
+			add_point_to_cluster(j,st.CX,px,w,st.CN,st.CW,dim);
+		else
+			remove_point_from_cluster(j,st.CX,px,w,st.CN,st.CW,dim);
+	}
+
+	/* move the center pcx of cluster j onto its points; returns how far it moved */
+	PREC move_center(unsigned int j, PREC *pcx, const cluster_stats &st) const
+	{
+		return(Point::move_center(pcx,st.CX+(size_t)j*dim,dim));
+	}
+
+	/* sse of the points around the centers, once they moved */
+	PREC clusters_sse(const cluster_stats &st, unsigned int nclus) const
+	{
+		return(compute_sserror_clusters<Point>(st.CX,st.M2,st.CW,dim,nclus));
+	}
+
+	/* sse of the points around the mean of all of them: that within the
+	   clusters plus that of their means around it */
+	PREC spread(const cluster_stats &st, unsigned int nclus) const
+	{
+		PREC xx = 0.0, w = 0.0;
+		for ( unsigned int j=0 ; j<nclus ; j++ )
+		{
+			xx += st.M2[j];
+			w += st.CW[j];
+		}
+		for ( unsigned int k=0 ; k<dim && w>0.0 ; k++ )
+		{
+			PREC m = 0.0;
+			for ( unsigned int j=0 ; j<nclus ; j++ )
+				m += st.CW[j]*st.CX[(size_t)j*dim+k];
+			m /= w;
+			for ( unsigned int j=0 ; j<nclus ; j++ )
+				xx += st.CW[j]*(st.CX[(size_t)j*dim+k]-m)*(st.CX[(size_t)j*dim+k]-m);
+		}
+		return(xx);
+	}
+
+	unsigned int nearest(unsigned int i, const PREC *CX, unsigned int nclus) const
+	{
+		return(assign_point_to_cluster_ordinary(X+(size_t)i*dim,CX,dim,nclus));
+	}
+
+	template <class Label>
+	PREC sse(const PREC *CX, const Label *c, unsigned int npts) const
+	{
+		return(compute_sserror(CX,X,W,c,dim,npts));
+	}
+};
+
+/*
+ * The rows of a CSR matrix (data, indices, indptr) with dim columns, of unit
+ * weight.  st.CX holds the plain sum of the points of each cluster and st.M2
+ * the sum of their squared norms: adding or removing a point only touches its
+ * nonzeros, and the mean is formed when the center moves.  The distances
+ * need the squared norms of the centers, kept up to date by centers_moved.
+ */
+struct sparse_points
 {
-	PREC *tCX = (PREC *)calloc(nclus * dim, sizeof(PREC));
-	if (tCX==NULL)	kmeans_error((char*)"Failed to allocate mem for Cluster points");
+	typedef sparse_point point_type;
+	const PREC *data;
+	const unsigned int *indices, *indptr;
+	unsigned int dim;
+	PREC *xnorm;		/* squared norms of the points */
+	PREC *cnorm;		/* squared norms of the centers */
+
+	sparse_points(const PREC *data, const unsigned int *indices, const unsigned int *indptr, unsigned int dim, unsigned int npts, unsigned int nclus)
+		: data(data), indices(indices), indptr(indptr), dim(dim)
+	{
+		xnorm = (PREC *)malloc(npts*sizeof(PREC));
+		cnorm = (PREC *)malloc(nclus*sizeof(PREC));
+		if (xnorm==NULL || cnorm==NULL)	kmeans_error((char*)"Failed to allocate mem for sparse kmeans");
+		for ( unsigned int i=0 ; i<npts ; i++ )
+		{
+			xnorm[i] = 0.0;
+			for ( unsigned int k=indptr[i] ; k<indptr[i+1] ; k++ )
+				xnorm[i] += data[k]*data[k];
+		}
+	}
+	~sparse_points() { free(xnorm); free(cnorm); }
+
+	sparse_point point(unsigned int i) const
+	{
+		return(sparse_point(data+indptr[i], indices+indptr[i], indptr[i+1]-indptr[i], xnorm[i], cnorm));
+	}
+	PREC weight(unsigned int i) const { return(1.0); }
+
+	void centers_moved(const PREC *CX, const bool *changed, unsigned int nclus)
+	{
+		for ( unsigned int j=0 ; j<nclus ; j++ )
+			if (changed[j])
+				cnorm[j] = compute_sqnorm(CX+(size_t)j*dim,dim);
+	}
+
+	void add(unsigned int j, unsigned int i, int sign, cluster_stats &st) const
+	{
+		PREC *psum = st.CX + (size_t)j*dim;
+		for ( unsigned int k=indptr[i] ; k<indptr[i+1] ; k++ )
+			psum[indices[k]] += sign*data[k];
+		st.M2[j] += sign*xnorm[i];
+		if (sign > 0)
+			st.CN[j]++;
+		else
+			st.CN[j]--;
+		st.CW[j] = st.CN[j];
+	}
+
+	/* a cluster without points keeps its center */
+	PREC move_center(unsigned int j, PREC *pcx, const cluster_stats &st) const
+	{
+		if (st.CN[j] == 0) return(0.0);
+		const PREC *psum = st.CX + (size_t)j*dim;
+		PREC d = 0.0;
+		for ( unsigned int k=0 ; k<dim ; k++ )
+		{
+			PREC m = psum[k]/st.CN[j];
+			d += (m-pcx[k])*(m-pcx[k]);
+			pcx[k] = m;
+		}
+		return(sqrt(d));
+	}
+
+	/* sum of |x|^2 less n |mean|^2 per cluster; sparse rows lie near the origin */
+	PREC clusters_sse(const cluster_stats &st, unsigned int nclus) const
+	{
+		PREC sse = 0.0;
+		for ( unsigned int j=0 ; j<nclus ; j++ )
+			if (st.CN[j] > 0)
+			{
+				PREC e = st.M2[j] - compute_sqnorm(st.CX+(size_t)j*dim,dim)/st.CN[j];
+				if (e > 0.0) sse += e;
+			}
+		return(sse);
+	}
+
+	PREC spread(const cluster_stats &st, unsigned int nclus) const
+	{
+		PREC xx = 0.0, n = 0.0;
+		for ( unsigned int j=0 ; j<nclus ; j++ )
+		{
+			xx += st.M2[j];
+			n += st.CN[j];
+		}
+		for ( unsigned int k=0 ; k<dim && n>0.0 ; k++ )
+		{
+			PREC m = 0.0;
+			for ( unsigned int j=0 ; j<nclus ; j++ )
+				m += st.CX[(size_t)j*dim+k];
+			xx -= m*m/n;
+		}
+		return((xx > 0.0) ? xx : 0.0);
+	}
+
+	unsigned int nearest(unsigned int i, const PREC *CX, unsigned int nclus) const
+	{
+		sparse_point px = point(i);
+		unsigned int assignment = 0;
+		PREC mind = PREC_MAX;
+		for ( unsigned int j=0 ; j<nclus ; j++ )
+		{
+			PREC d = px.distance(CX+(size_t)j*dim,j);
+			if (d<mind)
+			{
+				mind = d;
+				assignment = j;
+			}
+		}
+		return(assignment);
+	}
+
+	template <class Label>
+	PREC sse(const PREC *CX, const Label *c, unsigned int npts) const
+	{
+		PREC sse = 0.0;
+		for ( unsigned int i=0 ; i<npts ; i++ )
+		{
+			PREC d = point(i).distance(CX+(size_t)c[i]*dim,c[i]);
+			sse += d*d;
+		}
+		return(sse);
+	}
+};
+
+/* first assignment of every point, each added to the clusters of st */
+template <class Label, class Bounds, class Points>
+void init_points(Points &pts, const PREC *CX, Label *c, unsigned int dim, unsigned int npts, unsigned int nclus, PREC *mindist, Bounds *low_b, const BOUND_PREC *cl_dist, cluster_stats &st)
+{
+	for ( unsigned int i=0 ; i<npts ; i++ )
+	{
+		c[i] = init_point_to_cluster_t(i,pts.point(i),CX,dim,nclus,mindist,low_b,cl_dist);
+		pts.add(c[i],i,1,st);
+	}
+}
+
+/*
+ * Reassign every point from its cluster in old_c, which may be c itself, and
+ * move those that changed between the clusters of st; the clusters they left
+ * and joined are marked in cluster_changed.  Returns the number of points
+ * that changed cluster.
+ */
+template <class Label, class Bounds, class Points>
+unsigned int reassign_points(Points &pts, const PREC *CX, Label *c, const Label *old_c, unsigned int dim, unsigned int npts, unsigned int nclus, PREC *mindist, BOUND_PREC *s, BOUND_PREC *cl_dist, Bounds *low_b, drift_history *lazy, bool *cluster_changed, cluster_stats &st)
+{
+	unsigned int nchanged = 0;
+	for ( unsigned int i=0 ; i<npts ; i++ )
+	{
+		unsigned int old = old_c[i];
+		unsigned int a = assign_point_to_cluster_t(i,pts.point(i),CX,dim,nclus,old,mindist,s,cl_dist,low_b,lazy);
+		c[i] = a;
+
+#ifdef KMEANS_DEBUG
+		{
+			/* If the assignments are not the same, there is still the BOUND_EPS difference 
+			   which can be the reason of this*/
+			unsigned int tmp = pts.nearest(i,CX,nclus);
+			if (tmp != a)
+			{
+				double d1 = pts.point(i).distance(CX+(size_t)tmp*dim,tmp);
+				double d2 = pts.point(i).distance(CX+(size_t)a*dim,a);
+				assert( (d1>d2)?((d1-d2)<BOUND_EPS):((d2-d1)<BOUND_EPS) );
+			}
+		}
+#endif
+
+		if (a == old) continue;
+
+		nchanged++;
+		cluster_changed[a] = true;
+		cluster_changed[old] = true;
+		pts.add(old,i,-1,st);
+		pts.add(a,i,1,st);
+	}
+	return(nchanged);
+}
+
+template <class Label, class Bounds, class Points>
+PREC kmeans_run(PREC *CX,Points &pts,Label *c,unsigned int dim,unsigned int npts,unsigned int nclus,unsigned int maxiter, kmeans_criteria *crit, kmeans_workspace *ws)
+{
+	kmeans_criteria none = {0.0, 0.0, 0, 0};
+	if (crit==NULL)	crit = &none;
+	crit->stop = KMEANS_STOP_MAXITER;
+
+	/* the points of each cluster, see the point sets above */
+	cluster_stats st;
+	st.CX = (PREC *)scratch_calloc(ws, WS_TCX, (size_t)nclus*dim*sizeof(PREC));
+	if (st.CX==NULL)	kmeans_error((char*)"Failed to allocate mem for Cluster points");
 
 	/* number of points per cluster */
-	unsigned int *CN = (unsigned int *) calloc(nclus, sizeof(unsigned int)); 
-	if (CX==NULL)	kmeans_error((char*)"Failed to allocate mem for assignment");
+	st.CN = (unsigned int *) scratch_calloc(ws, WS_CN, nclus*sizeof(unsigned int)); 
+	if (st.CN==NULL)	kmeans_error((char*)"Failed to allocate mem for assignment");
+
+	/* weight of the points per cluster, CN again without weights */
+	st.CW = (PREC *) scratch_calloc(ws, WS_CW, nclus*sizeof(PREC));
+	if (st.CW==NULL)	kmeans_error((char*)"Failed to allocate mem for cluster weights");
+
+	/* sum of squares of the points per cluster, for the sse */
+	st.M2 = (PREC *) scratch_calloc(ws, WS_M2, nclus*sizeof(PREC));
+	if (st.M2==NULL)	kmeans_error((char*)"Failed to allocate mem for cluster sums of squares");
 	
 	/* old assignement of points to cluster */
-	unsigned int *old_c = (unsigned int *) malloc(npts* sizeof(unsigned int));
+	Label *old_c = (Label *) scratch_malloc(ws, WS_OLD_C, npts*sizeof(Label));
 	if (old_c==NULL)	kmeans_error((char*)"Failed to allocate mem for temp assignment");
 
 	/* assign to value which is out of range */
@@ -324,172 +1042,149 @@ PREC kmeans_run(PREC *CX,const PREC *X,unsigned int *c,unsigned int dim,unsigned
 	printf("compile without setting the KMEANS_VERBOSE flag for no output\n");
 #endif
 
-	BOUND_PREC *low_b = (BOUND_PREC *) calloc(npts*nclus,sizeof(BOUND_PREC));
-	bool use_low_b = false;
-	if (low_b == NULL)
+	Bounds bounds(npts,nclus,ws);
+	Bounds *low_b = &bounds;
+	bool use_low_b = bounds.ok();
+	if (!use_low_b)
 	{
 #if KMEANS_VERBOSE>0
 		printf("not enough memory for lower bound, will compute without\n");
 #endif
-		use_low_b = false;
+		low_b = NULL;
 	}
-	else
-	  {
-	    use_low_b = true;
-	    assert(low_b);
-	  }
 
 
-	BOUND_PREC *cl_dist = (BOUND_PREC *)calloc(nclus*nclus, sizeof(BOUND_PREC));
+	BOUND_PREC *cl_dist = (BOUND_PREC *)scratch_calloc(ws, WS_CL_DIST, (size_t)nclus*nclus*sizeof(BOUND_PREC));
 	if (cl_dist==NULL)	kmeans_error((char*)"Failed to allocate mem for cluster-cluster distance");
 
-	BOUND_PREC *s = (BOUND_PREC *) malloc(nclus*sizeof(BOUND_PREC));
+	BOUND_PREC *s = (BOUND_PREC *) scratch_malloc(ws, WS_S, nclus*sizeof(BOUND_PREC));
 	if (s==NULL)	kmeans_error((char*)"Failed to allocate mem for assignment");
 
-	BOUND_PREC *offset = (BOUND_PREC *) malloc(nclus * sizeof(BOUND_PREC)); /* change in distance of a cluster mean after a iteration */
+	BOUND_PREC *offset = (BOUND_PREC *) scratch_malloc(ws, WS_OFFSET, nclus*sizeof(BOUND_PREC)); /* change in distance of a cluster mean after a iteration */
 	if (offset==NULL)	kmeans_error((char*)"Failed to allocate mem for bound points-nearest cluster");
 
-	PREC *mindist = (PREC *)malloc(npts * sizeof(PREC));
+	PREC *mindist = (PREC *)scratch_malloc(ws, WS_MINDIST, npts*sizeof(PREC));
 	if (mindist==NULL)	kmeans_error((char*)"Failed to allocate mem for bound points-clusters");
 
 	for ( unsigned int i=0;i<npts;i++)
 		mindist[i] = PREC_MAX;
 
-	bool *cluster_changed = (bool *) malloc(nclus * sizeof(bool)); /* did the cluster changed? */
+	bool *cluster_changed = (bool *) scratch_malloc(ws, WS_CHANGED, nclus*sizeof(bool)); /* did the cluster changed? */
 	if (cluster_changed==NULL)	kmeans_error((char*)"Failed to allocate mem for variable cluster_changed");
 	for ( unsigned int j=0 ; j<nclus ; j++ )
 		cluster_changed[j] = true;
 
+	/* movement of the centers not yet applied to the bounds */
+	drift_history lazy(npts,nclus,ws);
+
+	/* scale of the data for tol, the root mean squared distance to its mean */
+	PREC scale = 0.0;
+	PREC sse = PREC_MAX, last_sse;
+
 
 	unsigned int iteration = 0;
 	unsigned int nchanged = 1;
 	while (iteration < maxiter || maxiter == 0)
 	{
-		
+		pts.centers_moved(CX, cluster_changed, nclus);
+
 		/* compute cluster-cluster distances */
 		compute_cluster_distances(cl_dist, s, CX, dim,nclus, cluster_changed);
 		
 		/* assign all points from identical clusters to the first occurence of that cluster */
-		remove_identical_clusters(CX, cl_dist, X, CN, c, dim, nclus, npts);
+		if (iteration > 0)
+			remove_identical_clusters(pts, st, cl_dist, c, mindist, nclus, npts);
 			
 		/* find nearest cluster center */
 		if (iteration == 0)
 		{
-		  
-		  const PREC *px = X;
-		  for ( unsigned int i=0 ; i<npts ; i++,px+=dim)
+			init_points(pts, CX, c, dim, npts, nclus, mindist, low_b, cl_dist, st);
+			nchanged = npts;
+
+			if (crit->tol > 0.0)
 			{
-				c[i] = init_point_to_cluster(i,px,CX,dim,nclus,mindist,low_b,cl_dist);
-				add_point_to_cluster(c[i],tCX,px,CN,dim);
+				PREC w = 0.0;
+				for ( unsigned int j=0 ; j<nclus ; j++ )
+					w += st.CW[j];
+				scale = (w > 0.0) ? sqrt(pts.spread(st,nclus)/w) : 0.0;
 			}
-			nchanged = npts;
 		}
 		else
 		{
 			for ( unsigned int j=0 ; j<nclus ; j++)
 				cluster_changed[j] = false;
 
-			nchanged = 0;
-			const PREC *px = X;
-			for ( unsigned int i=0 ; i<npts ; i++,px+=dim)
-			{
-				c[i] = assign_point_to_cluster(i,px,CX,dim,nclus,old_c[i],mindist,s,cl_dist,low_b);
-
-#ifdef KMEANS_DEBUG
-				{
-					/* If the assignments are not the same, there is still the BOUND_EPS difference 
-					   which can be the reason of this*/
-					unsigned int tmp = assign_point_to_cluster_ordinary(px,CX,dim,nclus);
-					if (tmp != c[i])
-					{
-						double d1 = compute_distance(px,CX+(tmp*dim),dim);
-						double d2 = compute_distance(px,CX+(c[i]*dim),dim);
-						assert( (d1>d2)?((d1-d2)<BOUND_EPS):((d2-d1)<BOUND_EPS) );
-					}
-				}
-#endif
-
-				if (old_c[i] == c[i]) continue;
-				
-				nchanged++;
-
-				cluster_changed[c[i]] = true;
-				cluster_changed[old_c[i]] = true;
-
-				remove_point_from_cluster(old_c[i],tCX,px,CN,dim);
-				add_point_to_cluster(c[i],tCX,px,CN,dim);
-			}
-
+			nchanged = reassign_points(pts, CX, c, old_c, dim, npts, nclus, mindist, s, cl_dist, low_b, &lazy, cluster_changed, st);
 		}
 
 
 		/* fill up empty clusters */
 		for ( unsigned int j=0 ; j<nclus ; j++)
 		{
-			if (CN[j]>0) continue;
-			unsigned int *rperm = (unsigned int*)malloc(npts*sizeof(unsigned int));
-			if (cluster_changed==NULL)	kmeans_error((char*)"Failed to allocate mem for permutation");
+			if (st.CN[j]>0) continue;
+			unsigned int *rperm = (unsigned int*)scratch_malloc(ws, WS_PERM, npts*sizeof(unsigned int));
+			if (rperm==NULL)	kmeans_error((char*)"Failed to allocate mem for permutation");
 
 			randperm(rperm,npts);
 			unsigned int i = 0; 
-			while (rperm[i]<npts && CN[c[rperm[i]]]<2) i++;
-			if (i==npts)continue;
+			while (i<npts && st.CN[c[rperm[i]]]<2) i++;
+			if (i==npts)
+			{
+				scratch_free(ws,rperm);
+				continue;
+			}
 			i = rperm[i];
 #if KMEANS_VERBOSE>0
 			printf("empty cluster [%d], filling it with point [%d]\n",j,i);
 #endif
-			cluster_changed[c[rperm[i]]] = true;
+			cluster_changed[c[i]] = true;
 			cluster_changed[j] = true;
-			const PREC *px = X + i*dim;
-			remove_point_from_cluster(c[i],tCX,px,CN,dim);
+			lazy.update(i,c[i],mindist,low_b);
+			pts.add(c[i],i,-1,st);
 			c[i] = j;
-			add_point_to_cluster(j,tCX,px,CN,dim);
+			pts.add(j,i,1,st);
 			/* void the bounds */
 			s[j] = (BOUND_PREC)0.0;
 			mindist[i] = 0.0;
 			if (use_low_b)
-				for ( unsigned int k=0 ; k<npts ; k++ )
-					low_b[k*nclus+j] = (BOUND_PREC)0.0;
+				low_b->clear_cluster(j);
 			
 			nchanged++;
-			free(rperm);
+			scratch_free(ws,rperm);
 		}
 
 		/* no assignment changed: done */
-		if (nchanged==0) break; 
+		if (nchanged==0)
+		{
+			crit->stop = KMEANS_STOP_CONVERGED;
+			iteration++;
+			break;
+		}
 
 		/* compute the offset */
 
+		BOUND_PREC max_offset = (BOUND_PREC)0.0;
 		PREC *pcx = CX;
-		PREC *tpcx = tCX;
-		for ( unsigned int j=0 ; j<nclus ; j++,pcx+=dim,tpcx+=dim )
+		for ( unsigned int j=0 ; j<nclus ; j++,pcx+=dim )
 		{
 			offset[j] = (BOUND_PREC)0.0;
 			if (cluster_changed[j])
 			{
-				offset[j] = (BOUND_PREC)compute_distance(pcx,tpcx,dim);
-				memcpy(pcx,tpcx,dim*sizeof(PREC));
+				offset[j] = (BOUND_PREC)pts.move_center(j,pcx,st);
+				if (offset[j] > max_offset) max_offset = offset[j];
 			}
 		}
 		
-		/* update the lower bound */
-		if (use_low_b)
-		{
-			for ( unsigned int i=0,cnt=0 ; i<npts ; i++ )
-				for ( unsigned int j=0 ; j<nclus ; j++,cnt++ )
-				{
-					low_b[cnt] -= offset[j];
-					if (low_b[cnt]<(BOUND_PREC)0.0) low_b[cnt] = (BOUND_PREC)0.0;
-				}
-		}
+		/* update the bounds, lazily */
+		lazy.advance(offset);
 
-		for ( unsigned int i=0; i<npts; i++)
-			mindist[i] += (PREC)offset[c[i]];
+		memcpy(old_c,c,npts*sizeof(Label));
 
-		memcpy(old_c,c,npts*sizeof(unsigned int));
+		/* sse of the assignment around the new centers, for sse_rtol */
+		last_sse = sse;
+		sse = pts.clusters_sse(st,nclus);
 
 #if KMEANS_VERBOSE>0
-		PREC sse = compute_sserror(CX,X,c,dim,npts);
 		printf("iteration %4d, #(changed points): %4d, sse: %4.2f\n",(int)iteration,(int)nchanged,sse);
 #endif
 
@@ -508,41 +1203,62 @@ PREC kmeans_run(PREC *CX,const PREC *X,unsigned int *c,unsigned int dim,unsigned
 
 		iteration++;
 
+		/* the centers barely moved, or the sse barely went down */
+		if (crit->tol > 0.0 && max_offset <= crit->tol*scale)
+		{
+			crit->stop = KMEANS_STOP_TOL;
+			break;
+		}
+		if (crit->sse_rtol > 0.0 && last_sse != PREC_MAX && last_sse - sse <= crit->sse_rtol*last_sse)
+		{
+			crit->stop = KMEANS_STOP_SSE;
+			break;
+		}
 	}
+	crit->iterations = iteration;
 
 #ifdef KMEANS_DEBUG
 	for ( unsigned int j=0;j<nclus;j++)
-		assert(CN[j]!=0); /* Empty cluster after all */
+		assert(st.CN[j]!=0); /* Empty cluster after all */
 #endif
 
 
-	/* find nearest cluster center if iteration reached maxiter */
+	/* find nearest cluster center if the run stopped with points still changing */
 	if (nchanged>0)
 	{
-	    const PREC *px = X;
-		for ( unsigned int i=0 ; i<npts ; i++,px+=dim)
-			c[i] = assign_point_to_cluster_ordinary(px,CX,dim,nclus);
+		pts.centers_moved(CX, cluster_changed, nclus);
+		for ( unsigned int i=0 ; i<npts ; i++)
+			c[i] = pts.nearest(i,CX,nclus);
 	}
-	PREC sse = compute_sserror(CX,X,c,dim,npts);
+
+	/* the sse returned, and compared between restarts, is exact */
+	sse = pts.sse(CX,c,npts);
 
 #if KMEANS_VERBOSE>0
 	printf("iteration %4d, #(changed points): %4d, sse: %4.2f\n",(int)iteration,(int)nchanged,sse);
 #endif
 
-	if(low_b) free(low_b);
-	free(cluster_changed);
-	free(mindist);
-	free(s);
-	free(offset);
-	free(cl_dist);
-	free(tCX);
-	free(CN);
-	free(old_c);
+	scratch_free(ws,cluster_changed);
+	scratch_free(ws,mindist);
+	scratch_free(ws,s);
+	scratch_free(ws,offset);
+	scratch_free(ws,cl_dist);
+	scratch_free(ws,st.CX);
+	scratch_free(ws,st.CW);
+	scratch_free(ws,st.M2);
+	scratch_free(ws,st.CN);
+	scratch_free(ws,old_c);
 
 	return(sse);
 }
 
 PREC kmeans(PREC *CX,const PREC *X,unsigned int *assignment,unsigned int dim,unsigned int npts,unsigned int nclus,unsigned int maxiter, unsigned int restarts)
+{
+	return(kmeans_weighted(CX,X,NULL,assignment,dim,npts,nclus,maxiter,restarts));
+}
+
+template <class Label, class Bounds, class Point>
+PREC kmeans_t(PREC *CX,const PREC *X,const PREC *W,Label *assignment,unsigned int dim,unsigned int npts,unsigned int nclus,unsigned int maxiter, unsigned int restarts, kmeans_criteria *crit, kmeans_workspace *ws=NULL)
 {
 
   if (npts < nclus)
@@ -576,12 +1292,13 @@ PREC kmeans(PREC *CX,const PREC *X,unsigned int *assignment,unsigned int dim,uns
       randperm(order,npts);
       for (unsigned int i=0; i<nclus; i++)
 		  for ( unsigned int k=0; k<dim; k++ )
-			  CX[(i*dim)+k] = X[order[i]*dim+k];
+			  CX[(i*dim)+k] = X[(size_t)order[i]*dim+k];
       free(order);
 		
   }
   assert(CX != NULL);
-  PREC sse = kmeans_run(CX,X,assignment,dim,npts,nclus,maxiter);
+  dense_points<Point> pts(X,W,dim);
+  PREC sse = kmeans_run<Label,Bounds>(CX,pts,assignment,dim,npts,nclus,maxiter,crit,ws);
 
   unsigned int res = restarts;
   if (res>0)
@@ -589,10 +1306,12 @@ PREC kmeans(PREC *CX,const PREC *X,unsigned int *assignment,unsigned int dim,uns
       PREC minsse = sse;
       unsigned int *order = (unsigned int*)malloc(npts*sizeof(unsigned int));
       PREC *bestCX = (PREC*) malloc(dim*nclus*sizeof(PREC));
-      unsigned int *bestassignment = (unsigned int*)malloc(npts*sizeof(unsigned int));
+      Label *bestassignment = (Label*)malloc(npts*sizeof(Label));
 
       memcpy(bestCX,CX,dim*nclus*sizeof(PREC));
-      memcpy(bestassignment,assignment,npts*sizeof(unsigned int));
+      memcpy(bestassignment,assignment,npts*sizeof(Label));
+      kmeans_criteria best;
+      if (crit)	best = *crit;
 
       while (res>0)
 	  {
@@ -601,9 +1320,9 @@ PREC kmeans(PREC *CX,const PREC *X,unsigned int *assignment,unsigned int dim,uns
 		  randperm(order,npts);
 		  for (unsigned int i=0; i<nclus; i++)
 			  for (unsigned int k=0; k<dim; k++ )
-				  CX[(i*dim)+k] = X[order[i]*dim+k];
+				  CX[(i*dim)+k] = X[(size_t)order[i]*dim+k];
 		
-		  sse = kmeans_run(CX,X,assignment,dim,npts,nclus,maxiter);
+		  sse = kmeans_run<Label,Bounds>(CX,pts,assignment,dim,npts,nclus,maxiter,crit,ws);
 		  if (sse<minsse)
 		  {
 #if KMEANS_VERBOSE>1
@@ -611,13 +1330,15 @@ PREC kmeans(PREC *CX,const PREC *X,unsigned int *assignment,unsigned int dim,uns
 #endif
 			  minsse = sse;
 			  memcpy(bestCX,CX,dim*nclus*sizeof(PREC));
-			  memcpy(bestassignment,assignment,npts*sizeof(unsigned int));
+			  memcpy(bestassignment,assignment,npts*sizeof(Label));
+			  if (crit)	best = *crit;
 		  }
 		  res--;
 
 	  }
       memcpy(CX,bestCX,dim*nclus*sizeof(PREC));
-      memcpy(assignment,bestassignment,npts*sizeof(unsigned int));
+      memcpy(assignment,bestassignment,npts*sizeof(Label));
+      if (crit)	*crit = best;
       sse = minsse;
       free(bestassignment);
       free(bestCX);
@@ -628,3 +1349,504 @@ PREC kmeans(PREC *CX,const PREC *X,unsigned int *assignment,unsigned int dim,uns
   return(sse);
 
 }
+
+PREC kmeans_weighted(PREC *CX,const PREC *X,const PREC *W,unsigned int *assignment,unsigned int dim,unsigned int npts,unsigned int nclus,unsigned int maxiter, unsigned int restarts)
+{
+	return(kmeans_t<unsigned int,float_bounds,dense_point>(CX,X,W,assignment,dim,npts,nclus,maxiter,restarts,NULL));
+}
+
+template <class Bounds>
+PREC kmeans_compact_t(PREC *CX,const PREC *X,const PREC *W,void *assignment,unsigned int label_bytes,unsigned int dim,unsigned int npts,unsigned int nclus,unsigned int maxiter, unsigned int restarts, kmeans_criteria *crit)
+{
+	if (label_bytes == 1 && nclus <= 256)
+		return(kmeans_t<unsigned char,Bounds,dense_point>(CX,X,W,(unsigned char *)assignment,dim,npts,nclus,maxiter,restarts,crit));
+	if (label_bytes == 2 && nclus <= 65536)
+		return(kmeans_t<unsigned short,Bounds,dense_point>(CX,X,W,(unsigned short *)assignment,dim,npts,nclus,maxiter,restarts,crit));
+	if (label_bytes == 4)
+		return(kmeans_t<unsigned int,Bounds,dense_point>(CX,X,W,(unsigned int *)assignment,dim,npts,nclus,maxiter,restarts,crit));
+	kmeans_error((char*)"Labels too small for the number of clusters\n");
+	return(0.0);
+}
+
+PREC kmeans_compact(PREC *CX,const PREC *X,const PREC *W,void *assignment,unsigned int label_bytes,unsigned int dim,unsigned int npts,unsigned int nclus,unsigned int maxiter, unsigned int restarts, unsigned int bounds)
+{
+	return(kmeans_until(CX,X,W,assignment,label_bytes,dim,npts,nclus,maxiter,restarts,bounds,NULL));
+}
+
+PREC kmeans_until(PREC *CX,const PREC *X,const PREC *W,void *assignment,unsigned int label_bytes,unsigned int dim,unsigned int npts,unsigned int nclus,unsigned int maxiter, unsigned int restarts, unsigned int bounds, kmeans_criteria *crit)
+{
+	switch (bounds)
+	{
+	case KMEANS_BOUNDS_FLOAT:
+		return(kmeans_compact_t<float_bounds>(CX,X,W,assignment,label_bytes,dim,npts,nclus,maxiter,restarts,crit));
+	case KMEANS_BOUNDS_HALF:
+		return(kmeans_compact_t<half_bounds>(CX,X,W,assignment,label_bytes,dim,npts,nclus,maxiter,restarts,crit));
+	case KMEANS_BOUNDS_UINT8:
+		return(kmeans_compact_t<quant_bounds>(CX,X,W,assignment,label_bytes,dim,npts,nclus,maxiter,restarts,crit));
+	}
+	kmeans_error((char*)"Unknown lower bound storage\n");
+	return(0.0);
+}
+
+/*
+ * Spherical kmeans: points and centers are scaled to unit length and each
+ * point goes to the center of largest dot product, through unit_point.  Rows
+ * of X not already of unit length are normalized once, into a copy; rows of
+ * length 0 are left as they are.  The centers in CX are normalized before the
+ * run and are the unit mean directions of their clusters after it.  As in
+ * kmeans_run, each point is compared only with the centers its bounds do not
+ * rule out, one dot product at a time.
+ */
+PREC kmeans_cosine(PREC *CX,const PREC *X,const PREC *W,unsigned int *assignment,unsigned int dim,unsigned int npts,unsigned int nclus,unsigned int maxiter, unsigned int restarts, kmeans_criteria *crit)
+{
+	bool unit = true;
+	const PREC *px = X;
+	for ( unsigned int i=0 ; i<npts && unit ; i++,px+=dim )
+	{
+		PREC n = compute_sqnorm(px,dim);
+		if (n > 0.0 && fabs(n-1.0) > BOUND_EPS)
+			unit = false;
+	}
+
+	PREC *U = NULL;
+	if (!unit)
+	{
+		U = (PREC *)malloc((size_t)npts*dim*sizeof(PREC));
+		if (U==NULL)	kmeans_error((char*)"Failed to allocate mem for normalized points");
+		memcpy(U,X,(size_t)npts*dim*sizeof(PREC));
+		PREC *pu = U;
+		for ( unsigned int i=0 ; i<npts ; i++,pu+=dim )
+		{
+			PREC n = sqrt(compute_sqnorm(pu,dim));
+			if (n > 0.0)
+				for ( unsigned int k=0 ; k<dim ; k++ )
+					pu[k] /= n;
+		}
+		X = U;
+	}
+	/* without CX, kmeans_t starts from random points, of unit length already */
+	if (CX!=NULL)
+	{
+		PREC *pcx = CX;
+		for ( unsigned int j=0 ; j<nclus ; j++,pcx+=dim )
+			unit_point::move_center(pcx,pcx,dim);
+	}
+
+	PREC sse = kmeans_t<unsigned int,float_bounds,unit_point>(CX,X,W,assignment,dim,npts,nclus,maxiter,restarts,crit);
+	free(U);
+	return(sse);
+}
+
+/*
+ * A workspace kept by the caller across runs, see kmeans_workspace.  Runs
+ * with it use unsigned int labels and BOUND_PREC lower bounds.
+ */
+kmeans_workspace *kmeans_workspace_new()
+{
+	return(new kmeans_workspace());
+}
+
+void kmeans_workspace_free(kmeans_workspace *ws)
+{
+	delete ws;
+}
+
+PREC kmeans_with_workspace(PREC *CX,const PREC *X,const PREC *W,unsigned int *assignment,unsigned int dim,unsigned int npts,unsigned int nclus,unsigned int maxiter, unsigned int restarts, kmeans_criteria *crit, kmeans_workspace *ws)
+{
+	return(kmeans_t<unsigned int,float_bounds,dense_point>(CX,X,W,assignment,dim,npts,nclus,maxiter,restarts,crit,ws));
+}
+
+/* nearest center of each point, as mpi_assign; returns the sse */
+PREC kmeans_assign(const PREC *CX, const PREC *X, unsigned int *c, unsigned int dim, unsigned int npts, unsigned int nclus)
+{
+	PREC sse = 0.0;
+	const PREC *px = X;
+	for ( unsigned int i=0 ; i<npts ; i++,px+=dim )
+	{
+		c[i] = assign_point_to_cluster_ordinary(px,CX,dim,nclus);
+		PREC d = compute_distance(px,CX+c[i]*dim,dim);
+		sse += d*d;
+	}
+	return(sse);
+}
+
+/*
+ * Many small independent problems in one call.  Problem p is rows offsets[p]
+ * to offsets[p+1] of X, with its nclus starting centers at CX + p*nclus*dim.
+ * The problems are handed out one at a time to nthreads threads, each with
+ * its own kmeans_workspace, so after the first few problems a thread runs
+ * kmeans_run without allocating.  A problem with at most nclus points gets a
+ * center on each point and keeps the remaining starting centers.
+ */
+struct kmeans_batch_job
+{
+	PREC *CX;
+	const PREC *X;
+	const unsigned int *offsets;
+	unsigned int *c;
+	PREC *sse;
+	unsigned int dim, nprob, nclus, maxiter;
+	unsigned int next;		/* next problem to hand out */
+};
+
+static void *kmeans_batch_worker(void *arg)
+{
+	kmeans_batch_job *job = (kmeans_batch_job *)arg;
+	kmeans_workspace ws;
+	unsigned int dim = job->dim, nclus = job->nclus;
+
+	for (;;)
+	{
+		unsigned int p = __sync_fetch_and_add(&job->next,1);
+		if (p >= job->nprob) break;
+
+		unsigned int npts = job->offsets[p+1] - job->offsets[p];
+		PREC *CX = job->CX + (size_t)p*nclus*dim;
+		const PREC *X = job->X + (size_t)job->offsets[p]*dim;
+		unsigned int *c = job->c + job->offsets[p];
+		if (npts <= nclus)
+		{
+			memcpy(CX,X,(size_t)npts*dim*sizeof(PREC));
+			for ( unsigned int i=0 ; i<npts ; i++ )
+				c[i] = i;
+			job->sse[p] = 0.0;
+			continue;
+		}
+		job->sse[p] = kmeans_t<unsigned int,float_bounds,dense_point>(CX,X,NULL,c,dim,npts,nclus,job->maxiter,0,NULL,&ws);
+	}
+	return(NULL);
+}
+
+void kmeans_batch(PREC *CX, const PREC *X, const unsigned int *offsets, unsigned int *c, PREC *sse, unsigned int dim, unsigned int nprob, unsigned int nclus, unsigned int maxiter, unsigned int nthreads)
+{
+	if (nclus == 0)	kmeans_error((char*)"Number of clusters is 0\n");
+
+	kmeans_batch_job job = {CX, X, offsets, c, sse, dim, nprob, nclus, maxiter, 0};
+
+	if (nthreads == 0)
+	{
+		long ncpu = sysconf(_SC_NPROCESSORS_ONLN);
+		nthreads = (ncpu > 0) ? (unsigned int)ncpu : 1;
+	}
+	if (nthreads > nprob)	nthreads = nprob;
+	if (nthreads <= 1)
+	{
+		kmeans_batch_worker(&job);
+		return;
+	}
+
+	pthread_t *threads = (pthread_t *)malloc(nthreads*sizeof(pthread_t));
+	if (threads==NULL)	kmeans_error((char*)"Failed to allocate mem for threads");
+	unsigned int started = 0;
+	for ( ; started<nthreads ; started++ )
+		if (pthread_create(&threads[started],NULL,kmeans_batch_worker,&job) != 0)
+			break;
+	/* the threads that started share all the problems between them */
+	if (started == 0)
+		kmeans_batch_worker(&job);
+	for ( unsigned int t=0 ; t<started ; t++ )
+		pthread_join(threads[t],NULL);
+	free(threads);
+}
+
+/*
+ * Model files.  Everything assignment needs besides the centers, which is
+ * O(nclus*nclus*dim) to compute, is stored with them, so a tool assigning
+ * points maps the file and starts at once.  The sections follow the header
+ * in the order of mpi_kmeans.h, all at multiples of their element size.
+ */
+size_t kmeans_model_bytes(unsigned int dim, unsigned int nclus)
+{
+	return(sizeof(kmeans_model_header) + ((size_t)nclus*dim + nclus)*sizeof(PREC)
+		   + ((size_t)nclus*nclus + nclus)*sizeof(BOUND_PREC));
+}
+
+void kmeans_model_fill(void *buf, const PREC *CX, unsigned int dim, unsigned int nclus)
+{
+	kmeans_model_header *h = (kmeans_model_header *)buf;
+	memset(h, 0, sizeof(kmeans_model_header));
+	h->magic = KMEANS_MODEL_MAGIC;
+	h->version = KMEANS_MODEL_VERSION;
+	h->dim = dim;
+	h->nclus = nclus;
+	h->prec_bytes = sizeof(PREC);
+	h->bound_bytes = sizeof(BOUND_PREC);
+
+	PREC *pcx = (PREC *)(h + 1);
+	PREC *cnorm = pcx + (size_t)nclus*dim;
+	BOUND_PREC *cl_dist = (BOUND_PREC *)(cnorm + nclus);
+	BOUND_PREC *s = cl_dist + (size_t)nclus*nclus;
+
+	memcpy(pcx, CX, (size_t)nclus*dim*sizeof(PREC));
+	for ( unsigned int j=0 ; j<nclus ; j++ )
+		cnorm[j] = compute_sqnorm(CX+(size_t)j*dim,dim);
+
+	bool *cluster_changed = (bool *)malloc(nclus * sizeof(bool));
+	if (cluster_changed==NULL)	kmeans_error((char*)"Failed to allocate mem for model");
+	for ( unsigned int j=0 ; j<nclus ; j++ )
+		cluster_changed[j] = true;
+	for ( unsigned int j=0 ; j<nclus ; j++ )
+		cl_dist[(size_t)j*nclus+j] = 0;
+	compute_cluster_distances(cl_dist, s, CX, dim, nclus, cluster_changed);
+	free(cluster_changed);
+}
+
+int kmeans_model_write(const char *filename, const PREC *CX, unsigned int dim, unsigned int nclus)
+{
+	size_t bytes = kmeans_model_bytes(dim,nclus);
+	void *buf = malloc(bytes);
+	if (buf==NULL)	kmeans_error((char*)"Failed to allocate mem for model");
+	kmeans_model_fill(buf, CX, dim, nclus);
+
+	FILE *f = fopen(filename, "wb");
+	int ok = f!=NULL && fwrite(buf, 1, bytes, f)==bytes;
+	if (f!=NULL && fclose(f)!=0)
+		ok = 0;
+	free(buf);
+	return(ok ? 0 : -1);
+}
+
+int kmeans_model_view(kmeans_model *m, const void *buf, size_t bytes)
+{
+	const kmeans_model_header *h = (const kmeans_model_header *)buf;
+	if (bytes < sizeof(kmeans_model_header) || h->magic != KMEANS_MODEL_MAGIC ||
+		h->version != KMEANS_MODEL_VERSION || h->prec_bytes != sizeof(PREC) ||
+		h->bound_bytes != sizeof(BOUND_PREC) || h->nclus == 0 ||
+		bytes != kmeans_model_bytes(h->dim,h->nclus))
+		return(-1);
+
+	m->dim = h->dim;
+	m->nclus = h->nclus;
+	m->CX = (const PREC *)(h + 1);
+	m->cnorm = m->CX + (size_t)m->nclus*m->dim;
+	m->cl_dist = (const BOUND_PREC *)(m->cnorm + m->nclus);
+	m->s = m->cl_dist + (size_t)m->nclus*m->nclus;
+	m->map = NULL;
+	m->bytes = bytes;
+	return(0);
+}
+
+kmeans_model *kmeans_model_open(const char *filename)
+{
+	int fd = open(filename, O_RDONLY);
+	if (fd < 0)
+		return(NULL);
+	struct stat st;
+	void *map = MAP_FAILED;
+	if (fstat(fd, &st)==0 && st.st_size > 0)
+		map = mmap(NULL, st.st_size, PROT_READ, MAP_SHARED, fd, 0);
+	close(fd);
+	if (map == MAP_FAILED)
+		return(NULL);
+
+	kmeans_model *m = (kmeans_model *)malloc(sizeof(kmeans_model));
+	if (m==NULL || kmeans_model_view(m, map, st.st_size)!=0)
+	{
+		free(m);
+		munmap(map, st.st_size);
+		return(NULL);
+	}
+	m->map = map;
+	return(m);
+}
+
+void kmeans_model_close(kmeans_model *m)
+{
+	if (m==NULL)
+		return;
+	if (m->map)
+		munmap(m->map, m->bytes);
+	free(m);
+}
+
+PREC kmeans_model_assign(const kmeans_model *m, const PREC *X, unsigned int *c, unsigned int npts)
+{
+	unsigned int dim = m->dim, nclus = m->nclus;
+	PREC sse = 0.0;
+	const PREC *px = X;
+	for ( unsigned int i=0 ; i<npts ; i++,px+=dim )
+	{
+		/* a center j is no closer than the current one a if the point is
+		   within half the distance between them, and none is if the point
+		   is within half the distance to the nearest other center */
+		unsigned int a = (i > 0) ? c[i-1] : 0;
+		PREC mind = compute_distance(px,m->CX+(size_t)a*dim,dim);
+		if (mind + BOUND_EPS > m->s[a])
+		{
+			for ( unsigned int j=0 ; j<nclus ; j++ )
+			{
+				if (j == a || mind + BOUND_EPS <= m->cl_dist[(size_t)a*nclus+j])
+					continue;
+				PREC d = compute_distance(px,m->CX+(size_t)j*dim,dim);
+				if (d < mind)
+				{
+					mind = d;
+					a = j;
+				}
+			}
+		}
+		c[i] = a;
+		sse += mind*mind;
+	}
+	return(sse);
+}
+
+/*
+ * Assignment of one shard of the points over several iterations, for
+ * data-parallel drivers that own the center update: each call takes the
+ * current centers, reassigns the points of the shard with the passes of
+ * kmeans_run (init_points, reassign_points) and its bounds, which stay
+ * allocated between calls, and returns the per cluster sums and counts of
+ * the shard.  As in kmeans_run the bounds follow the centers lazily, so a
+ * call that moves few points costs little more than the points it tests.
+ */
+
+/* the rows of a shard, with the plain sum of the points of each cluster in st.CX */
+struct shard_points
+{
+	const PREC *X;
+	unsigned int dim;
+
+	shard_points(const PREC *X, unsigned int dim) : X(X), dim(dim) {}
+
+	dense_point point(unsigned int i) const { return(dense_point(X+(size_t)i*dim,dim)); }
+
+	void add(unsigned int j, unsigned int i, int sign, cluster_stats &st) const
+	{
+		const PREC *px = X+(size_t)i*dim;
+		PREC *psum = st.CX+(size_t)j*dim;
+		for ( unsigned int k=0 ; k<dim ; k++ )
+			psum[k] += sign*px[k];
+		if (sign > 0)
+			st.CN[j]++;
+		else
+			st.CN[j]--;
+	}
+};
+
+struct kmeans_shard
+{
+	const PREC *X;
+	unsigned int *c;
+	unsigned int dim, npts, nclus;
+	unsigned int iteration;
+	PREC *CX;			/* centers of the last call */
+	PREC *sums;			/* sum of the points in each cluster */
+	unsigned int *CN;	/* number of points per cluster */
+	PREC *mindist;
+	float_bounds *low_b;
+	drift_history *lazy;
+	BOUND_PREC *cl_dist;
+	BOUND_PREC *s;
+	BOUND_PREC *offset;
+	bool *cluster_changed;
+};
+
+kmeans_shard *kmeans_shard_new(const PREC *X, unsigned int *c, unsigned int dim, unsigned int npts, unsigned int nclus)
+{
+	kmeans_shard *sh = (kmeans_shard *)calloc(1, sizeof(kmeans_shard));
+	if (sh==NULL)	kmeans_error((char*)"Failed to allocate mem for shard");
+
+	sh->X = X;
+	sh->c = c;
+	sh->dim = dim;
+	sh->npts = npts;
+	sh->nclus = nclus;
+	sh->iteration = 0;
+
+	sh->CX = (PREC *)calloc((size_t)nclus*dim, sizeof(PREC));
+	sh->sums = (PREC *)calloc((size_t)nclus*dim, sizeof(PREC));
+	sh->CN = (unsigned int *)calloc(nclus, sizeof(unsigned int));
+	sh->mindist = (PREC *)malloc(npts * sizeof(PREC));
+	sh->cl_dist = (BOUND_PREC *)calloc((size_t)nclus*nclus, sizeof(BOUND_PREC));
+	sh->s = (BOUND_PREC *)malloc(nclus * sizeof(BOUND_PREC));
+	sh->offset = (BOUND_PREC *)malloc(nclus * sizeof(BOUND_PREC));
+	sh->cluster_changed = (bool *)malloc(nclus * sizeof(bool));
+	if (sh->CX==NULL || sh->sums==NULL || sh->CN==NULL || sh->mindist==NULL ||
+		sh->cl_dist==NULL || sh->s==NULL || sh->offset==NULL || sh->cluster_changed==NULL)
+		kmeans_error((char*)"Failed to allocate mem for shard");
+	sh->lazy = new drift_history(npts,nclus);
+
+	/* as in kmeans_run, go without lower bounds if they do not fit */
+	sh->low_b = new float_bounds(npts,nclus);
+	if (!sh->low_b->ok())
+	{
+		delete sh->low_b;
+		sh->low_b = NULL;
+	}
+
+	return(sh);
+}
+
+unsigned int kmeans_shard_assign(kmeans_shard *sh, const PREC *CX, PREC *sums, unsigned int *counts, PREC *sse)
+{
+	unsigned int dim = sh->dim, npts = sh->npts, nclus = sh->nclus;
+	unsigned int *c = sh->c;
+	unsigned int nchanged = 0;
+
+	if (sh->iteration > 0)
+	{
+		/* the bounds follow the centers by how far each moved since the last call */
+		for ( unsigned int j=0 ; j<nclus ; j++ )
+			sh->offset[j] = (BOUND_PREC)compute_distance(sh->CX+(size_t)j*dim, CX+(size_t)j*dim, dim);
+		sh->lazy->advance(sh->offset);
+	}
+	memcpy(sh->CX, CX, (size_t)nclus*dim*sizeof(PREC));
+
+	/* all pairs, so that s is the distance to the closest of all the clusters */
+	for ( unsigned int j=0 ; j<nclus ; j++ )
+		sh->cluster_changed[j] = true;
+	compute_cluster_distances(sh->cl_dist, sh->s, sh->CX, dim, nclus, sh->cluster_changed);
+
+	shard_points pts(sh->X,dim);
+	cluster_stats st = {sh->sums, sh->CN, NULL, NULL};
+	if (sh->iteration == 0)
+	{
+		init_points(pts, sh->CX, c, dim, npts, nclus, sh->mindist, sh->low_b, sh->cl_dist, st);
+		nchanged = npts;
+	}
+	else
+		nchanged = reassign_points(pts, sh->CX, c, c, dim, npts, nclus, sh->mindist, sh->s, sh->cl_dist, sh->low_b, sh->lazy, sh->cluster_changed, st);
+	sh->iteration++;
+
+	memcpy(sums, sh->sums, (size_t)nclus*dim*sizeof(PREC));
+	memcpy(counts, sh->CN, nclus*sizeof(unsigned int));
+
+	/* summed point by point: expanding |x-cx|^2 into norms cancels badly
+	   for points far from the origin */
+	if (sse)
+		*sse = compute_sserror(sh->CX, sh->X, (const PREC *)NULL, c, dim, npts);
+
+	return(nchanged);
+}
+
+void kmeans_shard_free(kmeans_shard *sh)
+{
+	if (sh==NULL) return;
+	delete sh->low_b;
+	delete sh->lazy;
+	free(sh->cluster_changed);
+	free(sh->offset);
+	free(sh->s);
+	free(sh->cl_dist);
+	free(sh->mindist);
+	free(sh->CN);
+	free(sh->sums);
+	free(sh->CX);
+	free(sh);
+}
+
+/*
+ * kmeans_run for points given as the rows of a CSR matrix (data, indices,
+ * indptr) with dim columns, through sparse_points.  Centers are dense.
+ * Point-center distances come from sparse dot products and the squared norms
+ * of the points and centers, and the sums of the clusters are updated only at
+ * the nonzeros of the points that moved, so an iteration costs O(nnz) besides
+ * the O(nclus*dim) center update.  CX holds the starting centers and receives
+ * the result.
+ */
+PREC kmeans_csr(PREC *CX, const PREC *data, const unsigned int *indices, const unsigned int *indptr, unsigned int *c, unsigned int dim, unsigned int npts, unsigned int nclus, unsigned int maxiter)
+{
+	sparse_points pts(data,indices,indptr,dim,npts,nclus);
+	return(kmeans_run<unsigned int,float_bounds>(CX,pts,c,dim,npts,nclus,maxiter,NULL,NULL));
+}
@@ -30,8 +30,114 @@
 
 #define BOUND_EPS 1e-6
 
+struct kmeans_shard;
+struct kmeans_workspace;
+
+/*
+ * Binary model file: the header, then in native byte order
+ *   CX       nclus*dim PREC, the centers
+ *   cnorm    nclus PREC, their squared norms
+ *   cl_dist  nclus*nclus BOUND_PREC, half the distance between two centers
+ *   s        nclus BOUND_PREC, half the distance to the nearest other center
+ * so a file can be mmapped and used for assignment without any setup.
+ */
+#define KMEANS_MODEL_MAGIC 0x314d4d4b	/* "KMM1" */
+#define KMEANS_MODEL_VERSION 1
+
+struct kmeans_model_header
+{
+	unsigned int magic;
+	unsigned int version;
+	unsigned int dim, nclus;
+	unsigned int prec_bytes;	/* sizeof(PREC) */
+	unsigned int bound_bytes;	/* sizeof(BOUND_PREC) */
+	unsigned int reserved[2];
+};
+
+/* a model viewing a mapped file or a buffer */
+struct kmeans_model
+{
+	unsigned int dim, nclus;
+	const PREC *CX;
+	const PREC *cnorm;
+	const BOUND_PREC *cl_dist;
+	const BOUND_PREC *s;
+	void *map;			/* the mapping of kmeans_model_open, NULL for a buffer */
+	size_t bytes;
+};
+
+/* why kmeans_run stopped */
+#define KMEANS_STOP_CONVERGED 0	/* no point changed cluster */
+#define KMEANS_STOP_MAXITER 1	/* maxiter iterations */
+#define KMEANS_STOP_TOL 2	/* no center moved more than tol times the scale of the data */
+#define KMEANS_STOP_SSE 3	/* the sse went down by at most sse_rtol of itself */
+
+/* stopping criteria of kmeans_until, 0 to disable, and how the run ended */
+struct kmeans_criteria
+{
+	PREC tol;			/* scale is the root mean squared distance of the points to their mean */
+	PREC sse_rtol;
+	unsigned int iterations;	/* out */
+	unsigned int stop;		/* out, KMEANS_STOP_* */
+};
+
 extern "C"{
 PREC kmeans(PREC *CXp,const PREC *X,unsigned int *c,unsigned int dim,unsigned int npts,unsigned int nclus,unsigned int maxiter, unsigned int nr_restarts);
+
+/* W holds a weight for each point, NULL for unit weights */
+PREC kmeans_weighted(PREC *CXp,const PREC *X,const PREC *W,unsigned int *c,unsigned int dim,unsigned int npts,unsigned int nclus,unsigned int maxiter, unsigned int nr_restarts);
+
+/* storage of the lower bounds for kmeans_compact */
+#define KMEANS_BOUNDS_FLOAT 0	/* BOUND_PREC */
+#define KMEANS_BOUNDS_HALF 1	/* float16, rounded down */
+#define KMEANS_BOUNDS_UINT8 2	/* 8-bit multiples of a per point scale, rounded down */
+
+/* as kmeans_weighted, with labels of label_bytes (1, 2 or 4) each and the lower
+   bounds stored as given by bounds */
+PREC kmeans_compact(PREC *CXp,const PREC *X,const PREC *W,void *c,unsigned int label_bytes,unsigned int dim,unsigned int npts,unsigned int nclus,unsigned int maxiter, unsigned int nr_restarts, unsigned int bounds);
+
+/* as kmeans_compact, also stopping on crit (may be NULL), which reports the
+   number of iterations and the reason for stopping of the run returned */
+PREC kmeans_until(PREC *CXp,const PREC *X,const PREC *W,void *c,unsigned int label_bytes,unsigned int dim,unsigned int npts,unsigned int nclus,unsigned int maxiter, unsigned int nr_restarts, unsigned int bounds, kmeans_criteria *crit);
+
+/* nprob problems of nclus clusters each: rows offsets[p] to offsets[p+1] of X,
+   starting centers and result at CX + p*nclus*dim, labels in c and sse[p],
+   run on nthreads threads (0 for one per cpu) */
+void kmeans_batch(PREC *CX, const PREC *X, const unsigned int *offsets, unsigned int *c, PREC *sse, unsigned int dim, unsigned int nprob, unsigned int nclus, unsigned int maxiter, unsigned int nthreads);
+
+/* spherical kmeans, as kmeans_until with the points and centers scaled to unit
+   length and the nearest center being the one of largest dot product */
+PREC kmeans_cosine(PREC *CXp,const PREC *X,const PREC *W,unsigned int *c,unsigned int dim,unsigned int npts,unsigned int nclus,unsigned int maxiter, unsigned int nr_restarts, kmeans_criteria *crit);
+
+/* scratch memory reused by the runs given it, as kmeans_weighted with crit
+   (may be NULL) as for kmeans_until */
+kmeans_workspace *kmeans_workspace_new();
+void kmeans_workspace_free(kmeans_workspace *ws);
+PREC kmeans_with_workspace(PREC *CXp,const PREC *X,const PREC *W,unsigned int *c,unsigned int dim,unsigned int npts,unsigned int nclus,unsigned int maxiter, unsigned int nr_restarts, kmeans_criteria *crit, kmeans_workspace *ws);
+
+/* 0-based nearest center of each point into c; returns the sse */
+PREC kmeans_assign(const PREC *CX, const PREC *X, unsigned int *c, unsigned int dim, unsigned int npts, unsigned int nclus);
+
+/* model files, see kmeans_model_header: the size of a model, building one into
+   buf, writing one (0 on success), viewing a buffer (0 if it holds a model) and
+   mapping a file (NULL on failure) */
+size_t kmeans_model_bytes(unsigned int dim, unsigned int nclus);
+void kmeans_model_fill(void *buf, const PREC *CX, unsigned int dim, unsigned int nclus);
+int kmeans_model_write(const char *filename, const PREC *CX, unsigned int dim, unsigned int nclus);
+int kmeans_model_view(kmeans_model *m, const void *buf, size_t bytes);
+kmeans_model *kmeans_model_open(const char *filename);
+void kmeans_model_close(kmeans_model *m);
+
+/* as kmeans_assign with the centers of m, skipping centers by its cl_dist and s */
+PREC kmeans_model_assign(const kmeans_model *m, const PREC *X, unsigned int *c, unsigned int npts);
+
+/* X as a CSR matrix with dim columns; CX holds the starting centers */
+PREC kmeans_csr(PREC *CX, const PREC *data, const unsigned int *indices, const unsigned int *indptr, unsigned int *c, unsigned int dim, unsigned int npts, unsigned int nclus, unsigned int maxiter);
+
+/* resident bounds for assigning one shard of the points, see mpi_kmeans.cxx */
+kmeans_shard *kmeans_shard_new(const PREC *X, unsigned int *c, unsigned int dim, unsigned int npts, unsigned int nclus);
+unsigned int kmeans_shard_assign(kmeans_shard *sh, const PREC *CX, PREC *sums, unsigned int *counts, PREC *sse);
+void kmeans_shard_free(kmeans_shard *sh);
 }
 PREC compute_distance(const PREC *vec1, const PREC *vec2, const unsigned int dim);
 unsigned int assign_point_to_cluster_ordinary(const PREC *px, const PREC *CX, unsigned int dim,unsigned int nclus);
@@ -6,15 +6,33 @@ from numpy.ctypeslib import ndpointer
 import numpy as N
 from numpy import empty,array,reshape,arange
 
-def kmeans(X, nclst, maxiter=0, numruns=1):
-    """Wrapper for Peter Gehlers accelerated MPI-Kmeans routine."""
+_lib = None
+
+def load_library():
+    """Load libmpikmeans.so on the first call and return it."""
+    global _lib
+    if _lib is None:
+        mpikmeanslib = N.ctypeslib.load_library("libmpikmeans.so", ".")
+        mpikmeanslib.kmeans.restype = c_double
+        mpikmeanslib.kmeans.argtypes = [ndpointer(dtype=c_double, ndim=1, flags='C_CONTIGUOUS'), \
+                                        ndpointer(dtype=c_double, ndim=1, flags='C_CONTIGUOUS'), \
+                                        ndpointer(dtype=c_uint, ndim=1, flags='C_CONTIGUOUS'), \
+                                        c_uint, c_uint, c_uint, c_uint, c_uint ]
+        mpikmeanslib.kmeans_weighted.restype = c_double
+        mpikmeanslib.kmeans_weighted.argtypes = [ndpointer(dtype=c_double, ndim=1, flags='C_CONTIGUOUS'), \
+                                                 ndpointer(dtype=c_double, ndim=1, flags='C_CONTIGUOUS'), \
+                                                 ndpointer(dtype=c_double, ndim=1, flags='C_CONTIGUOUS'), \
+                                                 ndpointer(dtype=c_uint, ndim=1, flags='C_CONTIGUOUS'), \
+                                                 c_uint, c_uint, c_uint, c_uint, c_uint ]
+        _lib = mpikmeanslib
+    return _lib
+
+def kmeans(X, nclst, maxiter=0, numruns=1, weights=None):
+    """Wrapper for Peter Gehlers accelerated MPI-Kmeans routine.
+
+    weights, if given, holds one nonnegative weight per point."""
     
-    mpikmeanslib = N.ctypeslib.load_library("libmpikmeans.so", ".")
-    mpikmeanslib.kmeans.restype = c_double
-    mpikmeanslib.kmeans.argtypes = [ndpointer(dtype=c_double, ndim=1, flags='C_CONTIGUOUS'), \
-                                    ndpointer(dtype=c_double, ndim=1, flags='C_CONTIGUOUS'), \
-                                    ndpointer(dtype=c_uint, ndim=1, flags='C_CONTIGUOUS'), \
-                                    c_uint, c_uint, c_uint, c_uint, c_uint ]
+    mpikmeanslib = load_library()
     
     npts,dim = X.shape
     assignments=empty( (npts), c_uint )
@@ -24,7 +42,11 @@ def kmeans(X, nclst, maxiter=0, numruns=1):
     Xvec = array( reshape( X, (-1,) ), c_double )
     permutation = N.random.permutation( range(npts) ) # randomize order of points
     CX = array(X[permutation[:nclst],:], c_double).flatten()
-    SSE = mpikmeanslib.kmeans( CX, Xvec, assignments, dim, npts, min(nclst, npts), maxiter, numruns)
+    if weights is None:
+        SSE = mpikmeanslib.kmeans( CX, Xvec, assignments, dim, npts, min(nclst, npts), maxiter, numruns)
+    else:
+        W = array( weights, c_double ).flatten()
+        SSE = mpikmeanslib.kmeans_weighted( CX, Xvec, W, assignments, dim, npts, min(nclst, npts), maxiter, numruns)
     return reshape(CX, (nclst,dim)), SSE, (assignments+1)
 
 
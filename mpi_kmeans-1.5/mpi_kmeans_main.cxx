@@ -11,6 +11,7 @@
 #include <boost/filesystem.hpp>
 
 #include <stdlib.h>
+#include <string.h>
 #include <math.h>
 #include <assert.h>
 
@@ -204,6 +205,7 @@ int main(int argc, char* argv[]) {
 
 	std::string train_filename;
 	std::string output_filename;
+	std::string model_filename;
 	int nof_clusters;
 	int nof_restarts;
 	int maxiter;
@@ -223,6 +225,8 @@ int main(int argc, char* argv[]) {
 		("output",po::value<std::string>
 		 (&output_filename)->default_value("output.txt"),
 		 "Output file, one cluster center per line")
+		("model",po::value<std::string>(&model_filename),
+		 "Binary model file (centers, norms, cl_dist and s) for mpi_assign --model")
 		;
 
 	po::options_description kmeans_options("K-Means Options");
@@ -278,8 +282,15 @@ int main(int argc, char* argv[]) {
 	std::cout << " ... with " << nof_points << " training points " <<std::endl;
 	std::cout << " ... for " << nof_clusters << " clusters " <<std::endl;
 
-	unsigned int *assignment = (unsigned int *)malloc(nof_points * sizeof(unsigned int));
+	unsigned int *assignment = (unsigned int *)calloc(nof_points, sizeof(unsigned int));
 	double *CX = (double *) calloc(nof_clusters * dims, sizeof(double));
+
+	// start from nof_clusters random points, not from identical centers
+	unsigned int *order = (unsigned int *)malloc(nof_points * sizeof(unsigned int));
+	randperm(order, nof_points);
+	for (int m=0; m < std::min(nof_clusters, nof_points); ++m)
+		memcpy(CX + m*dims, X + order[m]*dims, dims * sizeof(double));
+	free(order);
 	double sse = kmeans(CX, X, assignment, dims, nof_points, nof_clusters, maxiter, nof_restarts);
 	free(X); 
 	assert(CX);
@@ -290,6 +301,15 @@ int main(int argc, char* argv[]) {
 	// write the clusters
 	// write_cluster_centers(output_filename,data_X);
 	write_cluster_centers(output_filename,CX,nof_clusters,dims);
+	if (model_filename.size() > 0) {
+		std::cout << "Writing model to \""
+				  << model_filename << "\"" << std::endl;
+		if (kmeans_model_write(model_filename.c_str(),CX,dims,nof_clusters) != 0) {
+			std::cerr << "Failed to write \"" << model_filename
+					  << "\"." << std::endl;
+			exit(EXIT_FAILURE);
+		}
+	}
 
 	// done
 	exit(EXIT_SUCCESS);
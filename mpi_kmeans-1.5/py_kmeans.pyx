@@ -0,0 +1,81 @@
+# cython: language_level=3, boundscheck=False, wraparound=False
+"""
+Cython wrapper of the MPI-Kmeans C core.
+
+X is any C-contiguous (npts, dim) float64 buffer (an ndarray, a memoryview,
+shared memory, ...); other arrays are converted to one first.  The C core
+runs with the GIL released, so clusterings started from several Python
+threads run on several cores at once.  Labels are 1-based, as from
+mpi_kmeans and mpi_assign.  Inside the kmeans package each call is recorded
+in kmeans.trace as one span of the "mpi" backend; built on its own, the
+module traces nothing.
+"""
+
+import time
+
+import numpy as np
+
+try:
+    from kmeans.trace import ASSIGN, RUN, record
+except ImportError:
+    # outside the kmeans package
+    ASSIGN = RUN = None
+
+    def record(*args, **counters):
+        pass
+
+cdef extern from "mpi_kmeans.h" nogil:
+    double c_kmeans "kmeans" (double *CXp, const double *X, unsigned int *c, unsigned int dim, unsigned int npts, unsigned int nclus, unsigned int maxiter, unsigned int nr_restarts)
+    double c_kmeans_assign "kmeans_assign" (const double *CX, const double *X, unsigned int *c, unsigned int dim, unsigned int npts, unsigned int nclus)
+
+
+def kmeans(X, unsigned int num_clusters, unsigned int maxiter=0, unsigned int num_runs=1):
+    """kmeans(X, num_clusters [, maxiter [, num_runs]]) returns (centroids, sse, labels)
+
+    The starting centroids are num_clusters random points of X, drawn with
+    np.random.  num_runs is passed to the C core as the number of restarts."""
+    cdef const double[:, ::1] x = np.ascontiguousarray(X, dtype=np.double)
+    cdef unsigned int num_points = x.shape[0]
+    cdef unsigned int dim = x.shape[1]
+    cdef double dist
+    if num_points == 0 or dim == 0:
+        raise ValueError("X is empty")
+    num_clusters = <unsigned int> min(num_clusters, num_points)
+    assignments = np.empty(num_points, dtype=np.uintc)
+    if num_clusters == num_points:
+        # the C core only copies the points for this
+        assignments[:] = np.arange(num_points)
+    cdef unsigned int[::1] a = assignments
+    permutation = np.random.permutation(num_points)
+    centroids = np.array(np.asarray(x)[permutation[:num_clusters], :], order='C')
+    cdef double[:, ::1] cx = centroids
+    t1 = time.time()
+    with nogil:
+        dist = c_kmeans(&cx[0, 0], &x[0, 0], &a[0], dim, num_points, num_clusters, maxiter, num_runs)
+    record(RUN, t1, time.time(), "mpi", points=num_points, clusters=num_clusters)
+    assignments += 1
+    return centroids, dist, assignments
+
+
+def assign(X, centroids):
+    """assign(X, centroids) returns (labels, sse)
+
+    The nearest of the (num_clusters, dim) centroids for each point of X."""
+    cdef const double[:, ::1] x = np.ascontiguousarray(X, dtype=np.double)
+    cdef const double[:, ::1] cx = np.ascontiguousarray(centroids, dtype=np.double)
+    cdef unsigned int num_points = x.shape[0]
+    cdef unsigned int dim = x.shape[1]
+    cdef unsigned int num_clusters = cx.shape[0]
+    cdef double sse
+    if cx.shape[1] != dim:
+        raise ValueError("X and centroids differ in dimension")
+    if num_points == 0 or num_clusters == 0:
+        raise ValueError("X or centroids is empty")
+    assignments = np.empty(num_points, dtype=np.uintc)
+    cdef unsigned int[::1] a = assignments
+    t1 = time.time()
+    with nogil:
+        sse = c_kmeans_assign(&cx[0, 0], &x[0, 0], &a[0], dim, num_points, num_clusters)
+    record(ASSIGN, t1, time.time(), "mpi", "assign", points=num_points)
+    assignments += 1
+    return assignments, sse
@@ -0,0 +1,63 @@
+import asyncio
+
+import numpy as np
+import pytest
+
+from kmeans import async_kmeans, cpu_kmeans, libmpikmeans
+
+#------------------------------------------------------------------------------------
+#               async fit: the iterations of the sync paths, and when they stop
+#------------------------------------------------------------------------------------
+
+MAX_ITER = 50
+BACKENDS = ["cpu", pytest.param("mpi", marks = pytest.mark.skipif(
+    libmpikmeans.library_path() is None, reason = "libmpikmeans is not built"))]
+
+
+@pytest.fixture(scope = "module")
+def data():
+    rs = np.random.RandomState(21)
+    centers = rs.randn(5, 3) * 6
+    X = centers[rs.randint(0, 5, 2000)] + rs.randn(2000, 3)
+    return X, X[:5].copy()
+
+def updates_to_converge(X, init):
+    # returns (clusters, labels, number of center updates) of kmeans_cpu's iterations
+    # run until no label changes
+    data = X.T.astype(np.float32)
+    clusters = init.T.astype(np.float32)
+    labels = None
+    for n in range(MAX_ITER):
+        new = cpu_kmeans.assign_cpu(data, clusters)
+        if labels is not None and (new == labels.ravel()).all():
+            return clusters.T, new, n
+        labels = new
+        clusters = cpu_kmeans.calc_cpu(data, labels, clusters)
+    raise AssertionError("no convergence in %d iterations" % MAX_ITER)
+
+async def collect(X, init, backend):
+    return [p async for p in async_kmeans.fit_progress(X, init, MAX_ITER, backend,
+                                                       pool = async_kmeans.Pool(2))]
+
+@pytest.mark.parametrize("backend", BACKENDS)
+def test_stops_when_labels_unchanged(data, backend):
+    X, init = data
+    expected, labels, updates = updates_to_converge(X, init)
+    assert updates < MAX_ITER
+    reports = asyncio.run(collect(X, init, backend))
+    # one report per center update, then the result
+    assert len(reports) == updates + 1
+    assert [p.iteration for p in reports[:-1]] == list(range(updates))
+    last = reports[-1]
+    assert last.done and last.iteration == updates
+    assert (last.labels == labels).all()
+    np.testing.assert_allclose(last.clusters, expected, rtol = 1e-5, atol = 1e-5)
+    diff = X - last.clusters[last.labels]
+    assert last.sse == pytest.approx((diff * diff).sum(), rel = 1e-5)
+
+def test_iterations_cap(data):
+    X, init = data
+    reports = asyncio.run(collect(X, init, "cpu"))
+    capped = asyncio.run(async_kmeans.fit(X, init, 1, "cpu", pool = async_kmeans.Pool(1)))
+    first = reports[1].clusters
+    np.testing.assert_allclose(capped[0], first, rtol = 1e-6)
@@ -0,0 +1,190 @@
+import numpy as np
+import pytest
+
+import kmeans
+from kmeans import libmpikmeans
+
+pytestmark = pytest.mark.skipif(libmpikmeans.library_path() is None,
+                                reason = "libmpikmeans is not built")
+
+#------------------------------------------------------------------------------------
+#               the C core against plain Lloyd iterations in numpy
+#------------------------------------------------------------------------------------
+#
+# The bounds of kmeans_run (lower bounds, stored compactly or not, applied
+# lazily) only skip distances that cannot change an assignment, so every entry
+# point of the C core must give the labels and centers of plain Lloyd
+# iterations from the same start.  The data has well separated clusters, so
+# no cluster empties and no point lies within BOUND_EPS of two centers.
+
+SEED = 7
+K = 8
+
+
+def lloyd(X, init, iterations = 0, weights = None):
+    # returns (centers, labels) after iterations moves of the centers, or at
+    # convergence for 0; labels are the nearest of the centers returned
+    centers = np.array(init, dtype = np.float64)
+    w = np.ones(len(X)) if weights is None else weights
+    labels = None
+    i = 0
+    while iterations == 0 or i < iterations:
+        dist = ((X[:, np.newaxis, :] - centers[np.newaxis]) ** 2).sum(2)
+        new = dist.argmin(1)
+        if labels is not None and (new == labels).all():
+            break
+        labels = new
+        for j in range(len(centers)):
+            centers[j] = np.average(X[labels == j], axis = 0, weights = w[labels == j])
+        i += 1
+    dist = ((X[:, np.newaxis, :] - centers[np.newaxis]) ** 2).sum(2)
+    return centers, dist.argmin(1)
+
+@pytest.fixture(scope = "module")
+def data():
+    rs = np.random.RandomState(SEED)
+    centers = rs.randn(K, 5) * 6
+    X = centers[rs.randint(0, K, 4000)] + rs.randn(4000, 5)
+    init = X[rs.permutation(len(X))[:K]].copy()
+    return X, init
+
+def check(result, expected):
+    (centers, labels) = result
+    assert (np.asarray(labels) == expected[1]).all()
+    np.testing.assert_allclose(centers, expected[0], rtol = 1e-9, atol = 1e-9)
+
+
+@pytest.mark.parametrize("iterations", [0, 1, 3])
+@pytest.mark.parametrize("compact", [None, "float16", "uint8"])
+def test_kmeans(data, iterations, compact):
+    X, init = data
+    centers, sse, labels = libmpikmeans.kmeans(X, K, iterations, clusters = init,
+                                               compact = compact)
+    check((centers, labels), lloyd(X, init, iterations))
+
+def test_weighted(data):
+    X, init = data
+    weights = np.random.RandomState(SEED).rand(len(X))
+    centers, sse, labels = libmpikmeans.kmeans(X, K, clusters = init, weights = weights)
+    check((centers, labels), lloyd(X, init, weights = weights))
+
+def test_py_kmeans_seed(data):
+    # py_kmeans starts from the points of np.random.permutation; no restarts
+    py_kmeans = pytest.importorskip("kmeans.py_kmeans")
+    X = data[0]
+    np.random.seed(SEED)
+    init = X[np.random.permutation(len(X))[:K]]
+    np.random.seed(SEED)
+    centers, sse, labels = py_kmeans.kmeans(X, K, 0, 0)
+    check((centers, labels - 1), lloyd(X, init))
+
+def test_model_class(data):
+    X, init = data
+    model = libmpikmeans.KMeans(K)
+    try:
+        for i in range(2):      # the second fit reuses the workspace
+            model.fit(X, init)
+            check((model.clusters, model.labels_), lloyd(X, init))
+        assert (model.predict(X[:100]) == model.labels_[:100]).all()
+    finally:
+        model.close()
+
+def test_batch(data):
+    X, init = data
+    problems = np.stack([X[:2000], X[2000:]])
+    starts = np.stack([X[:K], X[2000:2000 + K]])
+    centers, sse, labels = libmpikmeans.kmeans_batch(problems, K, clusters = starts)
+    for p in range(2):
+        check((centers[p], labels[p]), lloyd(problems[p], starts[p]))
+
+def test_csr(data):
+    sparse = pytest.importorskip("scipy.sparse")
+    X, init = data
+    X = np.where(np.abs(X) > 4., X, 0.)       # about half the entries zero
+    centers, sse, labels = libmpikmeans.kmeans_csr(sparse.csr_matrix(X), init)
+    check((centers, labels), lloyd(X, init))
+
+def test_cosine_without_centers(data):
+    # kmeans_cosine with CX NULL draws its own start; at convergence the sse is
+    # that of the unit mean directions of the labels returned
+    import ctypes
+    X = np.ascontiguousarray(data[0])
+    cosine = ctypes.CDLL(libmpikmeans.library_path()).kmeans_cosine
+    cosine.restype = ctypes.c_double
+    labels = np.zeros(len(X), np.uint32)
+    sse = cosine(None, ctypes.c_void_p(X.ctypes.data), None, ctypes.c_void_p(labels.ctypes.data),
+                 X.shape[1], len(X), K, 0, 0, None)
+    assert labels.max() < K
+    U = X / np.sqrt((X * X).sum(1))[:, np.newaxis]
+    centers = np.array([U[labels == j].sum(0) for j in range(K)])
+    centers /= np.sqrt((centers * centers).sum(1))[:, np.newaxis]
+    assert sse == pytest.approx((2. - 2. * (U * centers[labels]).sum(1)).sum(), rel = 1e-9)
+
+def test_shard(data):
+    X, init = data
+    expected = lloyd(X, init, 4)
+    shard = libmpikmeans.Shard(np.ascontiguousarray(X), K)
+    try:
+        centers = init.copy()
+        for i in range(5):
+            sums, counts, sse, nchanged = shard.assign(centers)
+            if i < 4:
+                centers = sums / counts[:, np.newaxis]
+        check((centers, shard.labels), expected)
+    finally:
+        shard.close()
+
+def test_dispatch_seed(data):
+    # a fixed seed gives the same start, hence the same result, on every backend
+    X = data[0]
+    centers, labels = kmeans.kmeans(X, K, 20, seed = SEED, backend = "mpi")
+    reference, reference_labels = kmeans.kmeans(X, K, 20, seed = SEED, backend = "cpu")
+    assert (labels == reference_labels).all()
+    np.testing.assert_allclose(centers, reference, rtol = 1e-5, atol = 1e-5)
+
+
+#------------------------------------------------------------------------------------
+#                       sse and stopping criteria far from the origin
+#------------------------------------------------------------------------------------
+#
+# Shifting the data shifts the centers and changes nothing else: the sse
+# returned stays exact, and tol and sse_rtol, which the C core evaluates from
+# per cluster moments around the means, stop a run after the same iterations.
+
+OFFSETS = (0., 1e3, 1e6)
+
+
+def exact_sse(X, centers, labels, weights = None):
+    diff = X - centers[labels]
+    d = (diff * diff).sum(1)
+    return float(np.sum(d if weights is None else weights * d))
+
+@pytest.mark.parametrize("offset", OFFSETS)
+def test_sse_exact(data, offset):
+    X, init = data
+    weights = np.random.RandomState(SEED).rand(len(X))
+    centers, sse, labels = libmpikmeans.kmeans(X + offset, K, 3, clusters = init + offset,
+                                               weights = weights)
+    assert sse == pytest.approx(exact_sse(X + offset, centers, labels, weights), rel = 1e-12)
+
+def test_sse_exact_cosine(data):
+    X, init = data
+    X = X / np.sqrt((X * X).sum(1))[:, np.newaxis]
+    centers, sse, labels = libmpikmeans.kmeans(X, K, 3, clusters = init, metric = "cosine")
+    assert sse == pytest.approx(exact_sse(X, centers, labels), rel = 1e-12)
+
+@pytest.mark.parametrize("criterion", [{"tol": 1e-2}, {"sse_rtol": 1e-3}])
+def test_criteria_shift_invariant(criterion):
+    # overlapping clusters, so the run goes on long enough for the criteria to stop it
+    rs = np.random.RandomState(SEED)
+    X = rs.randn(5000, 3)
+    init = X[:K].copy()
+    runs = [libmpikmeans.kmeans(X + offset, K, clusters = init + offset, full_output = True,
+                                **criterion) for offset in OFFSETS]
+    stops = [info["stop"] for (centers, sse, labels, info) in runs]
+    assert stops == [list(criterion)[0]] * len(OFFSETS)
+    iterations = [info["iterations"] for (centers, sse, labels, info) in runs]
+    assert iterations == [iterations[0]] * len(OFFSETS)
+    for (offset, (centers, sse, labels, info)) in zip(OFFSETS, runs):
+        assert (labels == runs[0][2]).all()
+        assert sse == pytest.approx(runs[0][1], rel = 1e-6)
@@ -0,0 +1,155 @@
+import numpy as np
+import pytest
+
+from kmeans import cpu_kmeans, libmpikmeans, ooc_kmeans
+
+needs_core = pytest.mark.skipif(libmpikmeans.library_path() is None,
+                                reason = "libmpikmeans is not built")
+
+#------------------------------------------------------------------------------------
+#           data-parallel and out-of-core drivers against cpu_kmeans
+#------------------------------------------------------------------------------------
+#
+# Every driver runs the same Lloyd iterations as cpu_kmeans.kmeans_cpu from the
+# same start, so after the same number of iterations the centers agree up to
+# the float32 of cpu_kmeans, and the labels are the nearest of those centers.
+
+ITERATIONS = (1, 2, 5)
+
+
+@pytest.fixture(scope = "module")
+def data():
+    rs = np.random.RandomState(0)
+    centers = rs.randn(6, 4) * 3
+    X = centers[rs.randint(0, 6, 3000)] + rs.randn(3000, 4)
+    return X, X[:6].copy()
+
+def reference(X, init, iterations):
+    # returns (clusters, labels of the last assignment, nearest of the clusters)
+    clusters, labels = cpu_kmeans.kmeans_cpu(X.T.copy(), init.T.copy(), iterations)
+    nearest = cpu_kmeans.assign_cpu(X.T, clusters.astype(np.float64))
+    return clusters.T, labels, nearest
+
+def check_centers(clusters, expected):
+    np.testing.assert_allclose(clusters, expected, rtol = 1e-5, atol = 1e-5)
+
+
+@pytest.mark.parametrize("iterations", ITERATIONS)
+def test_ooc_array(data, iterations):
+    X, init = data
+    expected, labels, nearest = reference(X, init, iterations)
+    out = np.zeros(len(X), np.int32)
+    clusters, out = ooc_kmeans.kmeans_ooc(X, init, iterations, chunk_size = 700, labels = out)
+    check_centers(clusters, expected)
+    assert (out == labels).all()
+
+def test_ooc_raw_file(data, tmp_path):
+    X, init = data
+    expected, labels, nearest = reference(X, init, 5)
+    filename = str(tmp_path / "points.f64")
+    X.tofile(filename)
+    clusters, out = ooc_kmeans.kmeans_ooc(filename, init, 5, chunk_size = 1000,
+                                          nDim = X.shape[1], dtype = np.float64,
+                                          labels = np.zeros(len(X), np.int32))
+    check_centers(clusters, expected)
+    assert (out == labels).all()
+
+@pytest.mark.parametrize("dist_size", [1 << 30, 3000 * 4, 3000])
+def test_assign_chunk_blocks(data, dist_size):
+    # blocks of centers, down to one at a time, pick the same nearest center
+    X = data[0]
+    clusters = X[10:40]
+    cnorm = (clusters * clusters).sum(1)
+    dist = ((X[:, np.newaxis, :] - clusters[np.newaxis]) ** 2).sum(2)
+    assign = ooc_kmeans.assign_chunk(X, clusters, cnorm, dist_size = dist_size)
+    assert (assign == dist.argmin(1)).all()
+
+@needs_core
+@pytest.mark.parametrize("iterations", ITERATIONS)
+def test_shm(data, iterations):
+    from kmeans import shm_kmeans
+    X, init = data
+    expected, labels, nearest = reference(X, init, iterations)
+    clusters, out, sse = shm_kmeans.kmeans_shm(X, init, iterations, processes = 2)
+    check_centers(clusters, expected)
+    assert (out == nearest).all()
+    diff = X - clusters[out]
+    assert sse == pytest.approx((diff * diff).sum(), rel = 1e-9)
+
+# the sse of the shards against plain numpy, with the data far from the origin
+OFFSETS = (0., 1e6, 1e8)
+
+def offset_data(data, offset):
+    X, init = data
+    return X + offset, init + offset
+
+def numpy_sse(X, clusters, labels):
+    diff = X - clusters[labels]
+    return (diff * diff).sum()
+
+def numpy_nearest(X, clusters):
+    return ((X[:, np.newaxis, :] - clusters[np.newaxis]) ** 2).sum(2).argmin(1)
+
+@needs_core
+@pytest.mark.parametrize("offset", OFFSETS)
+def test_shard_sse_offset(data, offset):
+    X, init = offset_data(data, offset)
+    shard = libmpikmeans.Shard(np.ascontiguousarray(X), len(init))
+    try:
+        clusters = init.copy()
+        for i in range(4):
+            sums, counts, sse, nchanged = shard.assign(clusters)
+            assert (shard.labels == numpy_nearest(X, clusters)).all()
+            assert sse == pytest.approx(numpy_sse(X, clusters, shard.labels), rel = 1e-9)
+            clusters = sums / np.maximum(counts, 1)[:, np.newaxis]
+    finally:
+        shard.close()
+
+@needs_core
+@pytest.mark.parametrize("offset", OFFSETS)
+def test_shm_sse_offset(data, offset):
+    from kmeans import shm_kmeans
+    X, init = offset_data(data, offset)
+    clusters, out, sse = shm_kmeans.kmeans_shm(X, init, 5, processes = 2)
+    assert (out == numpy_nearest(X, clusters)).all()
+    assert sse == pytest.approx(numpy_sse(X, clusters, out), rel = 1e-9)
+
+@needs_core
+@pytest.mark.parametrize("iterations", ITERATIONS)
+def test_dist(data, iterations):
+    from kmeans import dist_kmeans
+    X, init = data
+    expected, labels, nearest = reference(X, init, iterations)
+    addresses, workers = dist_kmeans.start_local_workers(np.array_split(X, 3))
+    clusters, sse = dist_kmeans.kmeans_dist(addresses, init, iterations)
+    out = np.concatenate([conn.recv() for (p, conn) in workers])
+    for (p, conn) in workers:
+        p.join()
+    check_centers(clusters, expected)
+    assert (out == nearest).all()
+    diff = X - clusters[out]
+    assert sse == pytest.approx((diff * diff).sum(), rel = 1e-9)
+
+@needs_core
+@pytest.mark.parametrize("offset", OFFSETS)
+def test_dist_sse_offset(data, offset):
+    from kmeans import dist_kmeans
+    X, init = offset_data(data, offset)
+    addresses, workers = dist_kmeans.start_local_workers(np.array_split(X, 3))
+    clusters, sse = dist_kmeans.kmeans_dist(addresses, init, 5)
+    out = np.concatenate([conn.recv() for (p, conn) in workers])
+    for (p, conn) in workers:
+        p.join()
+    assert (out == numpy_nearest(X, clusters)).all()
+    assert sse == pytest.approx(numpy_sse(X, clusters, out), rel = 1e-9)
+
+@needs_core
+@pytest.mark.parametrize("offset", OFFSETS)
+def test_mpi_sse_offset(data, offset):
+    # one rank holding all the points
+    pytest.importorskip("mpi4py")
+    from kmeans import dist_kmeans
+    X, init = offset_data(data, offset)
+    clusters, out, sse = dist_kmeans.kmeans_mpi(X, init, 5)
+    assert (out == numpy_nearest(X, clusters)).all()
+    assert sse == pytest.approx(numpy_sse(X, clusters, out), rel = 1e-9)
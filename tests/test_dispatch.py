@@ -0,0 +1,58 @@
+import numpy as np
+import pytest
+
+import kmeans
+from kmeans import dispatch
+
+#------------------------------------------------------------------------------------
+#                   dispatcher: cost model and edge cases on every backend
+#------------------------------------------------------------------------------------
+
+CPU_BACKENDS = [b for b in kmeans.available_backends() if b not in ("cuda", "tri")]
+
+
+@pytest.fixture(scope = "module")
+def data():
+    rs = np.random.RandomState(11)
+    return rs.randn(40, 3)
+
+@pytest.mark.parametrize("backend", CPU_BACKENDS)
+@pytest.mark.parametrize("start", ["seed", "init"])
+def test_one_center_per_point(data, backend, start):
+    # k >= nPts: every point is its own center, whatever the backend
+    X = data
+    if start == "seed":
+        centers, labels = kmeans.kmeans(X, len(X) + 5, 5, seed = 1, backend = backend)
+    else:
+        centers, labels = kmeans.kmeans(X, len(X), 5, init = X[::-1].copy(), backend = backend)
+    assert centers.shape == X.shape
+    assert labels.dtype == np.int32
+    assert sorted(labels) == list(range(len(X)))
+    np.testing.assert_allclose(centers[labels], X, rtol = 1e-6, atol = 1e-6)
+
+@pytest.mark.skipif("shm" not in CPU_BACKENDS, reason = "libmpikmeans is not built")
+@pytest.mark.parametrize("threads", [1, 3])
+def test_shm_matches_mpi(threads):
+    rs = np.random.RandomState(12)
+    X = rs.randn(3000, 4) + rs.randint(0, 5, (3000, 1)) * 4.
+    init = X[:6].copy()
+    centers, labels = kmeans.kmeans(X, 6, 20, init = init, backend = "shm", threads = threads)
+    reference, reference_labels = kmeans.kmeans(X, 6, 20, init = init, backend = "mpi")
+    assert (labels == reference_labels).all()
+    np.testing.assert_allclose(centers, reference, rtol = 1e-12)
+
+def test_threads_in_cost_model(monkeypatch):
+    monkeypatch.setattr(dispatch, "_cost_model", {})
+    n, d, k = 10 ** 6, 32, 64
+    one = dispatch.predict("shm", n, d, k, threads = 1)
+    eight = dispatch.predict("shm", n, d, k, threads = 8)
+    assert eight < one
+    # backends outside THREADED run on one thread whatever is asked
+    assert dispatch.predict("mpi", n, d, k, threads = 8) == dispatch.predict("mpi", n, d, k)
+    backends = ["mpi", "shm"]
+    assert dispatch.select(n, d, k, threads = 1, backends = backends) == "mpi"
+    assert dispatch.select(n, d, k, threads = 8, backends = backends) == "shm"
+
+def test_threads_rejected(data):
+    with pytest.raises(ValueError):
+        kmeans.kmeans(data, 3, threads = 0)
@@ -0,0 +1,99 @@
+import os
+
+from kmeans import kernel_cache, trace
+
+#------------------------------------------------------------------------------------
+#               kernel_cache with a mocked compiler, loader and context
+#------------------------------------------------------------------------------------
+#
+# Runs on hosts without a gpu or pycuda: the compiler returns the source as
+# the cubin and counts its calls, the loader wraps a cubin in a new object
+# and the context is whatever the test sets.
+
+SOURCE = "#define NDIM 4\n#define NCLUSTERS 8\n__global__ void k(int npts) {}\n"
+
+
+class Mock(object):
+
+    def __init__(self):
+        self.compiled = []
+        self.loaded = 0
+        self.current = "ctx0"
+
+    def compile(self, source, options, arch):
+        self.compiled.append((source, tuple(options), arch))
+        return (arch + "\0" + source).encode("utf-8")
+
+    def load(self, cubin):
+        self.loaded += 1
+        return {"cubin": cubin, "load": self.loaded}
+
+    def cache(self, cache_dir, arch = "sm_00"):
+        return kernel_cache.KernelCache(str(cache_dir), compiler = self.compile,
+                                        loader = self.load, arch = arch,
+                                        context = lambda: self.current)
+
+
+def test_miss_then_hit_in_memory(tmp_path):
+    mock = Mock()
+    cache = mock.cache(tmp_path)
+    first = cache.module(SOURCE)
+    assert (cache.hits, cache.misses) == (0, 1)
+    assert cache.module(SOURCE) is first
+    assert (cache.hits, cache.misses) == (1, 1)
+    assert len(mock.compiled) == 1 and mock.loaded == 1
+
+def test_hit_on_disk_across_caches(tmp_path):
+    mock = Mock()
+    mock.cache(tmp_path).module(SOURCE)
+    cache = mock.cache(tmp_path)
+    module = cache.module(SOURCE)
+    assert (cache.hits, cache.misses) == (1, 0)
+    assert len(mock.compiled) == 1
+    assert module["cubin"] == b"sm_00\0" + SOURCE.encode("utf-8")
+    assert os.listdir(str(tmp_path)) == [cache.key(SOURCE) + ".cubin"]
+
+def test_modules_are_kept_per_context(tmp_path):
+    mock = Mock()
+    cache = mock.cache(tmp_path)
+    first = cache.module(SOURCE)
+    mock.current = "ctx1"
+    second = cache.module(SOURCE)
+    # loaded again in the new context, from the cubin on disk
+    assert second is not first
+    assert len(mock.compiled) == 1 and mock.loaded == 2
+    mock.current = "ctx0"
+    assert cache.module(SOURCE) is first
+
+def test_key_depends_on_source_options_and_arch(tmp_path):
+    mock = Mock()
+    cache = mock.cache(tmp_path)
+    cache.module(SOURCE)
+    cache.module(SOURCE.replace("NCLUSTERS 8", "NCLUSTERS 9"))
+    cache.module(SOURCE, ["-use_fast_math"])
+    mock.cache(tmp_path, arch = "sm_99").module(SOURCE)
+    assert [c[1:] for c in mock.compiled] == [((), "sm_00"), ((), "sm_00"),
+                                              (("-use_fast_math",), "sm_00"), ((), "sm_99")]
+    assert len(set(cache.key(*c[:2], arch = c[2]) for c in mock.compiled)) == 4
+
+def test_clear(tmp_path):
+    mock = Mock()
+    cache = mock.cache(tmp_path)
+    cache.module(SOURCE)
+    cache.clear()
+    assert cache.modules == {} and os.listdir(str(tmp_path)) == []
+    cache.module(SOURCE)
+    assert len(mock.compiled) == 2
+
+def test_trace_counts_hits_and_misses(tmp_path):
+    mock = Mock()
+    cache = mock.cache(tmp_path)
+    trace.reset()
+    trace.enable()
+    try:
+        cache.module(SOURCE)
+        cache.module(SOURCE)
+    finally:
+        trace.disable()
+    counts = trace.totals()[("cuda", trace.COMPILE)]
+    assert (counts["calls"], counts["hits"], counts["misses"]) == (2, 1, 1)
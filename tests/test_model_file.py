@@ -0,0 +1,81 @@
+import numpy as np
+import pytest
+
+from kmeans import libmpikmeans, model_file
+
+needs_core = pytest.mark.skipif(libmpikmeans.library_path() is None,
+                                reason = "libmpikmeans is not built")
+
+#------------------------------------------------------------------------------------
+#                   model files: write, map, predict, and the C core's
+#------------------------------------------------------------------------------------
+
+@pytest.fixture(scope = "module")
+def centers():
+    return np.random.RandomState(3).randn(12, 6) * 4
+
+def nearest(X, centers):
+    return ((X[:, np.newaxis, :] - centers[np.newaxis]) ** 2).sum(2).argmin(1)
+
+
+def test_round_trip(centers, tmp_path):
+    filename = str(tmp_path / "model.kmm")
+    model_file.write_model(filename, centers)
+    model = model_file.open_model(filename)
+    assert (model.centers == centers).all()
+    np.testing.assert_allclose(model.cnorm, (centers * centers).sum(1), rtol = 1e-15)
+    half = 0.5 * np.sqrt(((centers[:, np.newaxis] - centers[np.newaxis]) ** 2).sum(2))
+    np.testing.assert_allclose(model.cl_dist, half, rtol = 1e-6)
+    np.fill_diagonal(half, np.inf)
+    np.testing.assert_allclose(model.s, half.min(1), rtol = 1e-6)
+    assert (model.buf == model_file.model_array(centers)).all()
+
+@needs_core
+def test_same_model_as_c_core(centers):
+    # the header and centers byte for byte, the rest up to the rounding of the build
+    ours = model_file.Model(model_file.model_array(centers))
+    core = model_file.Model(libmpikmeans.model_fill(centers))
+    header = 4 * model_file.HEADER
+    assert (ours.buf[:header] == core.buf[:header]).all()
+    assert (ours.centers.view(np.uint8) == core.centers.view(np.uint8)).all()
+    np.testing.assert_allclose(ours.cnorm, core.cnorm, rtol = 1e-13)
+    np.testing.assert_allclose(ours.cl_dist, core.cl_dist, rtol = 1e-6)
+    np.testing.assert_allclose(ours.s, core.s, rtol = 1e-6)
+    X = np.random.RandomState(6).randn(2000, 6) * 5
+    assert (ours.predict(X) == core.predict(X)).all()
+
+@pytest.mark.parametrize("pruned", [False, pytest.param(True, marks = needs_core)])
+def test_predict(centers, tmp_path, monkeypatch, pruned):
+    if not pruned:
+        monkeypatch.setattr(libmpikmeans, "library_path", lambda: None)
+    filename = str(tmp_path / "model.kmm")
+    model_file.write_model(filename, centers)
+    X = np.random.RandomState(4).randn(5000, 6) * 5
+    labels = model_file.open_model(filename).predict(X, chunk_size = 1500)
+    assert labels.dtype == np.int32
+    assert (labels == nearest(X, centers)).all()
+
+@needs_core
+def test_model_assign_sse(centers):
+    X = np.random.RandomState(5).randn(1000, 6) * 5
+    labels, sse = libmpikmeans.model_assign(model_file.model_array(centers), X)
+    assert (labels == nearest(X, centers)).all()
+    diff = X - centers[labels]
+    assert sse == pytest.approx((diff * diff).sum(), rel = 1e-12)
+
+def test_single_center(tmp_path):
+    filename = str(tmp_path / "model.kmm")
+    model_file.write_model(filename, np.ones((1, 3)))
+    model = model_file.open_model(filename)
+    assert (model.predict(np.zeros((4, 3))) == 0).all()
+
+def test_rejects_other_files(centers):
+    buf = model_file.model_array(centers)
+    with pytest.raises(ValueError):
+        model_file.Model(buf[:-4])
+    bad = buf.copy()
+    bad[:4] = 0
+    with pytest.raises(ValueError):
+        model_file.Model(bad)
+    with pytest.raises(ValueError):
+        model_file.open_model(__file__)
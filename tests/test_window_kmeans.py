@@ -0,0 +1,80 @@
+import numpy as np
+import pytest
+
+from kmeans.window_kmeans import WindowKMeans
+
+#------------------------------------------------------------------------------------
+#               sliding-window kmeans: bounds, summaries and the fixed point
+#------------------------------------------------------------------------------------
+#
+# A drifting stream of batches is added and expired.  After every call the
+# bounds of each point in the window must hold for the current centers, the
+# per cluster summaries must cover the bounds of their points, and the sums
+# and counts must be those of the window.  refine() run to convergence must
+# leave every point with its nearest center and the centers at the means.
+
+EPS = 1e-9
+
+
+def check_window(window):
+    slots = window.slots()
+    X, labels = window.X[slots], window.labels[slots]
+    rows = np.arange(len(slots))
+    dist = np.sqrt(((X[:, np.newaxis, :] - window.centers[np.newaxis]) ** 2).sum(2))
+    # upper bound on the distance to the own center, lower bound on the others
+    assert (dist[rows, labels] <= window.upper[slots] + EPS).all()
+    dist[rows, labels] = np.inf
+    assert (dist.min(1) >= window.lower[slots] - window.shift - EPS).all()
+    for j in np.unique(labels):
+        mine = slots[labels == j]
+        assert window.upper_max[j] >= window.upper[mine].max()
+        assert window.lower_min[j] <= window.lower[mine].min()
+    counts = np.bincount(labels, minlength = len(window.centers))
+    assert (window.counts == counts).all()
+    sums = np.array([X[labels == j].sum(0) for j in range(len(window.centers))])
+    np.testing.assert_allclose(window.sums, sums, atol = 1e-6)
+
+@pytest.mark.parametrize("tol", [0., 0.5])
+@pytest.mark.parametrize("max_iter", [1, 3])
+def test_bounds_stay_valid(tol, max_iter):
+    rng = np.random.RandomState(0)
+    true = rng.randn(10, 4) * 5
+    window = WindowKMeans(6000, true + rng.randn(10, 4), max_iter = max_iter, tol = tol)
+    # 24000 arrivals, so the sums are rebuilt and the shift taken out of the bounds
+    for t in range(60):
+        labels = rng.randint(10, size = 400)
+        window.add(true[labels] + 0.05 * t + rng.randn(400, 4), np.full(400, float(t)))
+        check_window(window)
+        window.expire(t - 10)
+        check_window(window)
+
+def test_refine_to_fixed_point():
+    rng = np.random.RandomState(1)
+    X = rng.randn(3000, 3) + np.repeat(rng.randn(6, 3) * 4, 500, 0)
+    window = WindowKMeans(len(X), X[::500] + 0.5, refine_every = 0)
+    window.add(X)
+    window.refine(1000)
+    assert not window.changed.any()
+    check_window(window)
+    points, labels = window.window()
+    dist = ((points[:, np.newaxis, :] - window.centers[np.newaxis]) ** 2).sum(2)
+    assert (labels == dist.argmin(1)).all()
+    means = np.array([points[labels == j].mean(0) for j in range(6)])
+    np.testing.assert_allclose(window.centers, means, rtol = 1e-9, atol = 1e-9)
+
+def test_add_more_rows_than_capacity():
+    # every row gets the label of its nearest center; only the last capacity rows stay
+    rs = np.random.RandomState(5)
+    centers = rs.randn(4, 3) * 5
+    window = WindowKMeans(100, centers, refine_every = 0)
+    X = centers[rs.randint(0, 4, 250)] + rs.randn(250, 3)
+    times = np.arange(250.)
+    labels = window.add(X, times)
+    assert labels.dtype == np.int32 and len(labels) == len(X)
+    dist = ((X[:, np.newaxis, :] - centers[np.newaxis]) ** 2).sum(2)
+    assert (labels == dist.argmin(1)).all()
+    points, kept = window.window()
+    assert window.size == 100 and (points == X[-100:]).all() and (kept == labels[-100:]).all()
+    assert (window.times[window.slots()] == times[-100:]).all()
+    assert window.counts.sum() == 100
+    check_window(window)
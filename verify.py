@@ -7,15 +7,19 @@ Throws an exception on the first error.
 
 import numpy as np
 import numpy.random as random
-import py_kmeans
-from scipy.cluster.vq import kmeans, vq, kmeans2
+from scipy.cluster.vq import vq, kmeans2
 import time
-import cuda_kmeans
-import cuda_kmeans_tri
-import cpu_kmeans
+import kmeans
+from kmeans import py_kmeans
+from kmeans import cpu_kmeans
+from kmeans import cpu_kmeans_tri
+from kmeans import trace
 
 VERBOSE = 0
 PRINT_TIMES = 1
+USE_GPU = kmeans.has_cuda()     # the cuda and tri comparisons are skipped on cpu-only hosts
+TRACE = 0         # record per-phase spans and write them to TRACE_FILE
+TRACE_FILE = "verify_trace.json"
 SEED = 200
 
 def mpi_labels(data, num_clusters, nReps, seed = SEED):
@@ -39,59 +43,72 @@ def run_labels(data, nClusters, nReps, seed=SEED):
     # which will be used by the scipy routine
     clusters, dist, labels = py_kmeans.kmeans(data, nClusters, 1, 0)
     if VERBOSE:
-        print "data"
-        print data
-        print "initial clusters:"
-        print clusters
+        print("data")
+        print(data)
+        print("initial clusters:")
+        print(clusters)
  
     (nPts, nDim) = data.shape
     nClusters = clusters.shape[0] 
-    print "[nPts:{0:6}][nDim:{1:4}][nClusters:{2:4}][nReps:{3:3}]...".format(nPts, nDim, nClusters, nReps),
+    print("[nPts:{0:6}][nDim:{1:4}][nClusters:{2:4}][nReps:{3:3}]...".format(nPts, nDim, nClusters, nReps), end=' ')
 
-    data2 = np.swapaxes(data, 0, 1).astype(np.float32).copy('C')
-    clusters2 = np.swapaxes(clusters, 0, 1).astype(np.float32).copy('C')
+    with trace.span(trace.DATA, "verify", name="swapaxes"):
+        data2 = np.swapaxes(data, 0, 1).astype(np.float32).copy('C')
+        clusters2 = np.swapaxes(clusters, 0, 1).astype(np.float32).copy('C')
 
     if VERBOSE:
-        print "data2"
-        print data2
-        print "clusters2"
-        print clusters2
-
-    t1 = time.time()
-    (cuda_clusters, cuda_labels) = cuda_kmeans.kmeans_gpu(data2, clusters2, nReps+1)
-    if VERBOSE:
-        print "cuda_kmeans labels:"
-        print cuda_labels
-    t2 = time.time()
-    if PRINT_TIMES:
-        print "\ncuda ", t2-t1
+        print("data2")
+        print(data2)
+        print("clusters2")
+        print(clusters2)
+
+    if USE_GPU:
+        from kmeans import cuda_kmeans, cuda_kmeans_tri
+
+        t1 = time.time()
+        (cuda_clusters, cuda_labels) = cuda_kmeans.kmeans_gpu(data2, clusters2, nReps+1)
+        if VERBOSE:
+            print("cuda_kmeans labels:")
+            print(cuda_labels)
+        t2 = time.time()
+        if PRINT_TIMES:
+            print("\ncuda ", t2-t1)
     
+        t1 = time.time()
+        (tri_clusters, tri_labels) = cuda_kmeans_tri.trikmeans_gpu(data2, clusters2, nReps+1)
+        if VERBOSE:
+            print("cuda_kmeans_tri labels:")
+            print(tri_labels)
+        t2 = time.time()
+        if PRINT_TIMES:
+            print("tri  ", t2-t1)
+
     t1 = time.time()
-    (tri_clusters, tri_labels) = cuda_kmeans_tri.trikmeans_gpu(data2, clusters2, nReps+1)
+    (tricpu_clusters, tricpu_labels) = cpu_kmeans_tri.trikmeans_cpu(data2, clusters2, nReps+1)
     if VERBOSE:
-        print "cuda_kmeans_tri labels:"
-        print tri_labels
+        print("cpu_kmeans_tri labels:")
+        print(tricpu_labels)
     t2 = time.time()
     if PRINT_TIMES:
-        print "tri  ", t2-t1
+        print("tricpu", t2-t1)
 
     t1 = time.time()
     labels_mpi = mpi_labels(data, nClusters, nReps+1, seed)
     if VERBOSE:
-        print "mpi labels:"
-        print labels_mpi[0]
+        print("mpi labels:")
+        print(labels_mpi[0])
     t2 = time.time()
     if PRINT_TIMES:
-        print "mpi  ", t2-t1
+        print("mpi  ", t2-t1)
 
     t1 = time.time()
     labels_scipy = scipy_labels(data, clusters, nReps)
     if VERBOSE:
-        print "scipy labels:"
-        print labels_scipy[0]
+        print("scipy labels:")
+        print(labels_scipy[0])
     t2 = time.time()
     if PRINT_TIMES:
-        print "scipy", t2-t1
+        print("scipy", t2-t1)
     
     """
     t1 = time.time()
@@ -107,15 +124,29 @@ def run_labels(data, nClusters, nReps, seed=SEED):
     try:
         np.testing.assert_array_equal(labels_mpi[0], labels_scipy[0])
     except AssertionError:
-        print "mpi <> scipy"
+        print("mpi <> scipy")
         error = 1
     
     try:
-        np.testing.assert_array_equal(cuda_labels, tri_labels)
+        np.testing.assert_array_equal(labels_mpi[0], tricpu_labels)
     except AssertionError:
-        print "cuda <> tri"
+        print("tricpu <> mpi")
         error = 1
 
+    if USE_GPU:
+        try:
+            np.testing.assert_array_equal(tri_labels, tricpu_labels)
+        except AssertionError:
+            print("tri <> tricpu")
+            error = 1
+
+    if USE_GPU:
+        try:
+            np.testing.assert_array_equal(cuda_labels, tri_labels)
+        except AssertionError:
+            print("cuda <> tri")
+            error = 1
+
     """
     try:
         np.testing.assert_array_equal(cuda_labels, cpu_labels)
@@ -124,20 +155,21 @@ def run_labels(data, nClusters, nReps, seed=SEED):
         error = 1
     """
 
-    try:
-        np.testing.assert_array_equal(labels_mpi[0], cuda_labels)
-    except AssertionError:
-        print "cuda <> mpi"
-        error = 1
+    if USE_GPU:
+        try:
+            np.testing.assert_array_equal(labels_mpi[0], cuda_labels)
+        except AssertionError:
+            print("cuda <> mpi")
+            error = 1
     if error == 0:
-        print "Labels OK ..."
+        print("Labels OK ...")
     
     #print "Clusters max diff =", np.max(labels_mpi[1] - labels_scipy[1]) 
 
 
 def run_tests():
     t1 = time.time()
-    print "Testing that all k-means algorithms produce same results..."
+    print("Testing that all k-means algorithms produce same results...")
     nReps = [1, 10]
     for nReps in [1,10]:
         for nClusters in [3, 30, 120]:
@@ -148,7 +180,7 @@ def run_tests():
                     data = random.rand(nPts, nDim)
                     run_labels(data, nClusters, nReps)
 
-    print "Testing complete in ", time.time()-t1, "seconds"
+    print("Testing complete in ", time.time()-t1, "seconds")
 
 def run_quick(nReps = 4):
     data = random.rand(1000, 60)
@@ -167,5 +199,10 @@ def run_quick(nReps = 4):
     run_labels(data, 20, nReps)
     
 if __name__ == '__main__':
+    if TRACE:
+        trace.enable()
     run_quick()
+    if TRACE:
+        print(trace.summary())
+        trace.write_chrome_trace(TRACE_FILE)
 